@@ -0,0 +1,85 @@
+"""Cold storage for old history.
+
+Entries older than the cutoff are moved out of the hot documents into one
+gzip-compressed JSONL blob per user and month. Each line is a record:
+
+    {"kind": "mood", "mood": ..., "timestamp": "YYYY-MM-DD HH:MM:SS"}
+    {"kind": "habit", "habit": ..., "day": "YYYY-MM-DD"}
+    {"kind": "goal", "goal": ..., "day": "YYYY-MM-DD"}
+
+Blobs hold the values exactly as stored, so encrypted text stays encrypted.
+"""
+from datetime import timedelta
+import gzip
+import json
+
+
+def record_day(record):
+    return record["timestamp"][:10] if record["kind"] == "mood" else record["day"]
+
+
+def period_of(record):
+    """The archive period ("YYYY-MM") a record belongs to."""
+    return record_day(record)[:7]
+
+
+def cutoff_day(now, age_days):
+    """First day of the month ``age_days`` ago; only whole months older than that are archived."""
+    return (now - timedelta(days=age_days)).strftime("%Y-%m-01")
+
+
+def by_period(records):
+    periods = {}
+    for record in records:
+        periods.setdefault(period_of(record), []).append(record)
+    return periods
+
+
+def archived_keys(records):
+    """Mood timestamps and ``(habit, day)`` pairs held by archive records.
+
+    Imports skip these: once compacted, history is no longer in the hot
+    tables, so re-importing a file would otherwise store it (and later
+    archive and count it) a second time.
+    """
+    moods = {record["timestamp"] for record in records if record["kind"] == "mood"}
+    habit_logs = {(record["habit"], record["day"]) for record in records if record["kind"] == "habit"}
+    return moods, habit_logs
+
+
+def pack(records, existing=None):
+    """Compress records into a blob, merged with an existing blob for the same period.
+
+    Records are de-duplicated, so re-archiving entries after an interrupted
+    compaction doesn't store them twice.
+    """
+    lines = {json.dumps(record, sort_keys=True) for record in records}
+    if existing:
+        lines.update(gzip.decompress(existing).decode().splitlines())
+    return gzip.compress("\n".join(sorted(lines)).encode())
+
+
+def unpack(blob):
+    return [json.loads(line) for line in gzip.decompress(blob).decode().splitlines() if line]
+
+
+def merge_history(records, moods, habits):
+    """Put archived records back in front of the hot moods and habit history.
+
+    Archived logs of habits the user has since cleared are left out.
+    Returns ``(moods, habits)`` in the shapes of ``get_moods`` and ``get_habit_history``.
+    """
+    archived_moods = [
+        {"mood": record["mood"], "timestamp": record["timestamp"]} for record in records if record["kind"] == "mood"
+    ]
+    moods = sorted(archived_moods, key=lambda entry: entry["timestamp"]) + list(moods)
+
+    archived_days = {}
+    for record in records:
+        if record["kind"] == "habit":
+            archived_days.setdefault(record["habit"], set()).add(record["day"])
+    habits = [
+        {"habit": habit["habit"], "logs": sorted(archived_days.get(habit["habit"], set()) | set(habit.get("logs", [])))}
+        for habit in habits
+    ]
+    return moods, habits
@@ -0,0 +1,97 @@
+"""Measure what field-level encryption adds to each storage call.
+
+Usage:
+    python bench_crypto.py --rounds 500 --moods 365
+
+Runs the storage calls behind the common commands against a throwaway
+SQLite file, once in plaintext and once with encryption, and prints the
+per-call latency of each and the difference. Calls go through the same
+async facade the cogs use, so the numbers include the executor hop.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run_calls(storage, rounds, moods):
+    """Time each storage call used by /logmood, /viewmoods, /loghabit and /viewhabits."""
+    user_id = 1
+    await storage.create_profile(user_id, "bench", "UTC")
+    for i in range(moods):
+        await storage.add_mood(user_id, f"calm and focused, day {i}", f"2025-01-01 {i % 24:02d}:00:00")
+    for i in range(10):
+        await storage.add_habit(user_id, f"habit {i}", "08:00")
+
+    timings = {"add_mood": [], "get_moods": [], "log_habit": [], "habit_page": []}
+    for i in range(rounds):
+        calls = {
+            "add_mood": storage.add_mood(user_id, "happy", "2025-06-01 12:00:00"),
+            "get_moods": storage.get_moods(user_id),
+            "log_habit": storage.log_habit(user_id, f"habit {i % 10}", f"2025-06-{i % 28 + 1:02d}"),
+            "habit_page": storage.habit_page(user_id, 0, 10),
+        }
+        for name, call in calls.items():
+            started = time.perf_counter()
+            await call
+            timings[name].append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def bench(rounds, moods):
+    from storage import Storage
+    from storage.encrypted import EncryptedBackend
+    from storage.sqlite import SQLiteBackend
+
+    results = {}
+    master_key = os.urandom(32)
+    for label in ("plain", "encrypted"):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteBackend(os.path.join(directory, "bench.db"))
+            if label == "encrypted":
+                backend = EncryptedBackend(backend, master_key)
+            store = Storage(backend)
+            try:
+                results[label] = await run_calls(store, rounds, moods)
+            finally:
+                store.close()
+
+    print(f"{'call':<14}{'plain p50':>11}{'enc p50':>10}{'plain p95':>11}{'enc p95':>10}{'overhead':>11}")
+    for name in results["plain"]:
+        plain, encrypted = results["plain"][name], results["encrypted"][name]
+        overhead = statistics.median(encrypted) - statistics.median(plain)
+        print(f"{name:<14}{percentile(plain, 50):>9.3f}ms{percentile(encrypted, 50):>8.3f}ms"
+              f"{percentile(plain, 95):>9.3f}ms{percentile(encrypted, 95):>8.3f}ms{overhead:>+9.3f}ms")
+    print(f"(get_moods decrypts {moods + rounds // 2}+ moods per call on average)")
+
+
+def bench_fields(count):
+    """Raw cost of one field encrypt/decrypt, without any storage."""
+    from storage.encrypted import FieldCipher
+
+    cipher = FieldCipher(1, os.urandom(32))
+    started = time.perf_counter()
+    sealed = [cipher.encrypt("mood", f"feeling okay {i}") for i in range(count)]
+    encrypt_us = (time.perf_counter() - started) / count * 1e6
+    started = time.perf_counter()
+    for value in sealed:
+        cipher.decrypt("mood", value)
+    decrypt_us = (time.perf_counter() - started) / count * 1e6
+    print(f"Field encrypt {encrypt_us:.1f} µs, decrypt {decrypt_us:.1f} µs ({count} fields)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark field-level encryption overhead.")
+    parser.add_argument("--rounds", type=int, default=500, help="Timed iterations per call")
+    parser.add_argument("--moods", type=int, default=365, help="Moods in the user's history before timing")
+    options = parser.parse_args()
+
+    bench_fields(10000)
+    asyncio.run(bench(options.rounds, options.moods))
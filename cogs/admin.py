@@ -0,0 +1,96 @@
+import time
+import discord
+from discord import app_commands
+from discord.ext import commands
+import logging
+from hotreload import command_signature
+
+class Admin(commands.Cog):
+    """Owner-only maintenance commands."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+    async def cog_names(self, interaction: discord.Interaction, current: str):
+        names = sorted(name[len("cogs."):] for name in self.aurabot.extensions if name.startswith("cogs."))
+        return [app_commands.Choice(name=name, value=name) for name in names if current.lower() in name][:25]
+
+    @app_commands.command(name="reload", description="Reload a cog in place without restarting AuraBot (owner only).")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.autocomplete(cog=cog_names)
+    async def reload(self, interaction: discord.Interaction, cog: str):
+        """Handles /reload. Background loops hand their state to the new instance; commands are only resynced if they changed."""
+        if not await self.aurabot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can reload cogs.", ephemeral=True)
+            return
+
+        extension = f"cogs.{cog}"
+        if extension not in self.aurabot.extensions:
+            await interaction.response.send_message(f"Unknown cog `{cog}`.", ephemeral=True)
+            return
+
+        # Syncing can take a few seconds, longer than Discord waits for a first response
+        await interaction.response.defer(ephemeral=True)
+        started = time.perf_counter()
+        try:
+            await self.aurabot.reload_extension(extension)
+        except commands.ExtensionError as e:
+            # discord.py puts the previous version back when the new one fails to load
+            logging.error(f"Failed to reload {extension}: {e}")
+            await interaction.followup.send(f"Reloading `{cog}` failed; the previous version is still running.\n`{e}`")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.aurabot.rebuild_help()
+
+        if command_signature(self.aurabot.tree) == self.aurabot.synced_signature:
+            note = "commands unchanged, sync skipped"
+        else:
+            try:
+                await self.aurabot.sync_commands()
+                note = "commands changed and were synced"
+            except Exception as e:
+                logging.error(f"Error syncing commands after reloading {extension}: {e}")
+                note = "commands changed but the sync failed; see the logs"
+
+        print(f"Reloaded {extension} in {elapsed:.0f} ms ({note})")
+        await interaction.followup.send(f"Reloaded `{cog}` in {elapsed:.0f} ms ({note}).")
+
+    @app_commands.command(name="stalls", description="Show what has been blocking AuraBot's event loop (owner only).")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(reset="Clear the collected stalls after showing them")
+    async def stalls(self, interaction: discord.Interaction, reset: bool = False):
+        """Handles /stalls. Lists the cogs, commands and call sites that blocked the loop longest."""
+        if not await self.aurabot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can view stalls.", ephemeral=True)
+            return
+
+        watchdog = self.aurabot.watchdog
+        if watchdog is None:
+            await interaction.response.send_message("Stall detection is off (STALL_THRESHOLD_MS=0).", ephemeral=True)
+            return
+
+        top = watchdog.top(10)
+        embed = discord.Embed(
+            title="Event Loop Stalls",
+            description=(
+                f"Stalls over {watchdog.threshold * 1000:.0f} ms since <t:{int(watchdog.started_at)}:R>, "
+                "ordered by total time blocked."
+            ),
+            color=discord.Color.orange(),
+        )
+        for cog, command, site, count, total, worst in top:
+            embed.add_field(
+                name=f"{cog} · {command}",
+                value=f"`{site}`\n{count} stalls, {total * 1000:.0f} ms total, worst {worst * 1000:.0f} ms",
+                inline=False,
+            )
+        if not top:
+            embed.add_field(name="No stalls", value="Nothing has blocked the loop past the threshold.", inline=False)
+
+        if reset:
+            watchdog.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(Admin(aurabot))
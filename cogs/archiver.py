@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime
+import logging
+from discord.ext import commands, tasks
+from archive import cutoff_day
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from hotreload import stop_loop
+
+class Archiver(commands.Cog):
+    """Background compaction that moves old history into cold storage."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+        self.storage = aurabot.storage
+
+        self.tick_lock = asyncio.Lock()
+        self.compact_history.start()
+
+    async def cog_unload(self):
+        # Each user is compacted in one call, so stopping between users is always safe
+        await stop_loop(self.compact_history, self.tick_lock)
+
+    @tasks.loop(hours=6)
+    async def compact_history(self):
+        """Archive every user's entries from months older than ARCHIVE_AFTER_DAYS."""
+        async with self.tick_lock:
+            before_day = cutoff_day(datetime.utcnow(), ARCHIVE_AFTER_DAYS)
+            totals = {"users": 0, "moods": 0, "habit_logs": 0, "goal_days": 0, "bytes": 0}
+            cursor = None
+            try:
+                while True:
+                    user_ids = await self.storage.compaction_candidates(before_day, cursor, ARCHIVE_BATCH_SIZE)
+                    if not user_ids:
+                        break
+                    for user_id in user_ids:
+                        stats = await self.storage.compact_user(user_id, before_day)
+                        totals["users"] += 1
+                        for key, value in stats.items():
+                            totals[key] += value
+                    cursor = user_ids[-1]
+                    # Let commands through between batches
+                    await asyncio.sleep(1)
+            except Exception as e:
+                logging.error(f"Error compacting history for users after {cursor}: {e}")
+            if totals["users"]:
+                logging.info(f"Archived history before {before_day}: {totals}")
+
+    @compact_history.before_loop
+    async def before_compact_history(self):
+        await self.aurabot.wait_until_ready()
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(Archiver(aurabot))
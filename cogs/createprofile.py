@@ -1,18 +1,12 @@
 import discord
 from discord.ext import commands
-from pymongo import MongoClient
-from dotenv import load_dotenv
 import pytz
-import os
-from config import GUILD_ID
-
-# Load environment variables
-load_dotenv()
+from guildconfig import settings_for
 
 class TimezoneDropdown(discord.ui.Select):
-    def __init__(self, user_id, profile_collection):
+    def __init__(self, user_id, storage):
         self.user_id = user_id
-        self.profile_collection = profile_collection
+        self.storage = storage
 
         # Commonly used timezones (you can expand this list)
         timezones = [
@@ -28,39 +22,22 @@ class TimezoneDropdown(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         selected_timezone = self.values[0]
-        self.profile_collection.update_one(
-            {"_id": self.user_id},
-            {"$set": {"timezone": selected_timezone}},
-            upsert=True
-        )
+        await self.storage.set_timezone(self.user_id, selected_timezone)
         await interaction.response.send_message(
             f"Your timezone has been set to **{selected_timezone}**."
         )
 
 class TimezoneDropdownView(discord.ui.View):
-    def __init__(self, user_id, profile_collection):
+    def __init__(self, user_id, storage):
         super().__init__()
-        self.add_item(TimezoneDropdown(user_id, profile_collection))
+        self.add_item(TimezoneDropdown(user_id, storage))
 
 class CreateProfile(commands.Cog):
     """Cog for creating user profiles with timezone selection."""
 
     def __init__(self, aurabot):
         self.aurabot = aurabot
-
-        # MongoDB setup
-        mongo_url = os.getenv("MONGO_URL")
-        if not mongo_url:
-            raise ValueError("MongoDB connection string is not set in .env")
-
-        self.cluster = MongoClient(mongo_url)
-        self.db = self.cluster["AuraBotDB"]
-        self.profile_collection = self.db["user_profiles"]
-
-    async def cog_load(self):
-        """Register commands when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)
-        self.aurabot.tree.add_command(self.create_profile, guild=guild)
+        self.storage = aurabot.storage
 
     @discord.app_commands.command(name="createprofile", description="Create your profile with your Discord username and timezone.")
     async def create_profile(self, interaction: discord.Interaction):
@@ -69,7 +46,7 @@ class CreateProfile(commands.Cog):
         username = interaction.user.name  # Use Discord username
 
         # Check if the user already has a profile
-        existing_profile = self.profile_collection.find_one({"_id": user_id})
+        existing_profile = await self.storage.get_profile(user_id)
 
         if existing_profile:
             existing_username = existing_profile.get("username", "No username set.")
@@ -78,14 +55,15 @@ class CreateProfile(commands.Cog):
                 f"You already have a profile:\n- **Username**: {existing_username}\n- **Timezone**: {existing_timezone}"
             )
         else:
-            # Create a new profile with the username
-            self.profile_collection.insert_one({"_id": user_id, "username": username})
+            # Create a new profile with the username and the server's default timezone
+            default_timezone = settings_for(self.aurabot, interaction.guild_id)["default_timezone"]
+            await self.storage.create_profile(user_id, username, default_timezone)
             await interaction.response.send_message(
                 f"Your profile has been created with the username: **{username}**.\nNow, select your timezone:"
             )
 
             # Show the timezone dropdown menu
-            view = TimezoneDropdownView(user_id, self.profile_collection)
+            view = TimezoneDropdownView(user_id, self.storage)
             await interaction.followup.send(view=view)
 
 # Required setup function
@@ -0,0 +1,123 @@
+import discord
+from discord.ext import commands
+import logging
+import pytz
+from datetime import datetime
+from config import DASHBOARD_MOODS, DASHBOARD_CACHE_SIZE
+from guildconfig import settings_for
+
+# Longest habit/goal/mood list shown in one embed field
+MAX_FIELD_LENGTH = 1024
+
+
+def _field(lines, empty):
+    """Join lines for an embed field, cut to the last whole line that fits."""
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > MAX_FIELD_LENGTH:
+            break
+        text += line + "\n"
+    return text.rstrip("\n") or empty
+
+
+class Dashboard(commands.Cog):
+    """Cog for a one-look summary of a user's profile, habits, goals and moods."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+        # Storage setup
+        self.storage = aurabot.storage
+        # user_id -> (write version, default timezone, dashboard data)
+        self.cache = {}
+
+    async def load(self, user_id, default_timezone):
+        """A user's dashboard data, from cache unless they've written since or their day has turned over."""
+        version = self.storage.write_version(user_id)
+        cached = self.cache.get(user_id)
+        if cached and cached[:2] == (version, default_timezone):
+            board = cached[2]
+            if datetime.now(pytz.timezone(board["timezone"])).strftime("%Y-%m-%d") == board["day"]:
+                return board
+
+        # The version is read before fetching, so a write that lands mid-fetch still invalidates the result
+        board = await self.storage.dashboard(user_id, default_timezone, DASHBOARD_MOODS)
+        if board is None:
+            return None
+        self.cache.pop(user_id, None)
+        self.cache[user_id] = (version, default_timezone, board)
+        if len(self.cache) > DASHBOARD_CACHE_SIZE:
+            # Dicts keep insertion order, so this drops the least recently refreshed user
+            del self.cache[next(iter(self.cache))]
+        return board
+
+    def render(self, board, modules):
+        """Build the dashboard embed, with a section per module enabled in this server."""
+        embed = discord.Embed(
+            title=f"{board['username']}'s Dashboard" if board["username"] else "Your Dashboard",
+            description=f"Today is **{board['day']}** ({board['timezone']}).",
+            color=discord.Color.teal()
+        )
+
+        if "habits" in modules:
+            habits = board["habits"]
+            done = sum(habit["done"] for habit in habits)
+            embed.add_field(
+                name=f"Today's Habits ({done}/{len(habits)})",
+                value=_field(
+                    [f"{'✅' if habit['done'] else '⬜'} {habit['habit']}" for habit in habits],
+                    "No habits yet. Add one with `/addhabit`."
+                ),
+                inline=False
+            )
+
+        if "goals" in modules:
+            embed.add_field(
+                name=f"Active Goals (🏆 {board['points']} points)",
+                value=_field(
+                    [
+                        f"- {goal['goal']}: {goal['progress_days']} days"
+                        + (f", due {goal['deadline']}" if goal.get("deadline") else "")
+                        for goal in board["goals"]
+                    ],
+                    "No active goals. Set one with `/creategoal`."
+                ),
+                inline=False
+            )
+
+        if "moods" in modules:
+            embed.add_field(
+                name="Latest Moods",
+                value=_field(
+                    [f"- {entry['mood']} ({entry['timestamp']})" for entry in reversed(board["moods"])],
+                    "No moods logged yet. Try `/logmood`."
+                ),
+                inline=False
+            )
+            if board["mood_reminder"]:
+                embed.set_footer(text=f"Mood reminder at {board['mood_reminder']} daily")
+        return embed
+
+    @discord.app_commands.command(name="dashboard", description="See your habits, goals and moods for today at a glance.")
+    async def dashboard(self, interaction: discord.Interaction):
+        """Handles /dashboard."""
+        user_id = interaction.user.id
+        settings = settings_for(self.aurabot, interaction.guild_id)
+
+        try:
+            board = await self.load(user_id, settings["default_timezone"])
+        except Exception as e:
+            logging.error(f"Error loading dashboard for user {user_id}: {e}")
+            await interaction.response.send_message("Failed to load your dashboard. Please try again later.")
+            return
+
+        if board is None:
+            await interaction.response.send_message(
+                "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
+            )
+            return
+        await interaction.response.send_message(embed=self.render(board, settings["enabled_modules"]))
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(Dashboard(aurabot))
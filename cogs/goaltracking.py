@@ -2,14 +2,9 @@ import asyncio
 from datetime import datetime, timedelta
 import discord
 from discord.ui import View, Select
-from discord.ext import commands
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
-from config import GUILD_ID
-
-# Load environment variables
-load_dotenv()
+from discord.ext import commands, tasks
+from hotreload import save_state, stop_loop, take_state
+from pagination import PAGE_SIZE, PageCache, PagedEmbedView, page_count
 
 class GoalTracking(commands.Cog):
     """Cog for tracking and logging user goals with optional deadlines and progress updates."""
@@ -17,77 +12,75 @@ class GoalTracking(commands.Cog):
     def __init__(self, aurabot):
         self.aurabot = aurabot
 
-        # MongoDB setup
-        mongo_url = os.getenv("MONGO_URL")
-        if not mongo_url:
-            raise ValueError("MongoDB connection string is not set in .env")
-
-        self.cluster = MongoClient(mongo_url)
-        self.db = self.cluster["AuraBotDB"]
-        self.collection = self.db["goal_tracking"]
-
-        print("Connected to MongoDB for goal tracking!")
+        # Storage setup
+        self.storage = aurabot.storage
+        self.page_cache = PageCache()
 
-        # Start the reminder task
-        self.reminder_task = self.aurabot.loop.create_task(self.send_goal_reminders())
+        # Start the reminder task, keeping the previous instance's schedule after a reload
+        state = take_state(aurabot, "GoalTracking") or {}
+        self.resume_at = state.get("next_check")
+        self.tick_lock = asyncio.Lock()
+        self.send_goal_reminders.start()
 
     async def cog_unload(self):
-        """Stop the reminder task when the cog is unloaded."""
-        self.reminder_task.cancel()
-
-    async def cog_load(self):
-        """Register commands when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)
-        print(f"Registering commands in GoalTracking for guild {GUILD_ID}...")
-        self.aurabot.tree.add_command(self.create_goal, guild=guild)
-        self.aurabot.tree.add_command(self.update_goal, guild=guild)
-        self.aurabot.tree.add_command(self.view_goal, guild=guild)
-        self.aurabot.tree.add_command(self.clear_goal, guild=guild)
-        self.aurabot.tree.add_command(self.delete_goal, guild=guild)
-        self.aurabot.tree.add_command(self.view_points, guild=guild)
-
+        """Stop the reminder task between checks and hand its schedule to the next instance."""
+        # Without this a reload would re-run the hourly check (and its point deductions) right away
+        next_check = self.send_goal_reminders.next_iteration or self.resume_at
+        await stop_loop(self.send_goal_reminders, self.tick_lock)
+        save_state(self.aurabot, "GoalTracking", {"next_check": next_check})
 
+    @tasks.loop(hours=1)
     async def send_goal_reminders(self):
         """Background task to send reminders for goals with upcoming deadlines and manage points."""
+        async with self.tick_lock:
+            try:
+                now = datetime.utcnow()
+                users = await self.storage.get_goal_users()
+
+                for user in users:
+                    # Collect the changes and apply them as targeted updates, so progress
+                    # logged while this loop runs isn't overwritten
+                    reminded = []
+                    deduction = 0
+                    for goal in user["goals"]:
+                        deadline = goal.get("deadline")
+                        last_update = goal.get("last_update")
+
+                        # Check for upcoming deadlines
+                        if deadline:
+                            deadline_date = datetime.strptime(deadline, "%Y-%m-%d")
+                            if now.date() >= (deadline_date - timedelta(days=1)).date() and not goal.get("reminded", False):
+                                user_obj = await self.aurabot.fetch_user(user["_id"])
+                                try:
+                                    await user_obj.send(
+                                        f"Reminder: Your goal `{goal['goal']}` has a deadline on {goal['deadline']}!"
+                                    )
+                                    reminded.append(goal["goal"])
+                                except discord.Forbidden:
+                                    print(f"Failed to send reminder to user {user['_id']} (DMs disabled).")
+
+                        # Handle point deduction for no progress
+                        if last_update:
+                            last_update_date = datetime.strptime(last_update, "%Y-%m-%d").date()
+                            if (now.date() - last_update_date).days >= 1:
+                                # Deduct points for inactivity
+                                deduction += 1
+
+                    # Save changes to the database (points never go negative)
+                    if reminded:
+                        await self.storage.mark_goals_reminded(user["_id"], reminded)
+                    if deduction:
+                        await self.storage.deduct_points(user["_id"], deduction)
+                    if reminded or deduction:
+                        self.page_cache.invalidate(user["_id"])
+            except Exception as e:
+                print(f"Error in goal reminder task: {e}")
+
+    @send_goal_reminders.before_loop
+    async def before_send_goal_reminders(self):
         await self.aurabot.wait_until_ready()
-        while not self.aurabot.is_closed():
-            now = datetime.utcnow()
-            users = self.collection.find()
-
-            for user in users:
-                updated = False  # Track if the user's data was updated
-                for goal in user["goals"]:
-                    deadline = goal.get("deadline")
-                    last_update = goal.get("last_update")
-
-                    # Check for upcoming deadlines
-                    if deadline:
-                        deadline_date = datetime.strptime(deadline, "%Y-%m-%d")
-                        if now.date() >= (deadline_date - timedelta(days=1)).date() and not goal.get("reminded", False):
-                            user_obj = await self.aurabot.fetch_user(user["_id"])
-                            try:
-                                await user_obj.send(
-                                    f"Reminder: Your goal `{goal['goal']}` has a deadline on {goal['deadline']}!"
-                                )
-                                goal["reminded"] = True
-                                updated = True
-                            except discord.Forbidden:
-                                print(f"Failed to send reminder to user {user['_id']} (DMs disabled).")
-
-                    # Handle point deduction for no progress
-                    if last_update:
-                        last_update_date = datetime.strptime(last_update, "%Y-%m-%d").date()
-                        if (now.date() - last_update_date).days >= 1:
-                            # Deduct points for inactivity
-                            user["points"] = user.get("points", 0) - 1
-                            if user["points"] < 0:
-                                user["points"] = 0  # Ensure points don't go negative
-                            updated = True
-
-                # Save changes to the database
-                if updated:
-                    self.collection.update_one({"_id": user["_id"]}, {"$set": user})
-            await asyncio.sleep(3600)  # Check every hour
+        if self.resume_at:
+            await discord.utils.sleep_until(self.resume_at)
 
     @discord.app_commands.command(name="creategoal", description="Create a goal with an optional deadline.")
     async def create_goal(self, interaction: discord.Interaction, goal: str, deadline: str = None):
@@ -109,19 +102,10 @@ class GoalTracking(commands.Cog):
 
         user_id = interaction.user.id
 
-        # Create the goal data
-        goal_data = {
-            "goal": goal,
-            "progress": [],
-            "completed": False
-        }
-        if deadline:
-            goal_data["deadline"] = deadline
-            goal_data["reminded"] = False  # Track if the reminder was sent
-
         try:
             # Add the goal to the database
-            self.collection.update_one({"_id": user_id}, {"$addToSet": {"goals": goal_data}}, upsert=True)
+            await self.storage.add_goal(user_id, goal, deadline)
+            self.page_cache.invalidate(user_id)
             if deadline:
                 await interaction.response.send_message(f"Goal `{goal}` added with a deadline on {deadline}.")
             else:
@@ -136,24 +120,24 @@ class GoalTracking(commands.Cog):
         print("update_goal triggered")
 
         user_id = interaction.user.id
-        user_data = self.collection.find_one({"_id": user_id})
+        goal_names = await self.storage.get_open_goal_names(user_id)
 
-        if not user_data or "goals" not in user_data or len(user_data["goals"]) == 0:
+        if not goal_names:
             await interaction.response.send_message("You don't have any tracked goals.", ephemeral=True)
             return
 
         # Extract goals for dropdown
         goal_options = [
-            discord.SelectOption(label=goal["goal"], description="Click to log progress for this goal")
-            for goal in user_data["goals"] if not goal.get("completed", False)
+            discord.SelectOption(label=goal, description="Click to log progress for this goal")
+            for goal in goal_names
         ]
 
         # Define the dropdown menu
         class GoalSelectView(View):
-            def __init__(self, collection, user_data, user_id):
+            def __init__(self, storage, page_cache, user_id):
                 super().__init__()
-                self.collection = collection
-                self.user_data = user_data
+                self.storage = storage
+                self.page_cache = page_cache
                 self.user_id = user_id
                 self.select = Select(
                     placeholder="Select a goal to log progress...",
@@ -166,29 +150,21 @@ class GoalTracking(commands.Cog):
             async def select_callback(self, select_interaction: discord.Interaction):
                 selected_goal = self.select.values[0]  # Get the selected goal
 
-                # Update the database
-                for goal in self.user_data["goals"]:
-                    if goal["goal"] == selected_goal:
-                        today = datetime.utcnow().strftime("%Y-%m-%d")
-                        if today in goal.get("progress", []):
-                            await select_interaction.response.send_message(
-                                f"Progress for goal `{selected_goal}` already logged today.", ephemeral=True
-                            )
-                            return
-                        goal.setdefault("progress", []).append(today)
-                        goal["last_update"] = today
-
-                        # Award points for progress
-                        self.user_data["points"] = self.user_data.get("points", 0) + 5
-
-                        self.collection.update_one(
-                            {"_id": self.user_id}, {"$set": {"goals": self.user_data["goals"], "points": self.user_data["points"]}}
-                        )
-                        await select_interaction.response.send_message(
-                            f"Progress for goal `{selected_goal}` logged for today. You earned 5 points! 🎉\n"
-                            f"Your total points: {self.user_data['points']}", ephemeral=True
-                        )
-                        return
+                # Update the database, awarding 5 points for progress
+                today = datetime.utcnow().strftime("%Y-%m-%d")
+                status, points = await self.storage.log_goal_progress(self.user_id, selected_goal, today, 5)
+                if status == "already":
+                    await select_interaction.response.send_message(
+                        f"Progress for goal `{selected_goal}` already logged today.", ephemeral=True
+                    )
+                    return
+                if status == "logged":
+                    self.page_cache.invalidate(self.user_id)
+                    await select_interaction.response.send_message(
+                        f"Progress for goal `{selected_goal}` logged for today. You earned 5 points! 🎉\n"
+                        f"Your total points: {points}", ephemeral=True
+                    )
+                    return
 
                 # If the goal isn't found (shouldn't happen)
                 await select_interaction.response.send_message(
@@ -196,75 +172,78 @@ class GoalTracking(commands.Cog):
                 )
 
         # Show the dropdown menu to the user
-        view = GoalSelectView(self.collection, user_data, user_id)
+        view = GoalSelectView(self.storage, self.page_cache, user_id)
         await interaction.response.send_message("Select a goal to log progress:", view=view, ephemeral=True)
 
     @discord.app_commands.command(name="viewpoints", description="View your current points.")
     async def view_points(self, interaction: discord.Interaction):
         """Display the user's current points."""
         user_id = interaction.user.id
-        user_data = self.collection.find_one({"_id": user_id})
-
-        points = user_data.get("points", 0) if user_data else 0
+        points = await self.storage.get_points(user_id)
         await interaction.response.send_message(f"You currently have {points} points. Keep up the great work! 🌟")
 
-    @discord.app_commands.command(name="viewgoal", description="View your tracked goals.")
-    async def view_goal(self, interaction: discord.Interaction):
-        """View the list of goals and their progress."""
-        print("view_goal triggered")
-
-        user_id = interaction.user.id
-        user_data = self.collection.find_one({"_id": user_id})
-
-        if not user_data or "goals" not in user_data:
-            await interaction.response.send_message("You don't have any tracked goals.")
-            return
+    async def render_goal_page(self, user_id, page):
+        """Fetch one page of goals and build its embed. Returns (embed, total_pages) or None."""
+        cached = self.page_cache.get((user_id, "goals", page))
+        if cached:
+            return cached
+
+        # Only the requested slice, reduced to counts, leaves the database
+        user_data = await self.storage.goal_page(user_id, page * PAGE_SIZE, PAGE_SIZE)
+        if not user_data:
+            return None
+        total_pages = page_count(user_data["total"])
+        if page >= total_pages:
+            # Goals were removed since the view was opened
+            return await self.render_goal_page(user_id, total_pages - 1)
 
         embed = discord.Embed(title="Your Goals", color=discord.Color.blue())
         for goal in user_data["goals"]:
-            progress = len(goal["progress"])
             deadline = goal.get("deadline", "No deadline")
-            completed = "✅" if goal.get("completed", False) else "❌"
+            completed = "✅" if goal["completed"] else "❌"
             embed.add_field(
                 name=goal["goal"],
-                value=f"Deadline: {deadline} | Progress Days: {progress} | Completed: {completed}",
+                value=f"Deadline: {deadline} | Progress Days: {goal['progress_days']} | Completed: {completed}",
                 inline=False
             )
 
-        points = user_data.get("points", 0)
+        points = user_data["points"]
         embed.add_field(name="Your Points", value=f"{points} points", inline=False)
+        embed.set_footer(text=f"Page {page + 1}/{total_pages}")
 
-        await interaction.response.send_message(embed=embed)
+        self.page_cache.set((user_id, "goals", page), (embed, total_pages))
+        return embed, total_pages
 
-    @discord.app_commands.command(name="deletegoal", description="Delete a specific goal.")
-    async def delete_goal(self, interaction: discord.Interaction, goal: str):
-        """Delete a specific goal for the user."""
-        user_id = interaction.user.id
+    @discord.app_commands.command(name="viewgoal", description="View your tracked goals.")
+    async def view_goal(self, interaction: discord.Interaction):
+        """View the list of goals and their progress, one page at a time."""
+        print("view_goal triggered")
 
-        # Try to find the user's data
-        user_data = self.collection.find_one({"_id": user_id})
+        user_id = interaction.user.id
+        rendered = await self.render_goal_page(user_id, 0)
 
-        if not user_data or "goals" not in user_data or len(user_data["goals"]) == 0:
-            await interaction.response.send_message("You don't have any tracked goals.", ephemeral=True)
+        if not rendered:
+            await interaction.response.send_message("You don't have any tracked goals.")
             return
 
-        # Find the goal to delete
-        goal_to_delete = None
-        for g in user_data["goals"]:
-            if g["goal"] == goal:
-                goal_to_delete = g
-                break
-
-        if not goal_to_delete:
-            await interaction.response.send_message(f"Goal `{goal}` not found.", ephemeral=True)
+        embed, total_pages = rendered
+        if total_pages == 1:
+            await interaction.response.send_message(embed=embed)
             return
+        view = PagedEmbedView(user_id, lambda page: self.render_goal_page(user_id, page), total_pages)
+        await interaction.response.send_message(embed=embed, view=view)
+
+    @discord.app_commands.command(name="deletegoal", description="Delete a specific goal.")
+    async def delete_goal(self, interaction: discord.Interaction, goal: str):
+        """Delete a specific goal for the user."""
+        user_id = interaction.user.id
 
         # Remove the goal from the database
         try:
-            self.collection.update_one(
-                {"_id": user_id},
-                {"$pull": {"goals": {"goal": goal}}}
-            )
+            if not await self.storage.delete_goal(user_id, goal):
+                await interaction.response.send_message(f"Goal `{goal}` not found.", ephemeral=True)
+                return
+            self.page_cache.invalidate(user_id)
             await interaction.response.send_message(f"Goal `{goal}` has been deleted.", ephemeral=True)
         except Exception as e:
             print(f"Error deleting goal for user {user_id}: {e}")
@@ -277,11 +256,9 @@ class GoalTracking(commands.Cog):
         user_id = interaction.user.id
 
         try:
-            result = self.collection.update_one(
-                {"_id": user_id},
-                {"$pull": {"goals": {"completed": True}}}
-            )
-            if result.modified_count > 0:
+            cleared = await self.storage.clear_completed_goals(user_id)
+            self.page_cache.invalidate(user_id)
+            if cleared > 0:
                 await interaction.response.send_message("All completed goals have been cleared.")
             else:
                 await interaction.response.send_message("You don't have any completed goals to clear.")
@@ -0,0 +1,128 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime
+import logging
+import pytz
+from guildconfig import COG_MODULES, DEFAULT_SETTINGS, MODULES, default_settings
+from hotreload import save_state, take_state
+
+class GuildSettings(commands.Cog):
+    """Cog that keeps per-server settings in storage and caches them in memory."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+        # Storage setup
+        self.storage = aurabot.storage
+
+        # guild id -> settings dict; filled on ready/join so commands never query.
+        # on_ready doesn't fire again after a /reload, so the previous instance hands its cache over.
+        self.cache = take_state(aurabot, "GuildSettings") or {}
+
+    async def cog_unload(self):
+        save_state(self.aurabot, "GuildSettings", self.cache)
+
+    def get(self, guild_id):
+        """Return the cached settings for a guild, falling back to the defaults."""
+        return self.cache.get(guild_id, DEFAULT_SETTINGS)
+
+    def command_enabled(self, guild_id, command):
+        """Whether the module a command belongs to is turned on in this guild."""
+        if guild_id is None or command.binding is None:
+            return True
+        module = COG_MODULES.get(command.binding.qualified_name)
+        return module is None or module in self.get(guild_id)["enabled_modules"]
+
+    async def preload(self, guild_ids):
+        """Load settings for many guilds with a single query."""
+        stored = await self.storage.get_guild_configs(guild_ids)
+        for guild_id in guild_ids:
+            settings = default_settings()
+            settings.update(stored.get(guild_id, {}))
+            self.cache[guild_id] = settings
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Warm the cache for every guild the bot is in."""
+        try:
+            await self.preload([guild.id for guild in self.aurabot.guilds])
+            logging.info(f"Loaded settings for {len(self.cache)} guilds")
+        except Exception as e:
+            logging.error(f"Error preloading guild settings: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        """Create default settings for a new guild (keeping any from a previous stay)."""
+        try:
+            await self.storage.init_guild_config(guild.id, default_settings())
+            await self.preload([guild.id])
+        except Exception as e:
+            logging.error(f"Error creating settings for guild {guild.id}: {e}")
+            self.cache[guild.id] = default_settings()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.cache.pop(guild.id, None)
+
+    @app_commands.command(name="serversettings", description="View or change AuraBot's settings for this server.")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.choices(module=[app_commands.Choice(name=module, value=module) for module in MODULES])
+    async def server_settings(
+        self,
+        interaction: discord.Interaction,
+        module: str = None,
+        enabled: bool = None,
+        default_timezone: str = None,
+        default_reminder_time: str = None
+    ):
+        """Handles /serversettings. With no options, shows the current settings."""
+        guild_id = interaction.guild_id
+        changes = {}
+
+        if module is not None and enabled is not None:
+            modules = set(self.get(guild_id)["enabled_modules"])
+            if enabled:
+                modules.add(module)
+            else:
+                modules.discard(module)
+            changes["enabled_modules"] = [m for m in MODULES if m in modules]
+
+        if default_timezone is not None:
+            if default_timezone not in pytz.all_timezones_set:
+                await interaction.response.send_message(f"Unknown timezone `{default_timezone}`.", ephemeral=True)
+                return
+            changes["default_timezone"] = default_timezone
+
+        if default_reminder_time is not None:
+            try:
+                datetime.strptime(default_reminder_time, "%H:%M")
+            except ValueError:
+                await interaction.response.send_message("Invalid time format! Use HH:MM in 24-hour format.", ephemeral=True)
+                return
+            changes["default_reminder_time"] = default_reminder_time
+
+        if changes:
+            try:
+                await self.storage.update_guild_config(guild_id, changes)
+            except Exception as e:
+                logging.error(f"Error saving settings for guild {guild_id}: {e}")
+                await interaction.response.send_message("Failed to save settings. Please try again later.", ephemeral=True)
+                return
+            settings = dict(self.get(guild_id))
+            settings.update(changes)
+            self.cache[guild_id] = settings
+
+        settings = self.get(guild_id)
+        await interaction.response.send_message(
+            f"**Server Settings**\n"
+            f"- Enabled modules: **{', '.join(settings['enabled_modules']) or 'none'}**\n"
+            f"- Default timezone: **{settings['default_timezone']}**\n"
+            f"- Default mood reminder: **{settings['default_reminder_time']}**",
+            ephemeral=True
+        )
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(GuildSettings(aurabot))
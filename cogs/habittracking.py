@@ -2,14 +2,14 @@ import asyncio
 from datetime import datetime
 import discord
 from discord.ui import View, Select
-from discord.ext import commands
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
-from config import GUILD_ID
-
-# Load environment variables
-load_dotenv()
+from discord.ext import commands, tasks
+import pytz
+from config import REMINDER_CATCHUP_MINUTES
+from guildconfig import settings_for
+from hotreload import stop_loop
+from insights import InsightsStore, local_day
+from reminders import ReminderLedger, due_occurrence, utc_to_local
+from pagination import PAGE_SIZE, PageCache, PagedEmbedView, page_count
 
 class HabitTracking(commands.Cog):
     """Cog for tracking and logging user habits with optional reminders."""
@@ -17,50 +17,56 @@ class HabitTracking(commands.Cog):
     def __init__(self, aurabot):
         self.aurabot = aurabot
 
-        # MongoDB setup
-        mongo_url = os.getenv("MONGO_URL")
-        if not mongo_url:
-            raise ValueError("MongoDB connection string is not set in .env")
-
-        self.cluster = MongoClient(mongo_url)
-        self.db = self.cluster["AuraBotDB"]
-        self.collection = self.db["habit_tracking"]
-
-        print("Connected to MongoDB for habit tracking!")
+        # Storage setup
+        self.storage = aurabot.storage
+        self.ledger = ReminderLedger(self.storage)
+        self.page_cache = PageCache()
+        self.insights = InsightsStore(self.storage)
 
         # Start the reminder task
-        self.reminder_task = self.aurabot.loop.create_task(self.send_reminders())
-
-    async def cog_unload(self):
-        """Stop the reminder task when the cog is unloaded."""
-        self.reminder_task.cancel()
+        self.tick_lock = asyncio.Lock()
+        self.send_reminders.start()
 
     async def cog_load(self):
-        """Register commands when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)
-        print(f"Registering commands in HabitTracking for guild {GUILD_ID}...")
-        self.aurabot.tree.add_command(self.add_habit, guild=guild)
-        self.aurabot.tree.add_command(self.log_habit, guild=guild)
-        self.aurabot.tree.add_command(self.view_habits, guild=guild)
-        self.aurabot.tree.add_command(self.clear_habit, guild=guild)
+        """Move reminder times saved in UTC (before they followed the profile's timezone) to local time, once."""
+        now = datetime.now(pytz.utc)
+        try:
+            converted = await self.storage.localize_habit_reminders(
+                lambda reminder_time, timezone: utc_to_local(reminder_time, timezone, now)
+            )
+            if converted:
+                print(f"Converted {converted} habit reminders from UTC to their users' timezones")
+        except Exception as e:
+            print(f"Error converting habit reminders to local time: {e}")
+
+    async def cog_unload(self):
+        """Stop the reminder task between ticks when the cog is unloaded or reloaded."""
+        await stop_loop(self.send_reminders, self.tick_lock)
 
+    @tasks.loop(minutes=1)
     async def send_reminders(self):
-        """Background task to send reminders for unlogged habits with reminders."""
+        """Background task to send one reminder per day for each unlogged habit with a reminder."""
+        async with self.tick_lock:
+            try:
+                now_utc = datetime.now(pytz.utc)
+                reminders = await self.storage.get_habit_reminders()
+                # Habit days and reminder times are in the user's timezone, like moods
+                timezones = await self.storage.get_timezones({user_id for user_id, _, _, _ in reminders})
+
+                for user_id, habit, reminder_time, recent_logs in reminders:
+                    now_local = now_utc.astimezone(pytz.timezone(timezones.get(user_id, "UTC")))
+                    day = due_occurrence(reminder_time, now_local, REMINDER_CATCHUP_MINUTES)
+                    if day is not None and day not in recent_logs:
+                        await self.ledger.send_once(
+                            self.aurabot, "habit", user_id, habit, day,
+                            f"Reminder: Log your habit `{habit}` for today!"
+                        )
+            except Exception as e:
+                print(f"Error in habit reminder task: {e}")
+
+    @send_reminders.before_loop
+    async def before_send_reminders(self):
         await self.aurabot.wait_until_ready()
-        while not self.aurabot.is_closed():
-            now = datetime.utcnow()
-            users = self.collection.find({"habits.reminder_time": {"$exists": True}})
-
-            for user in users:
-                for habit in user["habits"]:
-                    reminder_time = datetime.strptime(habit["reminder_time"], "%H:%M").time()
-                    if now.time() >= reminder_time and now.strftime("%Y-%m-%d") not in habit["logs"]:
-                        user_obj = await self.aurabot.fetch_user(user["_id"])
-                        try:
-                            await user_obj.send(f"Reminder: Log your habit `{habit['habit']}` for today!")
-                        except discord.Forbidden:
-                            print(f"Failed to send reminder to user {user['_id']} (DMs disabled).")
-            await asyncio.sleep(60)  # Check every minute
 
     @discord.app_commands.command(name="addhabit", description="Add a habit to track.")
     async def add_habit(self, interaction: discord.Interaction, habit: str, reminder_time: str = None):
@@ -82,19 +88,14 @@ class HabitTracking(commands.Cog):
 
         user_id = interaction.user.id
 
-        # Create the habit data
-        habit_data = {
-            "habit": habit,
-            "logs": []
-        }
-        if reminder_time:
-            habit_data["reminder_time"] = reminder_time
-
         try:
             # Add the habit to the database
-            self.collection.update_one({"_id": user_id}, {"$addToSet": {"habits": habit_data}}, upsert=True)
+            await self.storage.add_habit(user_id, habit, reminder_time)
+            self.page_cache.invalidate(user_id)
             if reminder_time:
-                await interaction.response.send_message(f"Habit `{habit}` added with reminder at {reminder_time}.")
+                await interaction.response.send_message(
+                    f"Habit `{habit}` added with reminder at {reminder_time} (your profile's timezone)."
+                )
             else:
                 await interaction.response.send_message(f"Habit `{habit}` added without a reminder.")
         except Exception as e:
@@ -107,25 +108,31 @@ class HabitTracking(commands.Cog):
         print("log_habit triggered")
 
         user_id = interaction.user.id
-        user_data = self.collection.find_one({"_id": user_id})
+        habit_names = await self.storage.get_habit_names(user_id)
 
-        if not user_data or "habits" not in user_data or len(user_data["habits"]) == 0:
+        if not habit_names:
             await interaction.response.send_message("You don't have any tracked habits.", ephemeral=True)
             return
 
+        # Habits are logged on the user's local day, the same day /logmood files moods under
+        user_profile = await self.storage.get_profile(user_id)
+        user_timezone = (user_profile or {}).get("timezone") or settings_for(self.aurabot, interaction.guild_id)["default_timezone"]
+
         # Extract habits for dropdown
         habit_options = [
-            discord.SelectOption(label=habit["habit"], description="Click to log this habit")
-            for habit in user_data["habits"]
+            discord.SelectOption(label=habit, description="Click to log this habit")
+            for habit in habit_names
         ]
 
         # Define the dropdown menu
         class HabitSelectView(View):
-            def __init__(self, collection, user_data, user_id):
+            def __init__(self, storage, page_cache, insights, user_id, user_timezone):
                 super().__init__()
-                self.collection = collection
-                self.user_data = user_data
+                self.storage = storage
+                self.page_cache = page_cache
+                self.insights = insights
                 self.user_id = user_id
+                self.user_timezone = user_timezone
                 self.select = Select(
                     placeholder="Select a habit to log...",
                     options=habit_options,
@@ -136,24 +143,25 @@ class HabitTracking(commands.Cog):
 
             async def select_callback(self, select_interaction: discord.Interaction):
                 selected_habit = self.select.values[0]  # Get the selected habit
-                today = datetime.utcnow().strftime("%Y-%m-%d")
+                today = local_day(self.user_timezone)
 
                 # Update the database
-                for habit in self.user_data["habits"]:
-                    if habit["habit"] == selected_habit:
-                        if today in habit.get("logs", []):
-                            await select_interaction.response.send_message(
-                                f"Habit `{selected_habit}` already logged today.", ephemeral=True
-                            )
-                            return
-                        habit.setdefault("logs", []).append(today)
-                        self.collection.update_one(
-                            {"_id": self.user_id}, {"$set": {"habits": self.user_data["habits"]}}
-                        )
-                        await select_interaction.response.send_message(
-                            f"Habit `{selected_habit}` logged for today.", ephemeral=True
-                        )
-                        return
+                status = await self.storage.log_habit(self.user_id, selected_habit, today)
+                if status == "already":
+                    await select_interaction.response.send_message(
+                        f"Habit `{selected_habit}` already logged today.", ephemeral=True
+                    )
+                    return
+                if status == "logged":
+                    self.page_cache.invalidate(self.user_id)
+                    try:
+                        await self.insights.record_habit(self.user_id, selected_habit, today)
+                    except Exception as e:
+                        print(f"Error updating mood insights: {e}")
+                    await select_interaction.response.send_message(
+                        f"Habit `{selected_habit}` logged for today.", ephemeral=True
+                    )
+                    return
 
                 # If the habit isn't found (shouldn't happen)
                 await select_interaction.response.send_message(
@@ -161,31 +169,55 @@ class HabitTracking(commands.Cog):
                 )
 
         # Show the dropdown menu to the user
-        view = HabitSelectView(self.collection, user_data, user_id)
+        view = HabitSelectView(self.storage, self.page_cache, self.insights, user_id, user_timezone)
         await interaction.response.send_message("Select a habit to log:", view=view, ephemeral=True)
 
+    async def render_habit_page(self, user_id, page):
+        """Fetch one page of habits and build its embed. Returns (embed, total_pages) or None."""
+        cached = self.page_cache.get((user_id, "habits", page))
+        if cached:
+            return cached
+
+        # Only the requested slice, reduced to counts, leaves the database
+        user_data = await self.storage.habit_page(user_id, page * PAGE_SIZE, PAGE_SIZE)
+        if not user_data:
+            return None
+        total_pages = page_count(user_data["total"])
+        if page >= total_pages:
+            # Habits were removed since the view was opened
+            return await self.render_habit_page(user_id, total_pages - 1)
+
+        embed = discord.Embed(title="Your Habits", color=discord.Color.green())
+        for habit in user_data["habits"]:
+            reminder_time = habit.get("reminder_time", "No reminder")  # Use .get() to avoid KeyError
+            embed.add_field(
+                name=habit["habit"],
+                value=f"Reminder: {reminder_time} | Days Logged: {habit['days_logged']}",
+                inline=False
+            )
+        embed.set_footer(text=f"Page {page + 1}/{total_pages}")
+
+        self.page_cache.set((user_id, "habits", page), (embed, total_pages))
+        return embed, total_pages
+
     @discord.app_commands.command(name="viewhabits", description="View your tracked habits.")
     async def view_habits(self, interaction: discord.Interaction):
-        """View the list of habits and their log status."""
+        """View the list of habits and their log status, one page at a time."""
         print("view_habits triggered")
 
         user_id = interaction.user.id
-        user_data = self.collection.find_one({"_id": user_id})
+        rendered = await self.render_habit_page(user_id, 0)
 
-        if not user_data or "habits" not in user_data:
+        if not rendered:
             await interaction.response.send_message("You don't have any tracked habits.")
             return
 
-        embed = discord.Embed(title="Your Habits", color=discord.Color.green())
-        for habit in user_data["habits"]:
-            logs = len(habit["logs"])
-            reminder_time = habit.get("reminder_time", "No reminder")  # Use .get() to avoid KeyError
-            embed.add_field(
-                name=habit["habit"],
-                value=f"Reminder: {reminder_time} | Days Logged: {logs}",
-                inline=False
-            )
-        await interaction.response.send_message(embed=embed)
+        embed, total_pages = rendered
+        if total_pages == 1:
+            await interaction.response.send_message(embed=embed)
+            return
+        view = PagedEmbedView(user_id, lambda page: self.render_habit_page(user_id, page), total_pages)
+        await interaction.response.send_message(embed=embed, view=view)
 
     @discord.app_commands.command(name="clearhabit", description="Clear all your tracked habits.")
     async def clear_habit(self, interaction: discord.Interaction):
@@ -193,8 +225,10 @@ class HabitTracking(commands.Cog):
         user_id = interaction.user.id
 
         try:
-            result = self.collection.update_one({"_id": user_id}, {"$set": {"habits": []}})
-            if result.matched_count > 0:
+            cleared = await self.storage.clear_habits(user_id)
+            self.page_cache.invalidate(user_id)
+            await self.insights.forget_habits(user_id)
+            if cleared:
                 await interaction.response.send_message("All your tracked habits have been cleared.")
             else:
                 await interaction.response.send_message("You don't have any tracked habits to clear.")
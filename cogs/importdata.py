@@ -0,0 +1,169 @@
+import codecs
+import time
+import aiohttp
+import discord
+from discord.ext import commands
+import logging
+import pytz
+from datetime import datetime
+from config import IMPORT_MAX_ROWS, IMPORT_MAX_BYTES, IMPORT_CHUNK_SIZE
+from dataimport import ImportFormatError, MoodClock, StreamParser, format_for, normalize
+from guildconfig import settings_for
+
+# Seconds between progress edits of the reply
+PROGRESS_INTERVAL = 2
+# Invalid rows reported back by number
+MAX_REPORTED_ERRORS = 5
+
+
+class ImportData(commands.Cog):
+    """Cog for importing mood and habit history exported from other trackers."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+        # Storage setup
+        self.storage = aurabot.storage
+        self.running = set()  # users with an import in progress
+
+    async def flush(self, user_id, moods, habit_logs, totals):
+        """Write the buffered entries in bulk and empty the buffers."""
+        if moods:
+            totals["moods"] += await self.storage.import_moods(user_id, moods)
+            moods.clear()
+        if habit_logs:
+            totals["habit_logs"] += await self.storage.import_habit_logs(user_id, habit_logs)
+            habit_logs.clear()
+
+    @discord.app_commands.command(name="importdata", description="Import mood and habit history from a CSV or JSON export.")
+    @discord.app_commands.describe(file="A .csv, .json or .jsonl export with a date column and mood and/or habit columns")
+    async def import_data(self, interaction: discord.Interaction, file: discord.Attachment):
+        """Handles /importdata. Streams the file, writing entries in bulk as they are read."""
+        user_id = interaction.user.id
+
+        user_profile = await self.storage.get_profile(user_id)
+        if not user_profile:
+            await interaction.response.send_message(
+                "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
+            )
+            return
+
+        kind = format_for(file.filename)
+        if kind is None:
+            await interaction.response.send_message("Attach a `.csv`, `.json` or `.jsonl` file.", ephemeral=True)
+            return
+        if file.size > IMPORT_MAX_BYTES:
+            await interaction.response.send_message(
+                f"That file is too big; the limit is {IMPORT_MAX_BYTES // (1024 * 1024)} MB.", ephemeral=True
+            )
+            return
+        if user_id in self.running:
+            await interaction.response.send_message("You already have an import running.", ephemeral=True)
+            return
+        # Claimed before the next await, so a second invocation can't slip past the check
+        self.running.add(user_id)
+        try:
+            await self.run_import(interaction, file, kind, user_profile)
+        finally:
+            self.running.discard(user_id)
+
+    async def run_import(self, interaction, file, kind, user_profile):
+        """Stream and write one import, reporting progress and the outcome in the reply."""
+        user_id = interaction.user.id
+
+        # Dates without an offset are taken as the user's local time, and habit days are
+        # local days, in the same timezone /logmood and /loghabit use
+        tz = pytz.timezone(
+            user_profile.get("timezone") or settings_for(self.aurabot, interaction.guild_id)["default_timezone"]
+        )
+        latest = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+
+        await interaction.response.send_message(f"📥 Importing `{file.filename}`...")
+        parser = StreamParser(kind)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        moods, habit_logs = [], []
+        totals = {"rows": 0, "moods": 0, "habit_logs": 0, "invalid": 0}
+        errors = []
+        mood_clock = MoodClock()
+        capped = False
+        started = last_progress = time.monotonic()
+
+        def take(records):
+            """Validate parsed records into the write buffers. Returns False once the row cap is hit."""
+            for number, record in records:
+                if totals["rows"] >= IMPORT_MAX_ROWS:
+                    return False
+                totals["rows"] += 1
+                try:
+                    entries = normalize(record, tz, latest)
+                except ValueError as e:
+                    totals["invalid"] += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"row {number}: {e}")
+                    continue
+                for entry_kind, value, when in entries:
+                    if entry_kind == "mood":
+                        moods.append((value, mood_clock(when), None))
+                    else:
+                        habit_logs.append((value, when))
+            return True
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(file.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        if not take(parser.feed(decoder.decode(chunk))):
+                            capped = True
+                            break
+                        if len(moods) + len(habit_logs) >= IMPORT_CHUNK_SIZE:
+                            await self.flush(user_id, moods, habit_logs, totals)
+                        if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                            last_progress = time.monotonic()
+                            await interaction.edit_original_response(
+                                content=f"📥 Importing `{file.filename}`... {totals['rows']} rows read, "
+                                        f"{totals['moods']} moods and {totals['habit_logs']} habit logs added so far."
+                            )
+            if not capped:
+                capped = not take(parser.feed(decoder.decode(b"", final=True)) + parser.close())
+            await self.flush(user_id, moods, habit_logs, totals)
+        except ImportFormatError as e:
+            await self.flush(user_id, moods, habit_logs, totals)
+            errors.insert(0, f"stopped reading: {e}")
+        except Exception as e:
+            logging.error(f"Error importing data for user {user_id}: {e}")
+            await interaction.edit_original_response(
+                content=f"The import failed after {totals['rows']} rows ({totals['moods']} moods and "
+                        f"{totals['habit_logs']} habit logs were saved). Please try again later."
+            )
+            return
+
+        # Imported history lands out of order, so running insights are rebuilt and cached pages dropped
+        if totals["moods"] or totals["habit_logs"]:
+            insights = self.aurabot.get_cog("Insights")
+            if insights:
+                try:
+                    await insights.insights.save(await insights.recompute_from_history(user_id))
+                except Exception as e:
+                    logging.error(f"Error recomputing insights after import for user {user_id}: {e}")
+            for cog_name in ("MoodLogging", "HabitTracking"):
+                cog = self.aurabot.get_cog(cog_name)
+                if cog:
+                    cog.page_cache.invalidate(user_id)
+
+        elapsed = time.monotonic() - started
+        lines = [
+            f"✅ Imported `{file.filename}` in {elapsed:.1f}s: {totals['rows']} rows read, "
+            f"{totals['moods']} moods and {totals['habit_logs']} habit logs added."
+        ]
+        if capped:
+            lines.append(f"Stopped at the {IMPORT_MAX_ROWS}-row limit; split the file to import the rest.")
+        if totals["invalid"]:
+            lines.append(f"Skipped {totals['invalid']} invalid rows:")
+        lines += [f"- {error}" for error in errors]
+        await interaction.edit_original_response(content="\n".join(lines)[:2000])
+        print(f"Imported {totals} for user {user_id} in {elapsed:.1f}s")
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(ImportData(aurabot))
@@ -0,0 +1,83 @@
+import discord
+from discord.ext import commands
+import logging
+from archive import merge_history
+from insights import InsightsStore, MIN_OBSERVATIONS, correlation, mood_difference, recompute as recompute_insights, stats_match
+
+class Insights(commands.Cog):
+    """Cog for showing how habits relate to a user's moods."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+        # Storage setup
+        self.storage = aurabot.storage
+        self.insights = InsightsStore(self.storage)
+
+    async def recompute_from_history(self, user_id):
+        """Rebuild a user's running stats from their full mood and habit history, archived months included."""
+        moods = await self.storage.get_moods(user_id)
+        habits = await self.storage.get_habit_history(user_id)
+        moods, habits = merge_history(await self.storage.get_archive(user_id), moods, habits)
+        return recompute_insights(user_id, moods, habits)
+
+    @discord.app_commands.command(name="insights", description="See which habits go along with better moods.")
+    async def insights_command(self, interaction: discord.Interaction, recompute: bool = False):
+        """Handles /insights. With recompute, rebuilds the stats from full history and checks them."""
+        user_id = interaction.user.id
+        note = None
+
+        try:
+            doc = await self.insights.get(user_id)
+            if doc is None or recompute:
+                fresh = await self.recompute_from_history(user_id)
+                if doc is not None:
+                    stored = {entry["habit"]: entry for entry in doc["habits"]}
+                    drifted = [
+                        entry["habit"] for entry in fresh["habits"]
+                        if entry["habit"] in stored and not stats_match(stored[entry["habit"]], entry)
+                    ]
+                    if drifted:
+                        note = f"Recomputed from history; corrected: {', '.join(drifted)}."
+                    else:
+                        note = "Recomputed from history; running stats matched."
+                await self.insights.save(fresh)
+                doc = fresh
+        except Exception as e:
+            logging.error(f"Error loading insights for user {user_id}: {e}")
+            await interaction.response.send_message("Failed to load your insights. Please try again later.")
+            return
+
+        rows = []
+        for entry in doc["habits"]:
+            r = correlation(entry)
+            if entry["n"] >= MIN_OBSERVATIONS and r is not None:
+                rows.append((abs(r), entry["habit"], r, mood_difference(entry), entry["n"]))
+        rows.sort(reverse=True)
+
+        if not rows:
+            message = (
+                "Not enough data yet. Keep logging moods and habits! "
+                "Moods are scored from words like happy, calm or anxious, or a 1-10 rating."
+            )
+            await interaction.response.send_message(f"{message}\n{note}" if note else message)
+            return
+
+        embed = discord.Embed(
+            title="Your Mood Insights",
+            description="How your mood compares on days you log each habit:",
+            color=discord.Color.purple()
+        )
+        for _, habit, r, difference, n in rows[:10]:
+            direction = "higher" if difference >= 0 else "lower"
+            embed.add_field(
+                name=habit,
+                value=f"Mood is **{abs(difference):.1f}** points {direction} on days you log it (r = {r:.2f}, {n} moods)",
+                inline=False
+            )
+        embed.set_footer(text=note or "Correlation isn't causation, but it's a good place to start.")
+        await interaction.response.send_message(embed=embed)
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(Insights(aurabot))
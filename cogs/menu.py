@@ -1,31 +1,40 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
-from config import GUILD_ID  # Import GUILD_ID
+from guildconfig import MODULES, settings_for
+from helpmenu import SECTIONS, build_help
 
 class Menu(commands.Cog):
+    """Cog for the command menu, generated from the registered commands."""
+
     def __init__(self, aurabot):
         self.aurabot = aurabot
+        self.help = None  # built by rebuild() once every cog is loaded
+
+    def rebuild(self):
+        """Regenerate every menu embed from the current command tree (startup and after /reload)."""
+        self.help = build_help(self.aurabot.tree)
 
-    @discord.app_commands.command(name="menu", description="Displays the list of available commands")
-    async def menu(self, interaction: discord.Interaction):
-        """Respond with a menu of commands."""
-        embed = discord.Embed(
-            title="Menu",
-            description="Here are the commands currently available:",
-            color=discord.Color.blue()
-        )
-        embed.add_field(name="/menu", value="Displays this menu of commands.", inline=False)
-        embed.add_field(name="/createprofile", value="Creates a user profile.", inline=False)
-        embed.add_field(name="/viewprofile", value="Displays a user's profile.", inline=False)
-        embed.add_field(name="/habittracking", value="Displays list of habit tracking commands", inline=False)
-        embed.add_field(name="/moodlogging", value="Displays list of mood logging commands", inline=False)
-        embed.add_field(name="/goaltracking", value="Displays list of goal tracking commands.", inline=False)
-        await interaction.response.send_message(embed=embed)
+    @app_commands.command(name="menu", description="Displays the list of available commands")
+    @app_commands.describe(section="Show every command in one section, with its options")
+    @app_commands.choices(section=[app_commands.Choice(name=title, value=key) for key, (title, _) in SECTIONS.items()])
+    async def menu(self, interaction: discord.Interaction, section: str = None):
+        """Respond with a prebuilt menu: an overview, or one section's commands."""
+        if self.help is None:
+            self.rebuild()
+        enabled = settings_for(self.aurabot, interaction.guild_id)["enabled_modules"]
 
-    async def cog_load(self):
-        """Register the menu command when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)
-        self.aurabot.tree.add_command(self.menu, guild=guild)
+        if section is None:
+            await interaction.response.send_message(embed=self.help["overviews"][frozenset(enabled).intersection(MODULES)])
+            return
+        if section in MODULES and section not in enabled:
+            await interaction.response.send_message("This feature is turned off on this server.", ephemeral=True)
+            return
+        embeds = self.help["sections"].get(section)
+        if not embeds:
+            await interaction.response.send_message("There are no commands in that section.", ephemeral=True)
+            return
+        await interaction.response.send_message(embeds=embeds)
 
 # Required setup function to add the cog
 async def setup(aurabot):
@@ -5,14 +5,15 @@ from discord import Interaction
 import logging
 from datetime import datetime, timezone
 from discord.ext import commands
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
 import pytz
-from config import GUILD_ID
-
-# Load environment variables
-load_dotenv()
+from archive import cutoff_day
+from config import ARCHIVE_AFTER_DAYS, REMINDER_CATCHUP_MINUTES
+from guildconfig import settings_for
+from hotreload import stop_loop
+from insights import InsightsStore
+from pagination import PAGE_SIZE, PageCache, PagedEmbedView, page_count
+from reminders import ReminderLedger, due_occurrence
+import search
 
 class MoodLogging(commands.Cog):
     """Cog for logging user moods."""
@@ -20,35 +21,20 @@ class MoodLogging(commands.Cog):
     def __init__(self, aurabot):
         self.aurabot = aurabot
 
-        # MongoDB setup
-        mongo_url = os.getenv("MONGO_URL")
-        if not mongo_url:
-            raise ValueError("MongoDB connection string is not set in .env")
-        
-        try:
-            self.cluster = MongoClient(mongo_url, serverSelectionTimeOutMS=5000)
-            # Test connection
-            self.cluster.server_info()
-        except Exception as e:
-            raise ConnectionError(f"Failed to connect to MongoDB: {e}")
-        
-        # set up database and collections
-        self.cluster = MongoClient(mongo_url)
-        self.db = self.cluster["AuraBotDB"]
-        self.user_collection = self.db["user_profiles"]
-        self.mood_collection = self.db["mood_logging"]
+        # Storage setup
+        self.storage = aurabot.storage
+        self.ledger = ReminderLedger(self.storage)
+        self.insights = InsightsStore(self.storage)
+        self.page_cache = PageCache()
+        self.indexed = set()  # users whose older moods are known to be in the search index
 
         #Start the reminder task loop
+        self.tick_lock = asyncio.Lock()
         self.send_reminders.start()
 
-    async def cog_load(self):
-        """Register commands when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)  # Ensure GUILD_ID is correct
-        self.aurabot.tree.add_command(self.log_mood, guild=guild)
-        self.aurabot.tree.add_command(self.view_moods, guild=guild)
-        self.aurabot.tree.add_command(self.set_reminder, guild=guild)
-        self.aurabot.tree.add_command(self.stop_reminder, guild=guild)
-        logging.info("Commands registered: logmood, viewmoods, setmoodreminder, stopmoodreminder")
+    async def cog_unload(self):
+        """Stop the reminder loop between ticks so a reload doesn't cut off a batch of reminders."""
+        await stop_loop(self.send_reminders, self.tick_lock)
 
     @discord.app_commands.command(name="logmood", description="Log your mood for the day.")
     async def log_mood(self, interaction: discord.Interaction, mood: str):
@@ -56,27 +42,28 @@ class MoodLogging(commands.Cog):
 
         user_id = interaction.user.id
 
-        # Fetch the user's timezone from the profile collection
-        user_profile = self.user_collection.find_one({"_id": user_id})
+        # Fetch the user's timezone from their profile
+        user_profile = await self.storage.get_profile(user_id)
         if not user_profile:
             await interaction.response.send_message(
                 "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
             )
             return
 
-        # Get the user's timezone, defaulting to UTC if not set
-        user_timezone = user_profile.get("timezone", "UTC")
+        # Get the user's timezone, defaulting to the server's timezone if not set
+        user_timezone = user_profile.get("timezone") or settings_for(self.aurabot, interaction.guild_id)["default_timezone"]
         tz = pytz.timezone(user_timezone)
 
         # Get the current time in the user's timezone
         now_local = datetime.now(tz)
 
         # Log the mood with the local time
-        self.mood_collection.update_one(
-            {"_id": user_id},
-            {"$push": {"moods": {"mood": mood, "timestamp": now_local.strftime('%Y-%m-%d %H:%M:%S')}}},
-            upsert=True
-        )
+        await self.storage.add_mood(user_id, mood, now_local.strftime('%Y-%m-%d %H:%M:%S'))
+        self.page_cache.invalidate(user_id)
+        try:
+            await self.insights.record_mood(user_id, now_local.strftime('%Y-%m-%d'), mood)
+        except Exception as e:
+            logging.error(f"Error updating mood insights: {e}")
         await interaction.response.send_message(
             f"Your mood `{mood}` has been logged at {now_local.strftime('%Y-%m-%d %H:%M:%S')} ({user_timezone})."
     )
@@ -88,7 +75,7 @@ class MoodLogging(commands.Cog):
         user_id = interaction.user.id
 
         # Check if the user has a profile
-        user_profile = self.user_collection.find_one({"_id": user_id})
+        user_profile = await self.storage.get_profile(user_id)
         if not user_profile:
             await interaction.response.send_message(
                 "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
@@ -97,8 +84,9 @@ class MoodLogging(commands.Cog):
 
         try:
             # Retrieve mood data
-            user_data = self.mood_collection.find_one({"_id": user_id})
-            if not user_data or "moods" not in user_data or not user_data["moods"]:
+            moods = await self.storage.get_moods(user_id)
+            archived = await self.storage.archived_mood_count(user_id)
+            if not moods and not archived:
                 await interaction.response.send_message("You haven't logged any moods yet.")
                 return
 
@@ -106,25 +94,119 @@ class MoodLogging(commands.Cog):
             mood_list = "\n".join(
                 [
                     f"- {entry['mood']} (logged at {entry['timestamp']})"
-                    for entry in user_data["moods"]
+                    for entry in moods
                 ]
             )
+            if archived:
+                mood_list += f"\n_{archived} older moods are archived and still count toward /insights._"
             await interaction.response.send_message(f"Your logged moods:\n{mood_list}")
         except Exception as e:
             logging.error(f"Error retrieving moods: {e}")
             await interaction.response.send_message("Failed to retrieve your moods. Please try again later.")
 
+    async def render_search_page(self, user_id, terms, since, until, page, note=None):
+        """Fetch one page of matching moods and build its embed. Returns (embed, total_pages) or None."""
+        key = (user_id, ("search", tuple(terms), since, until), page)
+        cached = self.page_cache.get(key)
+        if cached:
+            return cached
+
+        # Only the requested slice of matches leaves the database
+        result = await self.storage.search_moods(user_id, terms, since, until, page * PAGE_SIZE, PAGE_SIZE)
+        if not result["total"]:
+            return None
+        total_pages = page_count(result["total"])
+        if page >= total_pages:
+            return await self.render_search_page(user_id, terms, since, until, total_pages - 1, note)
+
+        description = f"{result['total']} matching moods, newest first."
+        if note:
+            description += f"\n_{note}_"
+        embed = discord.Embed(
+            title="Mood Search",
+            description=description,
+            color=discord.Color.blue()
+        )
+        for entry in result["moods"]:
+            embed.add_field(name=entry["timestamp"], value=entry["mood"][:1024], inline=False)
+        embed.set_footer(text=f"Page {page + 1}/{total_pages}")
+
+        self.page_cache.set(key, (embed, total_pages))
+        return embed, total_pages
+
+    @discord.app_commands.command(name="searchmoods", description="Search your logged moods by words and dates.")
+    @discord.app_commands.describe(
+        words="Words the mood must contain, e.g. anxious",
+        since="Earliest day to include (YYYY-MM-DD)",
+        until="Latest day to include (YYYY-MM-DD)"
+    )
+    async def search_moods(self, interaction: discord.Interaction, words: str = None, since: str = None, until: str = None):
+        """Handles /searchmoods. Matches whole words in moods that haven't been archived, and says when archived ones were skipped."""
+        user_id = interaction.user.id
+
+        terms = search.terms(words)
+        if len(terms) > search.MAX_SEARCH_TERMS:
+            await interaction.response.send_message(
+                f"Search for at most {search.MAX_SEARCH_TERMS} words at a time.", ephemeral=True
+            )
+            return
+        if not terms and not since and not until:
+            await interaction.response.send_message("Give me some words or a date range to search for.", ephemeral=True)
+            return
+        try:
+            for day in (since, until):
+                if day:
+                    datetime.strptime(day, "%Y-%m-%d")
+        except ValueError:
+            await interaction.response.send_message("Invalid date format! Use YYYY-MM-DD.", ephemeral=True)
+            return
+        # Timestamps are "YYYY-MM-DD HH:MM:SS", so the last day runs to its final second
+        until = f"{until} 23:59:59" if until else None
+
+        try:
+            # Moods logged before search existed are indexed on the first search
+            if user_id not in self.indexed:
+                if not await self.storage.mood_index_ready(user_id):
+                    await self.storage.build_mood_index(user_id)
+                self.indexed.add(user_id)
+
+            # Archived months left the index; say so whenever the range reaches back to them
+            note = None
+            archive_cutoff = cutoff_day(datetime.utcnow(), ARCHIVE_AFTER_DAYS)
+            if (since is None or since < archive_cutoff) and await self.storage.archived_mood_count(user_id):
+                note = f"Archived moods from before {archive_cutoff} aren't included; see /viewmoods for their count."
+
+            rendered = await self.render_search_page(user_id, terms, since, until, 0, note)
+        except Exception as e:
+            logging.error(f"Error searching moods: {e}")
+            await interaction.response.send_message("Failed to search your moods. Please try again later.")
+            return
 
+        if not rendered:
+            await interaction.response.send_message(
+                f"No logged moods match that search.\n_{note}_" if note else "No logged moods match that search."
+            )
+            return
 
+        embed, total_pages = rendered
+        if total_pages == 1:
+            await interaction.response.send_message(embed=embed)
+            return
+        view = PagedEmbedView(
+            user_id, lambda page: self.render_search_page(user_id, terms, since, until, page, note), total_pages
+        )
+        await interaction.response.send_message(embed=embed, view=view)
 
     @discord.app_commands.command(name="setmoodreminder", description="Set a daily mood logging reminder (format: HH:MM in 24-hour).")
-    async def set_reminder(self, interaction: discord.Interaction, time: str):
-        """Set daily reminders to log moods."""
+    async def set_reminder(self, interaction: discord.Interaction, time: str = None):
+        """Set daily reminders to log moods. Without a time, the server's default reminder time is used."""
         
         user_id = interaction.user.id
+        if time is None:
+            time = settings_for(self.aurabot, interaction.guild_id)["default_reminder_time"]
 
         # Check if the user has a profile
-        user_profile = self.user_collection.find_one({"_id": user_id})
+        user_profile = await self.storage.get_profile(user_id)
         if not user_profile:
             await interaction.response.send_message(
                 "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
@@ -136,26 +218,11 @@ class MoodLogging(commands.Cog):
             if not (0 <= hour < 24 and 0 <= minute < 60):
                 raise ValueError("Invalid time range")
 
-            user_id = interaction.user.id
-
-            # Check if the user exists in the mood_logging database
-            user_data = self.mood_collection.find_one({"_id": user_id})
-            if not user_data:
-                # Create an entry for the user if it doesn't exist
-                self.mood_collection.insert_one({"_id": user_id, "reminder_time": None, "moods": []})
-
             # Get the user's timezone (default to UTC if not set)
-            user_profile = self.user_collection.find_one({"_id": user_id})
-            user_timezone = user_profile.get("timezone", "UTC") if user_profile else "UTC"
-            tz = pytz.timezone(user_timezone)
+            user_timezone = user_profile.get("timezone", "UTC")
 
-
-            # Update the reminder time in the mood_logging database
-            self.mood_collection.update_one(
-                {"_id": user_id},
-                {"$set": {"reminder_time": time}},
-                upsert=True
-            )
+            # Update the reminder time
+            await self.storage.set_mood_reminder(user_id, time)
 
             # Inform the user
             await interaction.response.send_message(
@@ -175,23 +242,14 @@ class MoodLogging(commands.Cog):
         user_id = interaction.user.id
 
         # Check if the user has a profile
-        user_profile = self.user_collection.find_one({"_id": user_id})
+        user_profile = await self.storage.get_profile(user_id)
         if not user_profile:
             await interaction.response.send_message(
                 "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
             )
             return
-        # Check if the user exists in the mood_logging database
-        user_data = self.mood_collection.find_one({"_id": user_id})
-        if not user_data:
-            # Create an entry for the user if it doesn't exist
-            self.mood_collection.insert_one({"_id": user_id, "reminder_time": None, "moods": []})
         try:
-            self.mood_collection.update_one(
-                {"_id": user_id},
-                {"$set": {"reminder_time": None}},
-                upsert=True
-            )
+            await self.storage.set_mood_reminder(user_id, None)
             # Inform the user
             await interaction.response.send_message(
                 f"Mood reminder disabled."
@@ -204,34 +262,27 @@ class MoodLogging(commands.Cog):
     @tasks.loop(minutes=1)
     async def send_reminders(self):
         """Send reminders for mood logging at the specified times."""
-        await self.aurabot.wait_until_ready()  # Ensure the bot is ready
-        while not self.aurabot.is_closed():
+        async with self.tick_lock:
             try:
                 now_utc = datetime.now(pytz.utc)  # Current time in UTC
 
-                # Find all users with a mood reminder set
-                users_with_reminders = self.mood_collection.find({"reminder_time": {"$exists": True}})
-                for user in users_with_reminders:
-                    user_id = user["_id"]
+                # Find all users with a mood reminder set, and their timezones in one query
+                users_with_reminders = await self.storage.get_mood_reminders()
+                timezones = await self.storage.get_timezones(user_id for user_id, _ in users_with_reminders)
 
-                    # Get the user's timezone from the profile
-                    user_profile = self.user_collection.find_one({"_id": user_id})
-                    user_timezone = user_profile.get("timezone")
-                    tz = pytz.timezone(user_timezone)
+                for user_id, reminder_time in users_with_reminders:
+                    tz = pytz.timezone(timezones.get(user_id, "UTC"))
 
                     # Convert the current time to the user's timezone
-                    now_local = now_utc.astimezone(tz).strftime("%H:%M")
-        
-                    # Compare the user's local time with their reminder time
-                    if user.get("reminder_time") == now_local:
-                        user_obj = await self.aurabot.fetch_user(user_id)
-                        try:
-                            # Send the DM
-                            await user_obj.send("⏰ Don't forget to log your mood for today!")
-                        except discord.Forbidden:
-                            logging.warning(f"Failed to send reminder to user {user_id} (DMs may be disabled).")
-
-                await asyncio.sleep(60)  # Wait before checking again
+                    now_local = now_utc.astimezone(tz)
+
+                    # Send any occurrence still inside the catch-up window, at most once
+                    day = due_occurrence(reminder_time, now_local, REMINDER_CATCHUP_MINUTES)
+                    if day is not None:
+                        await self.ledger.send_once(
+                            self.aurabot, "mood", user_id, reminder_time, day,
+                            "⏰ Don't forget to log your mood for today!"
+                        )
             except Exception as e:
                 logging.error(f"Error in send_reminders task: {e}")
 
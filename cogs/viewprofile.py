@@ -1,39 +1,18 @@
 import discord
 from discord.ext import commands
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
-from config import GUILD_ID
-
-# Load environment variables
-load_dotenv()
 
 class ViewProfile(commands.Cog):
-    """Cog for viewing user profiles stored in MongoDB."""
+    """Cog for viewing user profiles."""
 
     def __init__(self, aurabot):
         self.aurabot = aurabot
-
-        # MongoDB setup
-        mongo_url = os.getenv("MONGO_URL")  # Securely load the connection string
-        if not mongo_url:
-            raise ValueError("MongoDB connection string is not set in .env")
-
-        # Establish MongoDB connection
-        self.cluster = MongoClient(mongo_url)
-        self.db = self.cluster["AuraBotDB"]  # Replace with your database name
-        self.collection = self.db["user_profiles"]
-
-    async def cog_load(self):
-        """Register commands when the cog is loaded."""
-        guild = discord.Object(id=GUILD_ID)  # Ensure GUILD_ID is correct
-        self.aurabot.tree.add_command(self.view_profile, guild=guild)
+        self.storage = aurabot.storage
 
     @discord.app_commands.command(name="viewprofile", description="View your profile")
     async def view_profile(self, interaction: discord.Interaction):
         """Handles the /viewprofile command."""
         user_id = interaction.user.id
-        profile = self.collection.find_one({"_id": user_id})
+        profile = await self.storage.get_profile(user_id)
 
         if profile:
             username = profile.get("username", "No username set.")
@@ -0,0 +1,177 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import json
+import logging
+import random
+import discord
+from discord.ext import commands, tasks
+from config import DIGEST_WEEKDAY, DIGEST_HOUR, DIGEST_WINDOW_MINUTES, DIGEST_COHORT_SIZE
+from hotreload import stop_loop
+from reminders import ReminderLedger
+
+
+class DigestCost:
+    """Running tally of what a digest run cost the database (bytes are approximated by JSON size)."""
+
+    def __init__(self):
+        self.operations = 0
+        self.documents = 0
+        self.bytes = 0
+
+    def add(self, documents=()):
+        self.operations += 1
+        for doc in documents:
+            self.documents += 1
+            self.bytes += len(json.dumps(doc, default=str))
+
+    def flush(self):
+        """Return the tally as counters to add to the run record and start over."""
+        increments = {"operations": self.operations, "documents": self.documents, "bytes": self.bytes}
+        self.operations = self.documents = self.bytes = 0
+        return increments
+
+
+def format_digest(summary, since_day):
+    """Build the DM text for one user's week."""
+    lines = [f"📬 **Your AuraBot week** (since {since_day})"]
+
+    moods = summary["moods"]
+    if moods:
+        top_mood, _ = Counter(moods).most_common(1)[0]
+        lines.append(f"- Moods logged: **{len(moods)}** (most common: {top_mood})")
+    else:
+        lines.append("- No moods logged this week.")
+
+    habits = summary["habits"]
+    if habits:
+        habit_days = ", ".join(f"{habit['habit']} {habit['days']}/7" for habit in habits[:10])
+        lines.append(f"- Habits: {habit_days}")
+
+    goals = summary["goals"]
+    if goals:
+        lines.append(
+            f"- Goals: {goals['active']} active, {goals['completed']} completed, "
+            f"{goals['progress_days']} progress days this week"
+        )
+        lines.append(f"- Points: **{goals['points']}**")
+
+    lines.append("Keep it up! Use `/weeklydigest enabled:False` to stop these.")
+    return "\n".join(lines)
+
+
+class WeeklyDigest(commands.Cog):
+    """Cog for opt-in weekly summaries sent by DM."""
+
+    def __init__(self, aurabot):
+        self.aurabot = aurabot
+
+        # Storage setup
+        self.storage = aurabot.storage
+        self.ledger = ReminderLedger(self.storage)
+
+        # Start the digest scheduler
+        self.tick_lock = asyncio.Lock()
+        self.digest_loop.start()
+
+    async def cog_unload(self):
+        # A run in progress is cancelled after the drain timeout; the new instance resumes it from the stored cursor
+        await stop_loop(self.digest_loop, self.tick_lock)
+
+    @discord.app_commands.command(name="weeklydigest", description="Turn your weekly summary DM on or off.")
+    async def weekly_digest(self, interaction: discord.Interaction, enabled: bool):
+        """Handles /weeklydigest."""
+        user_id = interaction.user.id
+        if not await self.storage.set_digest_opt_in(user_id, enabled):
+            await interaction.response.send_message(
+                "You don't have a profile yet! Use `/createprofile` to set up your profile and timezone."
+            )
+            return
+        if enabled:
+            await interaction.response.send_message("You'll get a summary of your week by DM every week. 📬")
+        else:
+            await interaction.response.send_message("Weekly digest turned off.")
+
+    @staticmethod
+    def current_run(now):
+        """The (week key, since day, before day, scheduled time) of this week's digest.
+
+        The digest covers the seven days up to and including the scheduled day.
+        """
+        scheduled = (now - timedelta(days=(now.weekday() - DIGEST_WEEKDAY) % 7)).replace(
+            hour=DIGEST_HOUR, minute=0, second=0, microsecond=0
+        )
+        if scheduled > now:
+            scheduled -= timedelta(days=7)
+        year, week, _ = scheduled.isocalendar()
+        since_day = (scheduled - timedelta(days=6)).strftime("%Y-%m-%d")
+        before_day = (scheduled + timedelta(days=1)).strftime("%Y-%m-%d")
+        return f"{year}-W{week:02d}", since_day, before_day, scheduled
+
+    @tasks.loop(minutes=15)
+    async def digest_loop(self):
+        """Start (or resume) this week's digest once its scheduled time has passed."""
+        async with self.tick_lock:
+            try:
+                now = datetime.utcnow()
+                week_key, since_day, before_day, scheduled = self.current_run(now)
+                if now - scheduled > timedelta(days=1):
+                    # Too late to be useful (e.g. the bot was down); wait for next week
+                    return
+                if await self.storage.digest_run_done(week_key):
+                    return
+                await self.run_digest(week_key, since_day, before_day)
+            except Exception as e:
+                logging.error(f"Error in weekly digest task: {e}")
+
+    @digest_loop.before_loop
+    async def before_digest_loop(self):
+        await self.aurabot.wait_until_ready()
+
+    async def run_digest(self, week_key, since_day, before_day):
+        """Send this week's digests cohort by cohort, resuming from the stored cursor."""
+        cost = DigestCost()
+        run = await self.storage.start_digest_run(week_key, datetime.utcnow())
+        cost.add([run])
+        cursor = run.get("cursor")
+
+        remaining = await self.storage.count_digest_users(cursor)
+        cost.add()
+        # Average gap between sends so the whole run fits inside the window
+        spacing = DIGEST_WINDOW_MINUTES * 60 / max(remaining, 1)
+        logging.info(f"Weekly digest {week_key}: {remaining} users to go")
+
+        sent = 0
+        while True:
+            cohort = await self.storage.digest_cohort(cursor, DIGEST_COHORT_SIZE)
+            cost.add({"_id": user_id} for user_id in cohort)
+            if not cohort:
+                break
+
+            # One query summarizes the whole cohort
+            summaries = await self.storage.weekly_summaries(cohort, since_day, before_day)
+            cost.add(summaries)
+
+            for summary in summaries:
+                await asyncio.sleep(spacing * random.uniform(0.5, 1.5))
+                # The ledger makes a resumed cohort skip users already sent to
+                cost.add()
+                if await self.ledger.send_once(
+                    self.aurabot, "digest", summary["_id"], "weekly", week_key,
+                    format_digest(summary, since_day)
+                ):
+                    sent += 1
+
+            # Advance the cursor and bank this cohort's cost together, so a resumed run still adds up
+            cursor = cohort[-1]
+            cost.add()
+            await self.storage.advance_digest_run(week_key, cursor, sent, cost.flush())
+            sent = 0
+
+        cost.add()
+        run = await self.storage.finish_digest_run(week_key, datetime.utcnow(), cost.flush())
+        logging.info(f"Weekly digest {week_key} finished: sent {run.get('sent', 0)} digests. DB cost: {run.get('cost')}")
+
+# Required setup function
+async def setup(aurabot):
+    await aurabot.add_cog(WeeklyDigest(aurabot))
@@ -2,4 +2,60 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
-GUILD_ID = int(os.getenv("GUILD_ID"))  
+
+# Commands are registered globally. If guilds are listed here (comma separated), they are
+# registered only in those guilds instead, which updates instantly and suits test servers.
+OVERRIDE_GUILD_IDS = [int(guild_id) for guild_id in os.getenv("OVERRIDE_GUILD_IDS", "").split(",") if guild_id.strip()]
+# Deprecated and ignored: it used to be required, so deployments still set it, and treating
+# it as an override would take their commands off every other guild
+GUILD_ID = int(os.getenv("GUILD_ID")) if os.getenv("GUILD_ID") else None
+
+# Admission control for app commands
+GLOBAL_COMMAND_RATE = float(os.getenv("GLOBAL_COMMAND_RATE", "20"))  # commands per second across all users
+GLOBAL_COMMAND_BURST = int(os.getenv("GLOBAL_COMMAND_BURST", "40"))
+MAX_DB_INFLIGHT = int(os.getenv("MAX_DB_INFLIGHT", "8"))  # commands allowed to hit the DB at once
+# One user's share across all commands, so rotating through commands can't drain the global budget
+USER_COMMAND_RATE = float(os.getenv("USER_COMMAND_RATE", "0.5"))  # commands per second per user
+USER_COMMAND_BURST = int(os.getenv("USER_COMMAND_BURST", "10"))
+USER_MAX_INFLIGHT = int(os.getenv("USER_MAX_INFLIGHT", "2"))  # of the MAX_DB_INFLIGHT slots
+
+# Opt-in interaction traffic capture (see traffic.py and replay.py)
+TRAFFIC_LOG_PATH = os.getenv("TRAFFIC_LOG_PATH")
+TRAFFIC_SALT = os.getenv("TRAFFIC_SALT")
+
+# Reminders missed by up to this many minutes (restart, slow tick) are still sent once
+REMINDER_CATCHUP_MINUTES = int(os.getenv("REMINDER_CATCHUP_MINUTES", "60"))
+
+# Opt-in weekly digest DMs (times are UTC; weekday 0 = Monday)
+DIGEST_WEEKDAY = int(os.getenv("DIGEST_WEEKDAY", "6"))
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", "18"))
+DIGEST_WINDOW_MINUTES = int(os.getenv("DIGEST_WINDOW_MINUTES", "60"))  # sends are spread across this window
+DIGEST_COHORT_SIZE = int(os.getenv("DIGEST_COHORT_SIZE", "200"))  # users summarized per aggregation
+
+# Where user data lives: "mongo" (MONGO_URL) or "sqlite" (a local file, for single-node installs)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "aurabot.db")
+
+# Field-level encryption of moods, habit names and goals. Set ENCRYPTION_KEY to a
+# base64-encoded 32-byte key (e.g. python -c "import os, base64; print(base64.b64encode(os.urandom(32)).decode())")
+ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
+DATA_KEY_CACHE_SIZE = int(os.getenv("DATA_KEY_CACHE_SIZE", "10000"))  # per-user keys kept unwrapped in memory
+
+# Cold storage: whole months older than this move from hot documents into compressed archives
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+if ARCHIVE_AFTER_DAYS < 30:
+    # Anything shorter would archive the month users are still logging in
+    raise ValueError(f"ARCHIVE_AFTER_DAYS must be at least 30 (got {ARCHIVE_AFTER_DAYS})")
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "100"))  # users compacted per storage round trip batch
+
+# Event loop stall detection: stalls longer than this are sampled and attributed (0 turns it off)
+STALL_THRESHOLD_MS = int(os.getenv("STALL_THRESHOLD_MS", "250"))
+
+# /importdata limits: rows read per file, attachment size, and entries per bulk write
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "50000"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+# /dashboard: latest moods shown, and how many users' dashboards stay cached until their next write
+DASHBOARD_MOODS = int(os.getenv("DASHBOARD_MOODS", "5"))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "5000"))
@@ -0,0 +1,237 @@
+"""Incremental parsing of mood/habit exports for /importdata.
+
+Exports are fed in as text chunks as they download, so memory stays
+bounded by one record no matter how long the history is. Supported:
+
+- CSV with a header row
+- JSON Lines (one object per line)
+- a JSON array of objects
+
+Each record may hold a mood, a habit, or both, plus when it happened.
+Column names are matched case-insensitively against the aliases below,
+and a ``type`` column with a ``value``/``name`` column works too.
+"""
+from datetime import datetime, timedelta, timezone
+import csv
+import json
+
+TIME_KEYS = ("timestamp", "datetime", "date", "logged_at", "created_at", "time")
+MOOD_KEYS = ("mood", "feeling", "emotion")
+HABIT_KEYS = ("habit", "habit_name", "activity")
+VALUE_KEYS = ("value", "name")
+
+# Longest single record accepted; anything bigger is not a mood/habit export
+MAX_RECORD_CHARS = 64 * 1024
+MAX_MOOD_LENGTH = 1000
+MAX_HABIT_LENGTH = 100
+
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M", "%Y/%m/%d",
+    "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y",
+)
+
+
+class ImportFormatError(ValueError):
+    """The file can't be read as the format it claims to be."""
+
+
+def format_for(filename):
+    """"csv" or "json" from an attachment's name, or None if unsupported."""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".json", ".jsonl", ".ndjson")):
+        return "json"
+    return None
+
+
+def parse_time(value, tz):
+    """Normalize an export's date/time to the user's local "YYYY-MM-DD HH:MM:SS".
+
+    Times with an offset (and Unix timestamps) are converted into ``tz``;
+    times without one are taken as already local, like the ones AuraBot stores.
+    """
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.strip().isdigit()):
+        seconds = float(value)
+        # Millisecond timestamps
+        if seconds > 1e11:
+            seconds /= 1000
+        moment = datetime.fromtimestamp(seconds, timezone.utc)
+    else:
+        text = str(value).strip()
+        try:
+            moment = datetime.fromisoformat(text)
+        except ValueError:
+            for fmt in DATE_FORMATS:
+                try:
+                    moment = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"unrecognized date `{text[:40]}`")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(tz).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _first(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def normalize(record, tz, latest):
+    """Turn one raw record into ``[("mood", text, timestamp) | ("habit", name, day)]``.
+
+    Habit days are the user's local day in ``tz``, the same day /loghabit logs
+    under, so an imported day and a logged one never get two entries.
+    Raises ValueError with a short reason for records that can't be imported.
+    ``latest`` is the user's current local timestamp; entries after it are rejected.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+    record = {str(key).strip().lower(): value for key, value in record.items()}
+
+    moment = _first(record, TIME_KEYS)
+    if moment is None:
+        raise ValueError("no date")
+    timestamp = parse_time(moment, tz)
+    if timestamp > latest:
+        raise ValueError(f"date {timestamp[:10]} is in the future")
+
+    mood, habit = _first(record, MOOD_KEYS), _first(record, HABIT_KEYS)
+    kind = str(record.get("type", "")).strip().lower()
+    if kind in ("mood", "habit") and _first(record, VALUE_KEYS) is not None:
+        if kind == "mood":
+            mood = mood or _first(record, VALUE_KEYS)
+        else:
+            habit = habit or _first(record, VALUE_KEYS)
+
+    entries = []
+    if mood is not None:
+        mood = str(mood).strip()
+        if len(mood) > MAX_MOOD_LENGTH:
+            raise ValueError(f"mood longer than {MAX_MOOD_LENGTH} characters")
+        entries.append(("mood", mood, timestamp))
+    if habit is not None:
+        habit = str(habit).strip()
+        if len(habit) > MAX_HABIT_LENGTH:
+            raise ValueError(f"habit name longer than {MAX_HABIT_LENGTH} characters")
+        entries.append(("habit", habit, timestamp[:10]))
+    if not entries:
+        raise ValueError("no mood or habit")
+    return entries
+
+
+class MoodClock:
+    """Spreads consecutive moods that share a timestamp one second apart.
+
+    Date-only exports give every mood of a day the same midnight timestamp,
+    and imports skip moods at a timestamp that is already taken. Spreading
+    them keeps each mood, and a re-import lands on the same timestamps.
+    """
+
+    def __init__(self):
+        self.last = None
+        self.repeats = 0
+
+    def __call__(self, timestamp):
+        if timestamp != self.last:
+            self.last, self.repeats = timestamp, 0
+            return timestamp
+        self.repeats += 1
+        moment = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S") + timedelta(seconds=self.repeats)
+        return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class StreamParser:
+    """Push parser: ``feed(text)`` and ``close()`` return the raw records completed so far.
+
+    Records come back as ``(number, dict)``, numbered from 1 in file order
+    (CSV data rows, JSON objects).
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.buffer = ""
+        self.count = 0
+        self.header = None
+        self.array = None  # JSON only: whether the file is one big array
+
+    def feed(self, text):
+        self.buffer += text
+        records = self._parse(final=False)
+        if len(self.buffer) > MAX_RECORD_CHARS:
+            raise ImportFormatError("a single record is too large; is this a mood/habit export?")
+        return records
+
+    def close(self):
+        records = self._parse(final=True)
+        if self.buffer.strip():
+            raise ImportFormatError("the file ends in the middle of a record")
+        return records
+
+    def _number(self, record):
+        self.count += 1
+        return self.count, record
+
+    def _parse(self, final):
+        return self._parse_csv(final) if self.kind == "csv" else self._parse_json(final)
+
+    def _parse_csv(self, final):
+        records = []
+        start = search = 0
+        while True:
+            end = self.buffer.find("\n", search)
+            if end == -1:
+                if not final or start >= len(self.buffer):
+                    break
+                end = len(self.buffer)
+            line = self.buffer[start:end]
+            # Quotes come in pairs ("" escapes one), so an odd count means the newline is inside a quoted field
+            if line.count('"') % 2 and end < len(self.buffer):
+                search = end + 1
+                continue
+            start = search = end + 1
+            line = line.rstrip("\r")
+            if not line.strip():
+                continue
+            if self.header is None:
+                self.header = [name.strip() for name in next(csv.reader([line.lstrip("\ufeff")]))]
+            else:
+                records.append(self._number(dict(zip(self.header, next(csv.reader([line]))))))
+        self.buffer = self.buffer[start:]
+        return records
+
+    def _parse_json(self, final):
+        records = []
+        decoder = json.JSONDecoder()
+        position = 0
+        while True:
+            # Skip the separators between objects (and the array's brackets)
+            while position < len(self.buffer) and self.buffer[position] in " \t\r\n,\ufeff":
+                position += 1
+            if position >= len(self.buffer):
+                break
+            if self.array is None:
+                self.array = self.buffer[position] == "["
+                if self.array:
+                    position += 1
+                    continue
+            if self.array and self.buffer[position] == "]":
+                position += 1
+                continue
+            try:
+                record, position = decoder.raw_decode(self.buffer, position)
+            except json.JSONDecodeError:
+                # In JSON Lines a record is complete once its line is
+                if final or (not self.array and "\n" in self.buffer[position:]):
+                    raise ImportFormatError(f"record {self.count + 1} is not valid JSON")
+                # Most likely the rest of the object hasn't arrived yet
+                break
+            records.append(self._number(record))
+        self.buffer = self.buffer[position:]
+        return records
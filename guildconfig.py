@@ -0,0 +1,27 @@
+import copy
+
+# Feature modules a server can switch off, and the cogs that belong to each
+MODULES = {
+    "moods": ("MoodLogging", "Insights"),
+    "habits": ("HabitTracking",),
+    "goals": ("GoalTracking",),
+}
+COG_MODULES = {cog: module for module, cogs in MODULES.items() for cog in cogs}
+
+DEFAULT_SETTINGS = {
+    "enabled_modules": list(MODULES),
+    "default_timezone": "UTC",
+    "default_reminder_time": "20:00",
+}
+
+
+def default_settings():
+    return copy.deepcopy(DEFAULT_SETTINGS)
+
+
+def settings_for(aurabot, guild_id):
+    """Cached settings for a guild, or the defaults for DMs and unknown guilds. Never hits the DB."""
+    guild_settings = aurabot.get_cog("GuildSettings")
+    if guild_settings is None or guild_id is None:
+        return DEFAULT_SETTINGS
+    return guild_settings.get(guild_id)
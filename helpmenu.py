@@ -0,0 +1,89 @@
+"""Help embeds for /menu, generated from the registered command tree.
+
+Commands are grouped by the module their cog belongs to (see
+``guildconfig.MODULES``); commands gated behind server permissions go in
+an admin section and everything else in a general one. Names, descriptions
+and options come straight from each command, so the menu can't drift from
+what is actually registered. Building happens once at startup and again
+after each /reload; /menu only picks a prebuilt embed.
+"""
+from itertools import combinations
+import discord
+from discord import app_commands
+from guildconfig import COG_MODULES, MODULES
+
+# Section key -> (title, color); modules keep the order of guildconfig.MODULES
+SECTIONS = {
+    "general": ("General", discord.Color.blue()),
+    "moods": ("Mood Logging", discord.Color.yellow()),
+    "habits": ("Habit Tracking", discord.Color.green()),
+    "goals": ("Goal Tracking", discord.Color.purple()),
+    "admin": ("Server Admin", discord.Color.dark_grey()),
+}
+# Discord's limit on fields per embed
+MAX_FIELDS = 25
+
+
+def section_for(command):
+    """Which help section a command is listed under."""
+    if command.default_permissions is not None:
+        return "admin"
+    cog = command.binding.qualified_name if command.binding else None
+    return COG_MODULES.get(cog, "general")
+
+
+def describe(command):
+    """One help line: the command's description and its options."""
+    options = [
+        f"`{parameter.display_name}`" + ("" if parameter.required else " (optional)")
+        for parameter in command.parameters
+    ]
+    text = command.description
+    if options:
+        text += f"\nOptions: {', '.join(options)}"
+    return text[:1024]
+
+
+def build_help(tree):
+    """Prebuilt ``{"sections": {key: [embeds]}, "overviews": {enabled modules: embed}}``."""
+    listed = {key: [] for key in SECTIONS}
+    for command in tree.walk_commands():
+        if isinstance(command, app_commands.Command):
+            listed[section_for(command)].append(command)
+
+    sections = {}
+    for key, commands in listed.items():
+        if not commands:
+            continue
+        title, color = SECTIONS[key]
+        embeds = []
+        for start in range(0, len(commands), MAX_FIELDS):
+            embed = discord.Embed(
+                title=f"{title} Menu",
+                description=f"Here are the {title.lower()} commands:" if not start else None,
+                color=color
+            )
+            for command in commands[start:start + MAX_FIELDS]:
+                embed.add_field(name=f"/{command.qualified_name}", value=describe(command), inline=False)
+            embeds.append(embed)
+        sections[key] = embeds
+
+    # One overview per combination of enabled modules, so no server's menu is built on demand
+    overviews = {}
+    for size in range(len(MODULES) + 1):
+        for enabled in combinations(MODULES, size):
+            embed = discord.Embed(
+                title="Menu",
+                description="Use `/menu section:<name>` to see a section's commands.",
+                color=discord.Color.blue()
+            )
+            for key, embeds in sections.items():
+                if key in MODULES and key not in enabled:
+                    continue
+                count = sum(len(section.fields) for section in embeds)
+                names = " ".join(f"`{field.name}`" for section in embeds for field in section.fields)
+                if len(names) > 1024:
+                    names = names[:1021].rsplit(" ", 1)[0] + " …"
+                embed.add_field(name=f"{SECTIONS[key][0]} ({key}, {count})", value=names, inline=False)
+            overviews[frozenset(enabled)] = embed
+    return {"sections": sections, "overviews": overviews}
@@ -0,0 +1,46 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+# How long an unloading cog waits for an in-flight loop iteration before cancelling it (seconds)
+DRAIN_TIMEOUT = 10
+
+
+def save_state(aurabot, cog_name, state):
+    """Park a cog's scheduler state for the instance that replaces it."""
+    aurabot.handoff[cog_name] = state
+
+
+def take_state(aurabot, cog_name):
+    """State left by the previous instance of a cog, or None on a fresh start."""
+    return aurabot.handoff.pop(cog_name, None)
+
+
+async def stop_loop(loop, tick_lock, timeout=DRAIN_TIMEOUT):
+    """Stop a ``tasks.loop`` between iterations.
+
+    The loop body holds ``tick_lock`` while it runs, so acquiring it waits
+    for a half-sent batch of reminders to finish instead of cutting it off.
+    """
+    if not loop.is_running():
+        return
+    try:
+        await asyncio.wait_for(tick_lock.acquire(), timeout)
+    except asyncio.TimeoutError:
+        logging.warning(f"{loop.coro.__qualname__} still busy after {timeout}s; cancelling it")
+        loop.cancel()
+        return
+    try:
+        loop.cancel()
+    finally:
+        tick_lock.release()
+
+
+def command_signature(tree):
+    """Hash of every global command's name, description and options.
+
+    Only a change here needs a ``tree.sync``; callback bodies don't.
+    """
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: c["name"])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
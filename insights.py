@@ -0,0 +1,183 @@
+from datetime import datetime
+import math
+import re
+import pytz
+
+# Rough valence of common mood words, from -2 (very low) to +2 (very good)
+MOOD_SCORES = {
+    "ecstatic": 2, "joyful": 2, "great": 2, "amazing": 2, "excited": 2, "grateful": 2, "proud": 2,
+    "happy": 1.5, "good": 1, "content": 1, "calm": 1, "relaxed": 1, "hopeful": 1, "motivated": 1,
+    "focused": 1, "energized": 1, "peaceful": 1, "productive": 1,
+    "okay": 0, "ok": 0, "fine": 0, "neutral": 0, "meh": 0, "bored": -0.5,
+    "tired": -0.5, "distracted": -0.5, "restless": -0.5, "unfocused": -0.5,
+    "stressed": -1, "anxious": -1, "worried": -1, "nervous": -1, "irritable": -1, "frustrated": -1,
+    "overwhelmed": -1.5, "sad": -1.5, "lonely": -1.5, "angry": -1.5, "exhausted": -1.5,
+    "depressed": -2, "miserable": -2, "panicked": -2, "hopeless": -2, "awful": -2, "terrible": -2,
+}
+
+# A habit needs this many moods on record before it is reported
+MIN_OBSERVATIONS = 5
+
+
+def mood_score(mood):
+    """Score free-text mood on a -2..+2 scale, or None if it can't be scored.
+
+    Accepts known mood words (averaged if several) or a 1-10 rating.
+    """
+    text = str(mood).strip().lower()
+    number = re.fullmatch(r"(\d+(?:\.\d+)?)(?:\s*/\s*10)?", text)
+    if number:
+        value = float(number.group(1))
+        return (value - 5.5) / 2.25 if 1 <= value <= 10 else None
+    scores = [MOOD_SCORES[word] for word in re.findall(r"[a-z]+", text) if word in MOOD_SCORES]
+    return sum(scores) / len(scores) if scores else None
+
+
+# Running statistics are plain dicts so any storage backend can keep them as-is:
+# n, mean of x and y, sums of squared deviations (m2x, m2y) and the co-moment c.
+
+def empty_stats():
+    return {"n": 0, "mx": 0.0, "my": 0.0, "m2x": 0.0, "m2y": 0.0, "c": 0.0}
+
+
+def add(stats, x, y):
+    """Welford update with one (x, y) observation."""
+    stats["n"] += 1
+    n = stats["n"]
+    dx = x - stats["mx"]
+    dy = y - stats["my"]
+    stats["mx"] += dx / n
+    stats["my"] += dy / n
+    stats["m2x"] += dx * (x - stats["mx"])
+    stats["m2y"] += dy * (y - stats["my"])
+    stats["c"] += dx * (y - stats["my"])
+
+
+def remove(stats, x, y):
+    """Exact inverse of ``add`` for an observation that was previously added."""
+    n = stats["n"]
+    if n <= 1:
+        stats.update(empty_stats())
+        return
+    mx_old = (n * stats["mx"] - x) / (n - 1)
+    my_old = (n * stats["my"] - y) / (n - 1)
+    stats["m2x"] -= (x - mx_old) * (x - stats["mx"])
+    stats["m2y"] -= (y - my_old) * (y - stats["my"])
+    stats["c"] -= (x - mx_old) * (y - stats["my"])
+    stats["mx"], stats["my"], stats["n"] = mx_old, my_old, n - 1
+
+
+def correlation(stats):
+    """Pearson r between logging the habit (0/1) and mood, or None if undefined."""
+    if stats["n"] < 2 or stats["m2x"] <= 1e-12 or stats["m2y"] <= 1e-12:
+        return None
+    return stats["c"] / math.sqrt(stats["m2x"] * stats["m2y"])
+
+
+def mood_difference(stats):
+    """Average mood on days the habit was logged minus days it wasn't (x is 0/1)."""
+    if stats["m2x"] <= 1e-12:
+        return None
+    return stats["c"] / stats["m2x"]
+
+
+def local_day(timezone, now=None):
+    """Today ("YYYY-MM-DD") in the user's timezone.
+
+    Moods and habit logs are both filed under the user's local day, so a
+    habit and a mood from the same evening count toward the same day.
+    """
+    now = now or datetime.now(pytz.utc)
+    return now.astimezone(pytz.timezone(timezone)).strftime("%Y-%m-%d")
+
+
+def new_insights(user_id):
+    return {"_id": user_id, "day": None, "scores": [], "done": [], "mood": empty_stats(), "habits": []}
+
+
+def _habit_entry(doc, habit):
+    """The stats entry for a habit, created from the overall mood stats (every past x = 0)."""
+    for entry in doc["habits"]:
+        if entry["habit"] == habit:
+            return entry
+    overall = doc["mood"]
+    entry = {"habit": habit, **empty_stats(), "n": overall["n"], "my": overall["my"], "m2y": overall["m2y"]}
+    doc["habits"].append(entry)
+    return entry
+
+
+def _roll_day(doc, day):
+    if doc["day"] != day:
+        doc["day"], doc["scores"], doc["done"] = day, [], []
+
+
+def apply_mood(doc, day, score):
+    """Fold one mood (already scored) into the user's stats. Cost is independent of history size."""
+    _roll_day(doc, day)
+    add(doc["mood"], 0.0, score)
+    for entry in doc["habits"]:
+        add(entry, 1.0 if entry["habit"] in doc["done"] else 0.0, score)
+    doc["scores"].append(score)
+
+
+def apply_habit(doc, habit, day):
+    """Mark a habit as logged on ``day``; moods already logged that day flip from x=0 to x=1."""
+    _roll_day(doc, day)
+    entry = _habit_entry(doc, habit)
+    if habit in doc["done"]:
+        return
+    for score in doc["scores"]:
+        remove(entry, 0.0, score)
+        add(entry, 1.0, score)
+    doc["done"].append(habit)
+
+
+def recompute(user_id, moods, habits):
+    """Rebuild a user's stats from full history, replaying it in order through the same updates."""
+    doc = new_insights(user_id)
+    logs_by_day = {}
+    for habit in habits:
+        _habit_entry(doc, habit["habit"])
+        for day in habit.get("logs", []):
+            logs_by_day.setdefault(day, []).append(habit["habit"])
+
+    for entry in sorted(moods, key=lambda entry: entry["timestamp"]):
+        score = mood_score(entry["mood"])
+        if score is None:
+            continue
+        day = entry["timestamp"][:10]
+        if doc["day"] != day:
+            _roll_day(doc, day)
+            doc["done"] = list(logs_by_day.get(day, []))
+        apply_mood(doc, day, score)
+    return doc
+
+
+def stats_match(a, b, tolerance=1e-6):
+    keys = ("n", "mx", "my", "m2x", "m2y", "c")
+    return all(abs(a[key] - b[key]) <= tolerance * max(1.0, abs(b[key])) for key in keys)
+
+
+class InsightsStore:
+    """Per-user mood/habit statistics, read and written through the storage backend."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    async def get(self, user_id):
+        return await self.storage.get_insights(user_id)
+
+    async def save(self, doc):
+        await self.storage.save_insights(doc)
+
+    async def record_mood(self, user_id, day, mood):
+        score = mood_score(mood)
+        if score is None:
+            return
+        await self.storage.update_insights(user_id, lambda doc: apply_mood(doc, day, score), new_insights)
+
+    async def record_habit(self, user_id, habit, day):
+        await self.storage.update_insights(user_id, lambda doc: apply_habit(doc, habit, day), new_insights)
+
+    async def forget_habits(self, user_id):
+        await self.storage.forget_insight_habits(user_id)
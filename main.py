@@ -1,23 +1,87 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
+import logging
 import os
 from dotenv import load_dotenv
-from config import GUILD_ID  # Import GUILD_ID
+from config import GUILD_ID, OVERRIDE_GUILD_IDS, GLOBAL_COMMAND_RATE, GLOBAL_COMMAND_BURST, MAX_DB_INFLIGHT, USER_COMMAND_RATE, USER_COMMAND_BURST, USER_MAX_INFLIGHT, TRAFFIC_LOG_PATH, TRAFFIC_SALT, STALL_THRESHOLD_MS
+from hotreload import command_signature
+from ratelimit import TokenBucketLimiter
+from stalls import StallWatchdog
+from storage import open_storage
+from traffic import TrafficRecorder
 
 # Get AuraBot Token
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 
+class AuraTree(app_commands.CommandTree):
+    """Command tree that applies admission control to every app command."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is not discord.InteractionType.application_command or interaction.command is None:
+            return True
+
+        # Per-guild module switches come from the in-memory guild config cache
+        guild_settings = self.client.get_cog("GuildSettings")
+        if guild_settings and not guild_settings.command_enabled(interaction.guild_id, interaction.command):
+            await interaction.response.send_message("This feature is turned off on this server.", ephemeral=True)
+            return False
+
+        command_name = interaction.command.qualified_name
+        denied = self.client.limiter.acquire(interaction.user.id, command_name, interaction.id)
+        if denied is None:
+            return True
+
+        scope, retry_after = denied
+        if scope == "user":
+            message = f"⏳ Slow down! You can use `/{command_name}` again in {max(1, round(retry_after))}s."
+        elif scope == "user_total":
+            message = f"⏳ Slow down! You can use commands again in {max(1, round(retry_after))}s."
+        elif scope == "user_busy":
+            message = "⏳ Your other commands are still running. Please try again once they finish."
+        else:
+            message = "AuraBot is busy right now. Please try again in a few seconds."
+        await interaction.response.send_message(message, ephemeral=True)
+        if self.client.recorder:
+            self.client.recorder.record(interaction, "limited")
+        return False
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        self.client.limiter.release(interaction.id)
+        if self.client.recorder:
+            self.client.recorder.record(interaction, "error")
+        await super().on_error(interaction, error)
+
 class AuraBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True  # Allows AuraBot to read message content
 
         # Initialize the bot with a command prefix and intents
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(command_prefix="!", intents=intents, tree_cls=AuraTree)
 
-    async def setup_hook(self):
-        # Dynamically load all cogs from the 'cogs' folder
+        # Admission control shared by all app commands
+        self.limiter = TokenBucketLimiter(
+            GLOBAL_COMMAND_RATE, GLOBAL_COMMAND_BURST, MAX_DB_INFLIGHT,
+            USER_COMMAND_RATE, USER_COMMAND_BURST, USER_MAX_INFLIGHT
+        )
+
+        # Anonymized traffic capture, only when TRAFFIC_LOG_PATH is set
+        self.recorder = TrafficRecorder(TRAFFIC_LOG_PATH, TRAFFIC_SALT) if TRAFFIC_LOG_PATH else None
+
+        # Shared data store for every cog (STORAGE_BACKEND picks Mongo or SQLite)
+        self.storage = open_storage()
+
+        # Scheduler state passed from an unloading cog to its reloaded instance (see /reload)
+        self.handoff = {}
+        self.synced_signature = None
+
+        # Samples the loop's stack whenever something blocks it (see /stalls)
+        self.watchdog = StallWatchdog(STALL_THRESHOLD_MS / 1000) if STALL_THRESHOLD_MS > 0 else None
+
+    async def load_cogs(self):
+        """Dynamically load all cogs from the 'cogs' folder."""
         for filename in os.listdir('./cogs'):
             if filename.endswith('.py'):
                 try:
@@ -25,17 +89,72 @@ class AuraBot(commands.Bot):
                 except Exception as e:
                     print(f"Failed to load cog {filename[:-3]}: {e}")
 
-        # Sync slash commands
-        try:
-            guild = discord.Object(id=GUILD_ID)  # Use global GUILD_ID
+    def rebuild_help(self):
+        """Regenerate /menu from the command tree; call whenever the registered commands change."""
+        menu = self.get_cog("Menu")
+        if menu:
+            menu.rebuild()
+
+    async def sync_commands(self):
+        """Sync slash commands globally, or only to the override guilds when any are set.
+
+        Registering both would list every command twice in those guilds, so
+        with overrides the global set is synced empty instead. Only an explicit
+        OVERRIDE_GUILD_IDS does that; the legacy GUILD_ID is ignored.
+        """
+        if GUILD_ID:
+            logging.warning("GUILD_ID is deprecated and ignored; set OVERRIDE_GUILD_IDS to register commands in specific guilds only")
+        if not OVERRIDE_GUILD_IDS:
+            synced = await self.tree.sync()
+            print(f'Synced {len(synced)} global commands')
+            self.synced_signature = command_signature(self.tree)
+            return
+
+        for guild_id in OVERRIDE_GUILD_IDS:
+            guild = discord.Object(id=guild_id)
+            # Start from a clean copy so commands removed by a reload disappear too
+            self.tree.clear_commands(guild=guild)
+            self.tree.copy_global_to(guild=guild)
             synced = await self.tree.sync(guild=guild)
-            print(f'Synced {len(synced)} commands to guild {GUILD_ID}')
+            print(f'Synced {len(synced)} commands to guild {guild_id}')
+
+        # Drop global registrations left by earlier runs, keeping the local tree for /reload and /menu
+        commands = self.tree.get_commands()
+        self.tree.clear_commands(guild=None)
+        try:
+            await self.tree.sync()
+        finally:
+            for command in commands:
+                self.tree.add_command(command)
+        print('Cleared global commands (override guilds only)')
+        self.synced_signature = command_signature(self.tree)
+
+    async def setup_hook(self):
+        if self.watchdog:
+            self.watchdog.start(self.tree)
+        await self.load_cogs()
+        self.rebuild_help()
+
+        try:
+            await self.sync_commands()
         except Exception as e:
             print(f'Error syncing commands: {e}')
 
+    async def close(self):
+        if self.watchdog:
+            self.watchdog.stop()
+        await super().close()
+        self.storage.close()
+
     async def on_ready(self):
         print(f'{self.user} is logged in and active! Wassup! Wassup! Wassup!')
 
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Free the command's DB slot once it has finished."""
+        self.limiter.release(interaction.id)
+        if self.recorder:
+            self.recorder.record(interaction, "ok")
+
 # Initialize and run the bot
 if __name__ == '__main__':
     aurabot = AuraBot()
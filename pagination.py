@@ -0,0 +1,87 @@
+import time
+import discord
+
+# Discord allows 25 fields per embed; stay well under it
+PAGE_SIZE = 10
+# How long a rendered page may be served from memory (seconds)
+PAGE_CACHE_TTL = 30
+
+
+class PageCache:
+    """Short-lived cache of rendered pages keyed by ``(user_id, kind, page)``."""
+
+    def __init__(self, ttl=PAGE_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        if len(self._entries) > 1000:
+            self._expire()
+
+    def invalidate(self, user_id):
+        """Drop every cached page for a user after one of their writes."""
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [key for key, (stored, _) in self._entries.items() if now - stored > self.ttl]:
+            del self._entries[key]
+
+
+class PagedEmbedView(discord.ui.View):
+    """Previous/next buttons that fetch and render one page at a time.
+
+    ``await render_page(page)`` returns ``(embed, total_pages)`` or ``None`` once
+    there is nothing left to show.
+    """
+
+    def __init__(self, owner_id, render_page, total_pages, page=0):
+        super().__init__(timeout=180)
+        self.owner_id = owner_id
+        self.render_page = render_page
+        self.total_pages = total_pages
+        self.page = page
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.total_pages - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("These buttons belong to someone else's view.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page):
+        rendered = await self.render_page(page)
+        if rendered is None:
+            await interaction.response.edit_message(content="Nothing left to show.", embed=None, view=None)
+            return
+        embed, self.total_pages = rendered
+        self.page = min(page, self.total_pages - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+
+def page_count(total):
+    return max(1, -(-total // PAGE_SIZE))
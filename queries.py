@@ -0,0 +1,257 @@
+"""Reusable aggregation pipelines that return summary numbers instead of whole documents.
+
+Every pipeline starts with a ``$match`` on ``_id`` so Mongo resolves it
+through the ``_id`` index before any projection work happens.
+"""
+
+
+def _array(field):
+    return {"$ifNull": [f"${field}", []]}
+
+
+def habit_page_pipeline(user_id, skip, limit):
+    """One page of habits with log counts, plus the total number of habits."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {
+            "total": {"$size": _array("habits")},
+            "habits": {"$map": {
+                "input": {"$slice": [_array("habits"), skip, limit]},
+                "as": "h",
+                "in": {
+                    "habit": "$$h.habit",
+                    "reminder_time": "$$h.reminder_time",
+                    # Days moved to cold storage are kept as a count on the habit
+                    "days_logged": {"$add": [
+                        {"$size": {"$ifNull": ["$$h.logs", []]}}, {"$ifNull": ["$$h.archived_days", 0]},
+                    ]},
+                },
+            }},
+        }},
+    ]
+
+
+def goal_page_pipeline(user_id, skip, limit):
+    """One page of goals with progress counts, plus the total number of goals and points."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {
+            "total": {"$size": _array("goals")},
+            "points": {"$ifNull": ["$points", 0]},
+            "goals": {"$map": {
+                "input": {"$slice": [_array("goals"), skip, limit]},
+                "as": "g",
+                "in": {
+                    "goal": "$$g.goal",
+                    "deadline": "$$g.deadline",
+                    "completed": {"$ifNull": ["$$g.completed", False]},
+                    "progress_days": {"$add": [
+                        {"$size": {"$ifNull": ["$$g.progress", []]}}, {"$ifNull": ["$$g.archived_days", 0]},
+                    ]},
+                },
+            }},
+        }},
+    ]
+
+
+def habit_summary_pipeline(user_id, day):
+    """How many habits a user tracks and how many were logged on ``day`` ("YYYY-MM-DD")."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {
+            "total": {"$size": _array("habits")},
+            "logged": {"$size": {"$filter": {
+                "input": _array("habits"),
+                "as": "h",
+                "cond": {"$in": [day, {"$ifNull": ["$$h.logs", []]}]},
+            }}},
+        }},
+    ]
+
+
+def goal_summary_pipeline(user_id):
+    """Goal counts by completion and the user's points."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {
+            "total": {"$size": _array("goals")},
+            "completed": {"$size": {"$filter": {
+                "input": _array("goals"),
+                "as": "g",
+                "cond": {"$eq": ["$$g.completed", True]},
+            }}},
+            "points": {"$ifNull": ["$points", 0]},
+        }},
+    ]
+
+
+def points_pipeline(user_id):
+    """Just the user's points."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {"_id": 0, "points": {"$ifNull": ["$points", 0]}}},
+    ]
+
+
+def _timestamp_range(field, since, until):
+    bounds = []
+    if since:
+        bounds.append({"$gte": [field, since]})
+    if until:
+        bounds.append({"$lte": [field, until]})
+    return {"$and": bounds}
+
+
+def mood_range_pipeline(user_id, since, until, skip, limit):
+    """One page of a user's moods between two timestamps, newest first, plus how many are in range."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {"moods": {"$filter": {
+            "input": _array("moods"),
+            "as": "m",
+            "cond": _timestamp_range("$$m.timestamp", since, until),
+        }}}},
+        {"$project": {
+            "total": {"$size": "$moods"},
+            "moods": {"$slice": [{"$reverseArray": "$moods"}, skip, limit]},
+        }},
+    ]
+
+
+def moods_at_pipeline(user_id, timestamps):
+    """The moods logged at the given timestamps."""
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {"moods": {"$filter": {
+            "input": _array("moods"),
+            "as": "m",
+            "cond": {"$in": ["$$m.timestamp", list(timestamps)]},
+        }}}},
+    ]
+
+
+def _lookup(collection, name, project, **let):
+    """Join the tracker document with the same ``_id``, reduced to ``project``.
+
+    Extra ``let`` variables are available to the projection as ``$$name``.
+    """
+    return {"$lookup": {
+        "from": collection,
+        "let": {"uid": "$_id", **let},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$_id", "$$uid"]}}},
+            {"$project": project},
+        ],
+        "as": name,
+    }}
+
+
+def dashboard_pipeline(user_id, default_timezone, mood_limit):
+    """A user's profile and today's state in every tracker, in one round trip.
+
+    Run against ``user_profiles``. "Today" is worked out on the server from
+    the profile's timezone, so habit status needs no earlier query. Results
+    have ``mood``/``habit``/``goal`` arrays with at most one joined document.
+    """
+    return [
+        {"$match": {"_id": user_id}},
+        {"$project": {
+            "username": 1,
+            "timezone": {"$ifNull": ["$timezone", default_timezone]},
+            "digest_opt_in": {"$ifNull": ["$digest_opt_in", False]},
+        }},
+        {"$set": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$$NOW", "timezone": "$timezone"}}}},
+        _lookup("mood_logging", "mood", {
+            "_id": 0,
+            "reminder_time": 1,
+            "moods": {"$slice": [_array("moods"), -mood_limit]},
+        }),
+        _lookup("habit_tracking", "habit", {"_id": 0, "habits": {"$map": {
+            "input": _array("habits"),
+            "as": "h",
+            "in": {
+                "habit": "$$h.habit",
+                "reminder_time": "$$h.reminder_time",
+                "done": {"$in": ["$$day", {"$ifNull": ["$$h.logs", []]}]},
+            },
+        }}}, day="$day"),
+        _lookup("goal_tracking", "goal", {
+            "_id": 0,
+            "points": {"$ifNull": ["$points", 0]},
+            "goals": {"$map": {
+                "input": {"$filter": {"input": _array("goals"), "as": "g", "cond": {"$ne": ["$$g.completed", True]}}},
+                "as": "g",
+                "in": {
+                    "goal": "$$g.goal",
+                    "deadline": "$$g.deadline",
+                    "progress_days": {"$add": [
+                        {"$size": {"$ifNull": ["$$g.progress", []]}}, {"$ifNull": ["$$g.archived_days", 0]},
+                    ]},
+                },
+            }},
+        }),
+    ]
+
+
+def _in_window(value, since_day, before_day):
+    # Days and "YYYY-MM-DD HH:MM:SS" timestamps both compare correctly as strings
+    return {"$and": [{"$gte": [value, since_day]}, {"$lt": [value, before_day]}]}
+
+
+def weekly_digest_pipeline(user_ids, since_day, before_day):
+    """Activity from ``since_day`` up to (not including) ``before_day`` for a cohort of users.
+
+    Joined from every tracker in one round trip.
+
+    Run against ``user_profiles``. Each result holds the week's mood
+    strings, per-habit days logged, goal counts and points.
+    """
+    return [
+        {"$match": {"_id": {"$in": list(user_ids)}}},
+        {"$project": {"_id": 1}},
+        _lookup("mood_logging", "mood", {"moods": {"$map": {
+            "input": {"$filter": {
+                "input": _array("moods"),
+                "as": "m",
+                "cond": _in_window("$$m.timestamp", since_day, before_day),
+            }},
+            "as": "m",
+            "in": "$$m.mood",
+        }}}),
+        _lookup("habit_tracking", "habit", {"habits": {"$map": {
+            "input": _array("habits"),
+            "as": "h",
+            "in": {
+                "habit": "$$h.habit",
+                "days": {"$size": {"$filter": {
+                    "input": {"$ifNull": ["$$h.logs", []]},
+                    "as": "d",
+                    "cond": _in_window("$$d", since_day, before_day),
+                }}},
+            },
+        }}}),
+        _lookup("goal_tracking", "goal", {
+            "points": {"$ifNull": ["$points", 0]},
+            "active": {"$size": {"$filter": {
+                "input": _array("goals"), "as": "g", "cond": {"$ne": ["$$g.completed", True]},
+            }}},
+            "completed": {"$size": {"$filter": {
+                "input": _array("goals"), "as": "g", "cond": {"$eq": ["$$g.completed", True]},
+            }}},
+            "progress_days": {"$sum": {"$map": {
+                "input": _array("goals"),
+                "as": "g",
+                "in": {"$size": {"$filter": {
+                    "input": {"$ifNull": ["$$g.progress", []]},
+                    "as": "d",
+                    "cond": _in_window("$$d", since_day, before_day),
+                }}},
+            }}},
+        }),
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def first(collection, pipeline):
+    """Run a pipeline and return its single result document, or None."""
+    return next(collection.aggregate(pipeline), None)
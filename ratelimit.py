@@ -0,0 +1,145 @@
+import time
+
+# Per-command budgets: (burst capacity, tokens refilled per second).
+# Read-heavy commands get smaller bursts since they do the most DB work.
+COMMAND_BUDGETS = {
+    "logmood": (5, 1 / 12),
+    "viewmoods": (3, 1 / 20),
+    "searchmoods": (3, 1 / 20),
+    "setmoodreminder": (3, 1 / 30),
+    "stopmoodreminder": (3, 1 / 30),
+    "addhabit": (5, 1 / 12),
+    "loghabit": (5, 1 / 12),
+    "viewhabits": (3, 1 / 20),
+    "clearhabit": (2, 1 / 60),
+    "creategoal": (5, 1 / 12),
+    "updategoal": (5, 1 / 12),
+    "viewgoal": (3, 1 / 20),
+    "viewpoints": (3, 1 / 20),
+    "deletegoal": (3, 1 / 20),
+    "cleargoal": (2, 1 / 60),
+    "createprofile": (2, 1 / 60),
+    "viewprofile": (3, 1 / 20),
+    "dashboard": (5, 1 / 10),
+    "serversettings": (3, 1 / 20),
+    "weeklydigest": (2, 1 / 60),
+    "insights": (3, 1 / 20),
+    "importdata": (2, 1 / 300),
+    "reload": (3, 1 / 20),
+    "stalls": (3, 1 / 20),
+}
+DEFAULT_BUDGET = (5, 1 / 10)
+
+# How often idle buckets are swept out of memory (seconds)
+SWEEP_INTERVAL = 60
+# Slots held longer than this are assumed leaked and reclaimed (seconds)
+SLOT_TIMEOUT = 30
+
+
+class TokenBucketLimiter:
+    """Per-user and global token buckets plus caps on in-flight DB-bound commands.
+
+    Buckets are stored as ``[tokens, last_refill]`` pairs keyed by
+    ``(user_id, command)``, plus one per user across all commands so a user
+    can't take the whole global burst by rotating through commands. A
+    bucket is only evicted once it has fully refilled, so forgetting it is
+    indistinguishable from keeping it. Likewise each user may hold only
+    ``user_max_inflight`` of the ``max_inflight`` DB slots.
+    """
+
+    def __init__(self, global_rate, global_burst, max_inflight, user_rate, user_burst, user_max_inflight,
+                 budgets=None, clock=time.monotonic):
+        self.budgets = COMMAND_BUDGETS if budgets is None else budgets
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_inflight = max_inflight
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.user_max_inflight = user_max_inflight
+        self.clock = clock
+
+        now = clock()
+        self._buckets = {}
+        self._users = {}  # user id -> bucket across all of the user's commands
+        self._global = [float(global_burst), now]
+        self._inflight = {}  # interaction id -> (user id, time the slot was taken)
+        self._last_sweep = now
+
+    def budget_for(self, command):
+        return self.budgets.get(command, DEFAULT_BUDGET)
+
+    @staticmethod
+    def _refill(bucket, capacity, rate, now):
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[0] = tokens
+        bucket[1] = now
+        return tokens
+
+    def acquire(self, user_id, command, slot_id):
+        """Try to admit a command.
+
+        Returns ``None`` when admitted, otherwise a ``(scope, retry_after)``
+        tuple where scope is ``"user"`` (this command), ``"user_total"`` (all
+        of the user's commands), ``"global"``, ``"user_busy"`` (the user holds
+        their share of DB slots) or ``"busy"``. Nothing is consumed unless
+        every check passes.
+        """
+        now = self.clock()
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self._sweep(now)
+
+        capacity, rate = self.budget_for(command)
+        key = (user_id, command)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(capacity), now]
+
+        user_tokens = self._refill(bucket, capacity, rate, now)
+        if user_tokens < 1:
+            return "user", (1 - user_tokens) / rate
+
+        total = self._users.get(user_id)
+        if total is None:
+            total = self._users[user_id] = [float(self.user_burst), now]
+        total_tokens = self._refill(total, self.user_burst, self.user_rate, now)
+        if total_tokens < 1:
+            return "user_total", (1 - total_tokens) / self.user_rate
+
+        global_tokens = self._refill(self._global, self.global_burst, self.global_rate, now)
+        if global_tokens < 1:
+            return "global", (1 - global_tokens) / self.global_rate
+
+        if sum(1 for holder, _ in self._inflight.values() if holder == user_id) >= self.user_max_inflight:
+            return "user_busy", 1.0
+        if len(self._inflight) >= self.max_inflight:
+            return "busy", 1.0
+
+        bucket[0] -= 1
+        total[0] -= 1
+        self._global[0] -= 1
+        self._inflight[slot_id] = (user_id, now)
+        return None
+
+    def release(self, slot_id):
+        """Give back the concurrency slot held by a finished (or failed) command."""
+        self._inflight.pop(slot_id, None)
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        idle = []
+        for key, (tokens, last) in self._buckets.items():
+            capacity, rate = self.budget_for(key[1])
+            if now - last >= capacity / rate:
+                idle.append(key)
+        for key in idle:
+            del self._buckets[key]
+        idle = [user_id for user_id, (tokens, last) in self._users.items() if now - last >= self.user_burst / self.user_rate]
+        for user_id in idle:
+            del self._users[user_id]
+
+        stale = [slot for slot, (_, taken) in self._inflight.items() if now - taken >= SLOT_TIMEOUT]
+        for slot in stale:
+            del self._inflight[slot]
+
+    def __len__(self):
+        return len(self._buckets)
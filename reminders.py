@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import logging
+import discord
+import pytz
+
+
+def due_occurrence(reminder_time, now_local, window_minutes):
+    """Return the date ("YYYY-MM-DD") of the reminder occurrence that is due now, or None.
+
+    An occurrence is due from its scheduled minute until ``window_minutes``
+    later, so a restart or a slow tick inside that window still sends it.
+    Yesterday's occurrence is checked too for windows that cross midnight.
+    """
+    try:
+        hour, minute = map(int, reminder_time.split(":"))
+    except (AttributeError, ValueError):
+        return None
+
+    for days_back in (0, 1):
+        day = now_local - timedelta(days=days_back)
+        scheduled = day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if timedelta(0) <= now_local - scheduled <= timedelta(minutes=window_minutes):
+            return scheduled.strftime("%Y-%m-%d")
+    return None
+
+
+def utc_to_local(reminder_time, timezone, now=None):
+    """The "HH:MM" local time in ``timezone`` of a "HH:MM" UTC time, at today's offset.
+
+    Values that aren't a valid time (or an unknown timezone) are returned as-is.
+    """
+    now = now or datetime.now(pytz.utc)
+    try:
+        hour, minute = map(int, reminder_time.split(":"))
+        moment = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return moment.astimezone(pytz.timezone(timezone)).strftime("%H:%M")
+    except (AttributeError, ValueError, pytz.UnknownTimeZoneError):
+        return reminder_time
+
+
+class ReminderLedger:
+    """Persisted last-sent record so each reminder occurrence is sent exactly once.
+
+    A reminder is claimed by storing its occurrence key before the DM goes
+    out; the key is unique, so a second claim (another tick, a restarted
+    process) fails instead of sending a duplicate.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def key(kind, user_id, name, day):
+        return f"{kind}:{user_id}:{name}:{day}"
+
+    async def claim(self, kind, user_id, name, day):
+        """Record the occurrence as sent. Returns False if it was already claimed."""
+        return await self.storage.claim_reminder(self.key(kind, user_id, name, day), user_id)
+
+    async def release(self, kind, user_id, name, day):
+        """Forget a claim whose send failed for a transient reason so it is retried."""
+        await self.storage.release_reminder(self.key(kind, user_id, name, day))
+
+    async def send_once(self, aurabot, kind, user_id, name, day, message):
+        """Claim the occurrence and DM the user. Returns True if the DM was sent."""
+        if not await self.claim(kind, user_id, name, day):
+            return False
+        try:
+            user_obj = await aurabot.fetch_user(user_id)
+            await user_obj.send(message)
+        except discord.Forbidden:
+            # DMs are disabled; retrying won't help, so the claim stays
+            logging.warning(f"Failed to send {kind} reminder to user {user_id} (DMs may be disabled).")
+            return False
+        except discord.HTTPException as e:
+            logging.error(f"Error sending {kind} reminder to user {user_id}: {e}")
+            await self.release(kind, user_id, name, day)
+            return False
+        return True
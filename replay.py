@@ -0,0 +1,196 @@
+"""Replay a recorded traffic log against the cogs and a local database.
+
+Usage:
+    python replay.py traffic.jsonl --speed 10 --mongo-url mongodb://localhost:27017
+    python replay.py traffic.jsonl --storage sqlite --sqlite-path replay.db
+
+Commands are invoked through fake interactions, so nothing is sent to
+Discord. Argument values are synthesized from the recorded shapes.
+Point --mongo-url or --sqlite-path at a throwaway database: replay writes to it.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import string
+import time
+import discord
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"replay-{user_id}"
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+
+    async def edit_message(self, *args, **kwargs):
+        self._done = True
+
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the cogs' command callbacks."""
+
+    def __init__(self, interaction_id, user_id, command):
+        self.id = interaction_id
+        self.type = discord.InteractionType.application_command
+        self.user = FakeUser(user_id)
+        self.command = command
+        self.guild_id = None
+        self.extras = {}
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, *args, **kwargs):
+        pass
+
+
+MOODS = ["happy", "calm", "tired", "anxious", "sad", "excited", "stressed", "okay"]
+
+# Values for parameters whose format the cogs validate
+GENERATORS = {
+    "time": lambda n: f"{random.randrange(24):02d}:{random.randrange(60):02d}",
+    "reminder_time": lambda n: f"{random.randrange(24):02d}:{random.randrange(60):02d}",
+    "deadline": lambda n: f"2030-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+    "mood": lambda n: random.choice(MOODS),
+}
+
+
+def synthesize_args(shape):
+    args = {}
+    for name, (type_name, length) in shape.items():
+        if name in GENERATORS:
+            args[name] = GENERATORS[name](length)
+        elif type_name in ("integer", "number"):
+            args[name] = int(length) or 1
+        elif type_name == "boolean":
+            args[name] = True
+        else:
+            args[name] = "".join(random.choices(string.ascii_lowercase, k=max(1, length)))
+    return args
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def measure_loop_lag(samples, interval=0.01):
+    """Record how late the event loop wakes us up, in milliseconds."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def replay(events, speed, admission):
+    from main import AuraBot
+
+    aurabot = AuraBot()
+    async with aurabot:
+        await aurabot.load_cogs()
+
+        # Replay users get stable synthetic ids and a UTC profile, like real users would have
+        user_ids = {user_hash: int(user_hash[:15], 16) for user_hash in {e["user"] for e in events}}
+        for user_id in user_ids.values():
+            if await aurabot.storage.get_profile(user_id) is None:
+                await aurabot.storage.create_profile(user_id, f"replay-{user_id}", "UTC")
+
+        latencies = {}
+        outcomes = {"ok": 0, "error": 0, "limited": 0, "unknown": 0}
+        lag_samples = []
+        lag_task = asyncio.create_task(measure_loop_lag(lag_samples))
+
+        async def run(index, event):
+            command = aurabot.tree.get_command(event["cmd"])
+            if command is None:
+                outcomes["unknown"] += 1
+                return
+            interaction = FakeInteraction(index, user_ids[event["user"]], command)
+            if admission and not await aurabot.tree.interaction_check(interaction):
+                outcomes["limited"] += 1
+                return
+            started = time.perf_counter()
+            try:
+                await command.callback(command.binding, interaction, **synthesize_args(event.get("args", {})))
+                outcomes["ok"] += 1
+            except Exception as e:
+                print(f"/{event['cmd']} failed: {e}")
+                outcomes["error"] += 1
+            finally:
+                latencies.setdefault(event["cmd"], []).append((time.perf_counter() - started) * 1000)
+                aurabot.limiter.release(interaction.id)
+
+        first_ts = events[0]["ts"]
+        wall_start = time.perf_counter()
+        tasks = []
+        for index, event in enumerate(events):
+            delay = (event["ts"] - first_ts) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run(index, event)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - wall_start
+        lag_task.cancel()
+
+    all_latencies = [ms for values in latencies.values() for ms in values]
+    print(f"Replayed {len(events)} events in {wall:.2f}s at {speed}x "
+          f"({outcomes['ok'] / wall if wall else 0:.1f} commands/s)")
+    print(f"Outcomes: {outcomes}")
+    print(f"{'command':<20}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, values in sorted(latencies.items()) + [("ALL", all_latencies)]:
+        print(f"{name:<20}{len(values):>8}{percentile(values, 50):>10.1f}"
+              f"{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}")
+    if lag_samples:
+        print(f"Event-loop lag: mean {statistics.mean(lag_samples):.1f} ms, "
+              f"p99 {percentile(lag_samples, 99):.1f} ms, max {max(lag_samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded AuraBot traffic against a local database.")
+    parser.add_argument("log", help="JSONL file written by TrafficRecorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (e.g. 1 to 100)")
+    parser.add_argument("--storage", choices=("mongo", "sqlite"), default="mongo", help="Storage backend to replay against")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="Local Mongo stand-in to write to")
+    parser.add_argument("--sqlite-path", default="replay.db", help="SQLite file to write to with --storage sqlite")
+    parser.add_argument("--admission", action="store_true", help="Apply the bot's rate limiter during replay")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for synthesized arguments")
+    options = parser.parse_args()
+
+    if options.speed <= 0:
+        parser.error("--speed must be positive")
+
+    # The cogs read these at import/construction time
+    os.environ["STORAGE_BACKEND"] = options.storage
+    os.environ["MONGO_URL"] = options.mongo_url
+    os.environ["SQLITE_PATH"] = options.sqlite_path
+    os.environ.pop("TRAFFIC_LOG_PATH", None)  # never record the replay itself
+    random.seed(options.seed)
+
+    from traffic import load_events
+
+    recorded = load_events(options.log)
+    if not recorded:
+        parser.error(f"No events found in {options.log}")
+    asyncio.run(replay(recorded, options.speed, options.admission))
@@ -0,0 +1,24 @@
+"""Word index behind /searchmoods.
+
+Every mood is split into its distinct lowercase words when it is logged,
+and each backend keeps one ``(user_id, term, timestamp)`` posting per word.
+A search intersects the postings of its words inside the date range, so
+it only touches the entries that match instead of the whole history.
+With encryption on, terms are stored as keyed hashes (see
+``FieldCipher.blind``) rather than as words. That hides the words but not
+the index's shape: anyone reading the database can see which of a user's
+moods share a term and how often each term occurs, which is enough for
+frequency analysis. The hash key is derived from the user's data key,
+which is stored (wrapped by ENCRYPTION_KEY) in the same database, so the
+index is only as safe as that key.
+"""
+import re
+
+WORD = re.compile(r"[^\W_]+")
+# Words per search; more rarely narrows anything and costs a lookup each
+MAX_SEARCH_TERMS = 5
+
+
+def terms(text):
+    """Distinct lowercase words of a mood or search query, sorted."""
+    return sorted({word.casefold() for word in WORD.findall(text or "")})
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+# Frames from files under this directory count as AuraBot code when attributing a stall
+BOT_ROOT = os.path.dirname(os.path.abspath(__file__))
+COGS_ROOT = os.path.join(BOT_ROOT, "cogs")
+
+
+def _is_bot_frame(frame, root=BOT_ROOT):
+    return frame.f_code.co_filename.startswith(root + os.sep)
+
+
+def _qualname(code):
+    # co_qualname is new in Python 3.11; older versions only have the bare name
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def _describe(frame):
+    path = os.path.relpath(frame.f_code.co_filename, BOT_ROOT)
+    return f"{path}:{frame.f_lineno} in {_qualname(frame.f_code)}"
+
+
+def attribute(frame):
+    """Work out who is blocking the loop from the loop thread's current stack.
+
+    Returns ``(cog frame code, call site)``: the outermost frame inside
+    ``cogs/`` (normally the command callback or loop body) and the innermost
+    AuraBot frame, which is the line actually doing the blocking work. When
+    no AuraBot code is on the stack the innermost frame is used instead.
+    """
+    innermost, cog_code, site = frame, None, None
+    while frame is not None:
+        if site is None and _is_bot_frame(frame) and frame.f_code.co_name != "<module>":
+            site = _describe(frame)
+        if _is_bot_frame(frame, COGS_ROOT):
+            cog_code = frame.f_code
+        frame = frame.f_back
+    if site is None:
+        site = f"{innermost.f_code.co_filename}:{innermost.f_lineno} in {_qualname(innermost.f_code)}"
+    return cog_code, site
+
+
+class StallWatchdog:
+    """Measures event loop lag and attributes long stalls to the code that caused them.
+
+    A coroutine on the loop records a heartbeat every ``interval`` seconds.
+    A daemon thread checks the heartbeat; once it is older than
+    ``threshold`` the thread samples the loop thread's stack. When the
+    loop comes back, the heartbeat closes the stall and adds its length to
+    the totals for that ``(cog, command, call site)``.
+    """
+
+    def __init__(self, threshold, interval=0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.stats = {}  # (cog, command, site) -> [stalls, total seconds, worst seconds]
+        self.started_at = None
+        self.tree = None
+
+        self._lock = threading.Lock()
+        self._beat = 0  # heartbeat counter; a sample belongs to the beat it was taken after
+        self._last_beat = time.monotonic()
+        self._sample = None  # (beat, cog frame code, site)
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, tree=None):
+        """Start watching the running loop. ``tree`` maps callbacks back to command names."""
+        self.tree = tree
+        self.started_at = time.time()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            with self._lock:
+                self._beat += 1
+                self._last_beat = time.monotonic()
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            with self._lock:
+                sample, self._sample = self._sample, None
+            if sample and lag >= self.threshold:
+                self._record(sample, lag)
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                beat, blocked_for = self._beat, time.monotonic() - self._last_beat
+                if blocked_for < self.threshold or (self._sample and self._sample[0] == beat):
+                    continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            cog_code, site = attribute(frame)
+            del frame
+            with self._lock:
+                # The loop may have moved on while we were walking the stack
+                if self._beat == beat:
+                    self._sample = (beat, cog_code, site)
+
+    def _command_for(self, code):
+        """Name the cog and slash command a callback belongs to (runs on the loop)."""
+        if code is None:
+            return "-", "-"
+        qualname = _qualname(code)
+        cog = qualname.split(".")[0] if "." in qualname else "-"
+        for command in self.tree.walk_commands() if self.tree else []:
+            callback = getattr(command, "callback", None)
+            if callback is not None and callback.__code__ is code:
+                return cog, f"/{command.qualified_name}"
+        return cog, code.co_name
+
+    def _record(self, sample, lag):
+        _, cog_code, site = sample
+        cog, command = self._command_for(cog_code)
+        entry = self.stats.setdefault((cog, command, site), [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += lag
+        entry[2] = max(entry[2], lag)
+        logging.warning(f"Event loop blocked for {lag * 1000:.0f} ms by {cog} {command} at {site}")
+
+    def top(self, limit=10):
+        """Stall sources ordered by total time blocked: ``[(cog, command, site, stalls, total, worst)]``."""
+        ranked = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [(*key, count, total, worst) for key, (count, total, worst) in ranked]
+
+    def reset(self):
+        self.stats.clear()
+        self.started_at = time.time()
@@ -0,0 +1,80 @@
+import asyncio
+import functools
+import os
+from config import STORAGE_BACKEND, SQLITE_PATH, ENCRYPTION_KEY, DATA_KEY_CACHE_SIZE
+from storage.base import Backend
+
+# Backend methods that change what a user sees; each takes the user id first
+USER_WRITES = frozenset({
+    "create_profile", "set_timezone", "set_digest_opt_in",
+    "add_mood", "set_mood_reminder", "import_moods",
+    "add_habit", "log_habit", "clear_habits", "import_habit_logs",
+    "add_goal", "log_goal_progress", "delete_goal", "clear_completed_goals",
+    "mark_goals_reminded", "deduct_points", "compact_user",
+})
+
+
+class Storage:
+    """Async facade over a storage backend.
+
+    ``await aurabot.storage.get_profile(user_id)`` runs the backend's blocking
+    call on its executor, so every cog gets the same non-blocking access no
+    matter which backend is configured.
+
+    Every finished write in ``USER_WRITES`` bumps that user's write version,
+    so views built from a user's data can tell when they went stale.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.write_versions = {}
+
+    def write_version(self, user_id):
+        """Number of writes to ``user_id``'s data finished through this facade."""
+        return self.write_versions.get(user_id, 0)
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+        if not callable(method) or name.startswith("_"):
+            return method
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self.backend.executor, functools.partial(method, *args, **kwargs))
+            finally:
+                # Bumped even on failure, since a write can fail after it landed
+                if name in USER_WRITES and args:
+                    self.write_versions[args[0]] = self.write_versions.get(args[0], 0) + 1
+
+        call.__name__ = name
+        return call
+
+    def close(self):
+        self.backend.close()
+
+
+def open_backend(name):
+    if name == "mongo":
+        from storage.mongo import MongoBackend
+        return MongoBackend(os.getenv("MONGO_URL"))
+    if name == "sqlite":
+        from storage.sqlite import SQLiteBackend
+        return SQLiteBackend(SQLITE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; use 'mongo' or 'sqlite'")
+
+
+def open_storage(backend=None, encryption_key=None):
+    """Open the backend named by STORAGE_BACKEND ("mongo" or "sqlite").
+
+    With ENCRYPTION_KEY set, user-written text is encrypted field by field.
+    """
+    backend = open_backend(backend or STORAGE_BACKEND)
+    encryption_key = encryption_key or ENCRYPTION_KEY
+    if encryption_key:
+        from storage.encrypted import EncryptedBackend, load_master_key
+        backend = EncryptedBackend(backend, load_master_key(encryption_key), DATA_KEY_CACHE_SIZE)
+    return Storage(backend)
+
+
+__all__ = ["Backend", "Storage", "open_storage"]
@@ -0,0 +1,316 @@
+import search
+
+
+class WriteConflict(Exception):
+    """A version-checked write kept losing to concurrent writers and gave up."""
+
+
+class Backend:
+    """Interface every storage backend implements.
+
+    Methods are plain blocking calls; ``storage.Storage`` runs them on the
+    backend's ``executor`` so cogs can ``await`` them without stalling the
+    event loop. Every mutation must be safe against concurrent callers:
+    a single atomic/conditional update or a version-checked write with retry,
+    never a read followed by a blind overwrite. Days are "YYYY-MM-DD" strings and mood timestamps are
+    "YYYY-MM-DD HH:MM:SS" in the user's local time, as stored today.
+    """
+
+    # Executor the calls run on; None means the event loop's default thread pool
+    executor = None
+
+    def close(self):
+        pass
+
+    # Profiles
+
+    def get_profile(self, user_id):
+        """The profile dict (``_id``, ``username``, ``timezone``, ...) or None."""
+        raise NotImplementedError
+
+    def create_profile(self, user_id, username, timezone):
+        raise NotImplementedError
+
+    def set_timezone(self, user_id, timezone):
+        """Set a profile's timezone, creating the profile if needed."""
+        raise NotImplementedError
+
+    def set_digest_opt_in(self, user_id, enabled):
+        """Returns False if the user has no profile."""
+        raise NotImplementedError
+
+    def get_timezones(self, user_ids):
+        """Map of user id to timezone for the given users that have one."""
+        raise NotImplementedError
+
+    def dashboard(self, user_id, default_timezone, mood_limit):
+        """Everything /dashboard shows, in one round trip, or None without a profile.
+
+        ``{"username", "timezone", "digest_opt_in", "day", "mood_reminder",
+        "moods": [{"mood", "timestamp"}] (latest ``mood_limit``, oldest first),
+        "habits": [{"habit", "reminder_time"?, "done"}], "points",
+        "goals": [{"goal", "deadline"?, "progress_days"}] (open goals only)}``.
+        ``day`` is today in the profile's timezone (``default_timezone`` if unset)
+        and ``done`` says whether a habit was logged on it.
+        """
+        raise NotImplementedError
+
+    # Moods
+
+    def add_mood(self, user_id, mood, timestamp, terms=None):
+        """Store a mood and its search postings (``terms`` defaults to ``search.terms(mood)``)."""
+        raise NotImplementedError
+
+    def get_moods(self, user_id):
+        """All of a user's moods as ``{"mood", "timestamp"}`` dicts, oldest first."""
+        raise NotImplementedError
+
+    def set_mood_reminder(self, user_id, reminder_time):
+        """Set the daily reminder ("HH:MM"), or turn it off with None."""
+        raise NotImplementedError
+
+    def get_mood_reminders(self):
+        """``(user_id, reminder_time)`` for every user with a reminder set."""
+        raise NotImplementedError
+
+    # Mood search (see search.py)
+
+    def search_moods(self, user_id, terms, since, until, skip, limit):
+        """Moods containing every term, between two timestamps (inclusive, None for open), newest first.
+
+        Without terms, every mood in the range matches. Returns
+        ``{"total", "moods": [{"mood", "timestamp"}]}`` for the requested slice.
+        """
+        raise NotImplementedError
+
+    def mood_index_ready(self, user_id):
+        """Whether the user's moods from before search existed have been indexed."""
+        raise NotImplementedError
+
+    def add_mood_postings(self, user_id, postings):
+        """Add ``(term, timestamp)`` postings (duplicates are ignored) and mark the user's index ready."""
+        raise NotImplementedError
+
+    def build_mood_index(self, user_id):
+        """Index every mood a user logged before search existed."""
+        postings = [(term, entry["timestamp"]) for entry in self.get_moods(user_id) for term in search.terms(entry["mood"])]
+        self.add_mood_postings(user_id, postings)
+
+    # Habits
+
+    def add_habit(self, user_id, habit, reminder_time=None):
+        raise NotImplementedError
+
+    def get_habit_names(self, user_id):
+        raise NotImplementedError
+
+    def log_habit(self, user_id, habit, day):
+        """Log a habit for ``day``. Returns "logged", "already" or "missing"."""
+        raise NotImplementedError
+
+    def habit_page(self, user_id, skip, limit):
+        """``{"total", "habits": [{"habit", "reminder_time"?, "days_logged"}]}`` or None."""
+        raise NotImplementedError
+
+    def habit_summary(self, user_id, day):
+        """``{"total", "logged"}``: habits tracked and how many were logged on ``day``."""
+        raise NotImplementedError
+
+    def clear_habits(self, user_id):
+        """Remove all habits. Returns False if the user never tracked any."""
+        raise NotImplementedError
+
+    def get_habit_reminders(self):
+        """``(user_id, habit, reminder_time, recent_logs)`` for habits with a reminder.
+
+        ``recent_logs`` holds the latest logged days, including every one that
+        could still be due (today or yesterday in the user's timezone).
+        """
+        raise NotImplementedError
+
+    def get_habit_history(self, user_id):
+        """All habits with every logged day, as ``{"habit", "logs"}`` dicts."""
+        raise NotImplementedError
+
+    def localize_habit_reminders(self, convert):
+        """Convert habit reminder times stored in UTC (before they followed the profile's timezone).
+
+        Each such time becomes ``convert(reminder_time, timezone)``, with the
+        user's profile timezone or "UTC". Converted habits are flagged and new
+        ones are stored flagged, so running this again changes nothing.
+        Returns how many reminders were converted.
+        """
+        raise NotImplementedError
+
+    # Goals
+
+    def add_goal(self, user_id, goal, deadline=None):
+        raise NotImplementedError
+
+    def get_open_goal_names(self, user_id):
+        raise NotImplementedError
+
+    def log_goal_progress(self, user_id, goal, day, points):
+        """Log progress and award points. Returns ``(status, total_points)``.
+
+        status is "logged", "already" or "missing".
+        """
+        raise NotImplementedError
+
+    def goal_page(self, user_id, skip, limit):
+        """``{"total", "points", "goals": [{"goal", "deadline"?, "completed", "progress_days"}]}`` or None."""
+        raise NotImplementedError
+
+    def goal_summary(self, user_id):
+        """``{"total", "completed", "points"}`` or None."""
+        raise NotImplementedError
+
+    def get_points(self, user_id):
+        raise NotImplementedError
+
+    def delete_goal(self, user_id, goal):
+        """Returns False if the goal wasn't found."""
+        raise NotImplementedError
+
+    def clear_completed_goals(self, user_id):
+        """Returns how many goals were removed."""
+        raise NotImplementedError
+
+    def get_goal_users(self):
+        """Every user with goals, as ``{"_id", "goals", "points"}`` dicts."""
+        raise NotImplementedError
+
+    def mark_goals_reminded(self, user_id, goals):
+        """Flag the named goals' deadline reminders as sent."""
+        raise NotImplementedError
+
+    def deduct_points(self, user_id, amount):
+        """Take ``amount`` points away without going below zero. Returns the new total."""
+        raise NotImplementedError
+
+    # Encryption keys
+
+    def get_data_key(self, user_id):
+        """The user's wrapped data key (bytes) or None."""
+        raise NotImplementedError
+
+    def put_data_key(self, user_id, wrapped):
+        """Store a wrapped data key unless the user already has one. Returns the stored key."""
+        raise NotImplementedError
+
+    # Reminder ledger
+
+    def claim_reminder(self, key, user_id):
+        """Record a reminder occurrence as sent. Returns False if it already was."""
+        raise NotImplementedError
+
+    def release_reminder(self, key):
+        raise NotImplementedError
+
+    # Guild settings
+
+    def get_guild_configs(self, guild_ids):
+        """Map of guild id to its stored settings (without ``_id``)."""
+        raise NotImplementedError
+
+    def init_guild_config(self, guild_id, defaults):
+        """Store defaults for a guild unless it already has settings."""
+        raise NotImplementedError
+
+    def update_guild_config(self, guild_id, changes):
+        raise NotImplementedError
+
+    # Weekly digest
+
+    def start_digest_run(self, week_key, started_at):
+        """Create the run record if needed and return it (``cursor``, ``done``, ``sent``)."""
+        raise NotImplementedError
+
+    def digest_run_done(self, week_key):
+        raise NotImplementedError
+
+    def advance_digest_run(self, week_key, cursor, sent, cost):
+        """Save the cursor and add ``sent`` and the ``cost`` counters to the run."""
+        raise NotImplementedError
+
+    def finish_digest_run(self, week_key, finished_at, cost):
+        """Mark the run done, add the final cost and return the run record."""
+        raise NotImplementedError
+
+    def count_digest_users(self, after):
+        """Opted-in users with an id greater than ``after`` (None for all)."""
+        raise NotImplementedError
+
+    def digest_cohort(self, after, limit):
+        """The next ``limit`` opted-in user ids after ``after``, ascending."""
+        raise NotImplementedError
+
+    def weekly_summaries(self, user_ids, since_day, before_day):
+        """Activity from ``since_day`` up to (not including) ``before_day`` per user, ascending by id.
+
+        Each item is ``{"_id", "moods": [str], "habits": [{"habit", "days"}],
+        "goals": {"active", "completed", "progress_days", "points"} or None}``.
+        """
+        raise NotImplementedError
+
+    # Bulk import (see dataimport.py)
+
+    def import_moods(self, user_id, entries):
+        """Add ``(mood, timestamp, terms)`` entries in one write, keeping moods in time order.
+
+        ``terms`` of None means ``search.terms(mood)``. Entries at a timestamp
+        the user already has a mood for, hot or archived, are skipped, so
+        re-importing a file is harmless. Returns how many moods were added.
+        """
+        raise NotImplementedError
+
+    def import_habit_logs(self, user_id, logs):
+        """Add ``(habit, day)`` logs in bulk, creating habits the user doesn't track yet.
+
+        Each habit's logs stay in day order and no day is stored twice, including
+        days already moved to the archive.
+
+        Returns how many logs were new.
+        """
+        raise NotImplementedError
+
+    # Cold storage (see archive.py)
+
+    def compaction_candidates(self, before_day, after, limit):
+        """Up to ``limit`` user ids above ``after`` (None for all) with history older than ``before_day``."""
+        raise NotImplementedError
+
+    def compact_user(self, user_id, before_day):
+        """Move a user's entries older than ``before_day`` into archive blobs.
+
+        Archived moods also leave the search index.
+
+        Returns counts: ``{"moods", "habit_logs", "goal_days", "bytes"}``.
+        """
+        raise NotImplementedError
+
+    def get_archive(self, user_id):
+        """Every archived record for a user, oldest period first."""
+        raise NotImplementedError
+
+    def archived_mood_count(self, user_id):
+        raise NotImplementedError
+
+    # Insights
+
+    def get_insights(self, user_id):
+        raise NotImplementedError
+
+    def save_insights(self, doc):
+        raise NotImplementedError
+
+    def update_insights(self, user_id, mutate, default):
+        """Load a user's insights (or ``default(user_id)``), apply ``mutate(doc)`` and save it.
+
+        ``mutate`` may run more than once if another write gets in first;
+        raises WriteConflict if it keeps losing.
+        """
+        raise NotImplementedError
+
+    def forget_insight_habits(self, user_id):
+        raise NotImplementedError
@@ -0,0 +1,344 @@
+import base64
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import search
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # Only needed when ENCRYPTION_KEY is set
+    AESGCM = None
+
+# Encrypted values are stored as text with this prefix; anything else is legacy plaintext
+PREFIX = "enc1:"
+NONCE_SIZE = 12
+
+
+def load_master_key(encoded):
+    """Decode ENCRYPTION_KEY (base64 of 32 random bytes)."""
+    if AESGCM is None:
+        raise RuntimeError("ENCRYPTION_KEY is set but the 'cryptography' package is not installed")
+    key = base64.b64decode(encoded)
+    if len(key) != 32:
+        raise ValueError("ENCRYPTION_KEY must be 32 bytes, base64 encoded")
+    return key
+
+
+class FieldCipher:
+    """AES-GCM for one user's text fields.
+
+    Free text (moods) gets a random nonce. Names that are looked up by value
+    (habits, goals) get a nonce derived from an HMAC of the plaintext, so the
+    same name always encrypts to the same ciphertext and equality filters in
+    either backend keep working. The user id and field kind are bound in as
+    associated data, so a value can't be moved to another user or field.
+    """
+
+    def __init__(self, user_id, data_key):
+        self.user_id = user_id
+        self.aead = AESGCM(data_key)
+        self.nonce_key = hmac.new(data_key, b"nonce", hashlib.sha256).digest()
+        self.blind_key = hmac.new(data_key, b"blind", hashlib.sha256).digest()
+
+    def _aad(self, field):
+        return f"{self.user_id}:{field}".encode()
+
+    def encrypt(self, field, text, deterministic=False):
+        if text is None:
+            return None
+        data = text.encode()
+        if deterministic:
+            nonce = hmac.new(self.nonce_key, field.encode() + b"\0" + data, hashlib.sha256).digest()[:NONCE_SIZE]
+        else:
+            nonce = os.urandom(NONCE_SIZE)
+        sealed = nonce + self.aead.encrypt(nonce, data, self._aad(field))
+        return PREFIX + base64.b64encode(sealed).decode()
+
+    def blind(self, field, text):
+        """Keyed hash of a value, for indexes that only need equality (search terms).
+
+        Equal values hash equally, so the stored hashes still show which entries
+        share a value and how often each value occurs.
+        """
+        return hmac.new(self.blind_key, field.encode() + b"\0" + text.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def decrypt(self, field, value):
+        if not isinstance(value, str) or not value.startswith(PREFIX):
+            return value
+        sealed = base64.b64decode(value[len(PREFIX):])
+        return self.aead.decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:], self._aad(field)).decode()
+
+
+class KeyRing:
+    """Per-user data keys, wrapped under the master key and cached in memory."""
+
+    def __init__(self, backend, master_key, cache_size):
+        self.backend = backend
+        self.master = AESGCM(master_key)
+        self.cache_size = cache_size
+        self._ciphers = OrderedDict()
+        # Backend calls may run on several executor threads
+        self._lock = threading.Lock()
+
+    def _unwrap(self, user_id, wrapped):
+        return self.master.decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], str(user_id).encode())
+
+    def _load(self, user_id):
+        wrapped = self.backend.get_data_key(user_id)
+        if wrapped is None:
+            nonce = os.urandom(NONCE_SIZE)
+            new_key = AESGCM.generate_key(bit_length=256)
+            # Another process may have created one meanwhile; whichever was stored first wins
+            wrapped = self.backend.put_data_key(
+                user_id, nonce + self.master.encrypt(nonce, new_key, str(user_id).encode())
+            )
+        return FieldCipher(user_id, self._unwrap(user_id, bytes(wrapped)))
+
+    def cipher(self, user_id):
+        with self._lock:
+            cipher = self._ciphers.get(user_id)
+            if cipher is not None:
+                self._ciphers.move_to_end(user_id)
+                return cipher
+        cipher = self._load(user_id)
+        with self._lock:
+            self._ciphers[user_id] = cipher
+            if len(self._ciphers) > self.cache_size:
+                self._ciphers.popitem(last=False)
+        return cipher
+
+
+class EncryptedBackend:
+    """Wraps a backend so user-written text is encrypted before it is stored.
+
+    Encryption and decryption happen inside the backend calls, which
+    ``storage.Storage`` already runs on the backend's executor, so a bulk
+    decrypt (e.g. /viewmoods) is one batched call off the event loop.
+    Methods without user text are passed straight through.
+    """
+
+    def __init__(self, backend, master_key, cache_size=10000):
+        self.backend = backend
+        self.executor = backend.executor
+        self.keys = KeyRing(backend, master_key, cache_size)
+        self.ledger_key = hmac.new(master_key, b"ledger", hashlib.sha256).digest()
+        self._stored_goal_names = {}
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _name(self, user_id, field, text):
+        return self.keys.cipher(user_id).encrypt(field, text, deterministic=True)
+
+    def dashboard(self, user_id, default_timezone, mood_limit):
+        board = self.backend.dashboard(user_id, default_timezone, mood_limit)
+        if board:
+            cipher = self.keys.cipher(user_id)
+            for entry in board["moods"]:
+                entry["mood"] = cipher.decrypt("mood", entry["mood"])
+            for habit in board["habits"]:
+                habit["habit"] = cipher.decrypt("habit", habit["habit"])
+            for goal in board["goals"]:
+                goal["goal"] = cipher.decrypt("goal", goal["goal"])
+        return board
+
+    # Moods
+
+    def add_mood(self, user_id, mood, timestamp, terms=None):
+        cipher = self.keys.cipher(user_id)
+        terms = search.terms(mood) if terms is None else terms
+        self.backend.add_mood(user_id, cipher.encrypt("mood", mood), timestamp, [cipher.blind("term", term) for term in terms])
+
+    def get_moods(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        moods = self.backend.get_moods(user_id)
+        for entry in moods:
+            entry["mood"] = cipher.decrypt("mood", entry["mood"])
+        return moods
+
+    # Mood search runs on blinded terms
+
+    def search_moods(self, user_id, terms, since, until, skip, limit):
+        cipher = self.keys.cipher(user_id)
+        result = self.backend.search_moods(user_id, [cipher.blind("term", term) for term in terms], since, until, skip, limit)
+        for entry in result["moods"]:
+            entry["mood"] = cipher.decrypt("mood", entry["mood"])
+        return result
+
+    def build_mood_index(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        postings = [
+            (cipher.blind("term", term), entry["timestamp"])
+            for entry in self.get_moods(user_id) for term in search.terms(entry["mood"])
+        ]
+        self.backend.add_mood_postings(user_id, postings)
+
+    # Habits
+
+    def add_habit(self, user_id, habit, reminder_time=None):
+        self.backend.add_habit(user_id, self._name(user_id, "habit", habit), reminder_time)
+
+    def get_habit_names(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        return [cipher.decrypt("habit", habit) for habit in self.backend.get_habit_names(user_id)]
+
+    def log_habit(self, user_id, habit, day):
+        status = self.backend.log_habit(user_id, self._name(user_id, "habit", habit), day)
+        if status == "missing":
+            # Habits stored before encryption was turned on
+            status = self.backend.log_habit(user_id, habit, day)
+        return status
+
+    def habit_page(self, user_id, skip, limit):
+        page = self.backend.habit_page(user_id, skip, limit)
+        if page:
+            cipher = self.keys.cipher(user_id)
+            for habit in page["habits"]:
+                habit["habit"] = cipher.decrypt("habit", habit["habit"])
+        return page
+
+    def get_habit_reminders(self):
+        return [
+            (user_id, self.keys.cipher(user_id).decrypt("habit", habit), reminder_time, recent_logs)
+            for user_id, habit, reminder_time, recent_logs in self.backend.get_habit_reminders()
+        ]
+
+    def get_habit_history(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        habits = self.backend.get_habit_history(user_id)
+        for habit in habits:
+            habit["habit"] = cipher.decrypt("habit", habit["habit"])
+        return habits
+
+    # Bulk import
+
+    def import_moods(self, user_id, entries):
+        cipher = self.keys.cipher(user_id)
+        sealed = [
+            (cipher.encrypt("mood", mood), timestamp,
+             [cipher.blind("term", term) for term in (search.terms(mood) if terms is None else terms)])
+            for mood, timestamp, terms in entries
+        ]
+        return self.backend.import_moods(user_id, sealed)
+
+    def import_habit_logs(self, user_id, logs):
+        cipher = self.keys.cipher(user_id)
+        # Log into habits as they are stored, so legacy plaintext names don't get an encrypted twin
+        stored = {}
+        for name in self.backend.get_habit_names(user_id):
+            stored.setdefault(cipher.decrypt("habit", name), name)
+        return self.backend.import_habit_logs(
+            user_id, [(stored.get(habit) or self._name(user_id, "habit", habit), day) for habit, day in logs]
+        )
+
+    # Goals
+
+    def add_goal(self, user_id, goal, deadline=None):
+        self.backend.add_goal(user_id, self._name(user_id, "goal", goal), deadline)
+
+    def get_open_goal_names(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        return [cipher.decrypt("goal", goal) for goal in self.backend.get_open_goal_names(user_id)]
+
+    def log_goal_progress(self, user_id, goal, day, points):
+        result = self.backend.log_goal_progress(user_id, self._name(user_id, "goal", goal), day, points)
+        if result[0] == "missing":
+            result = self.backend.log_goal_progress(user_id, goal, day, points)
+        return result
+
+    def goal_page(self, user_id, skip, limit):
+        page = self.backend.goal_page(user_id, skip, limit)
+        if page:
+            cipher = self.keys.cipher(user_id)
+            for goal in page["goals"]:
+                goal["goal"] = cipher.decrypt("goal", goal["goal"])
+        return page
+
+    def delete_goal(self, user_id, goal):
+        return self.backend.delete_goal(user_id, self._name(user_id, "goal", goal)) or self.backend.delete_goal(user_id, goal)
+
+    def get_goal_users(self):
+        users = self.backend.get_goal_users()
+        # Remember how each name was stored so updates match it as-is (legacy names stay plaintext)
+        self._stored_goal_names = {}
+        for user in users:
+            cipher = self.keys.cipher(user["_id"])
+            for goal in user["goals"]:
+                stored = goal["goal"]
+                goal["goal"] = cipher.decrypt("goal", stored)
+                self._stored_goal_names[(user["_id"], goal["goal"])] = stored
+        return users
+
+    def mark_goals_reminded(self, user_id, goals):
+        stored = self._stored_goal_names
+        self.backend.mark_goals_reminded(
+            user_id, [stored.get((user_id, goal)) or self._name(user_id, "goal", goal) for goal in goals]
+        )
+
+    # Reminder ledger keys can contain habit names; store an HMAC instead
+
+    def _ledger(self, key):
+        return hmac.new(self.ledger_key, key.encode(), hashlib.sha256).hexdigest()
+
+    def claim_reminder(self, key, user_id):
+        return self.backend.claim_reminder(self._ledger(key), user_id)
+
+    def release_reminder(self, key):
+        self.backend.release_reminder(self._ledger(key))
+
+    # Weekly digest
+
+    def weekly_summaries(self, user_ids, since_day, before_day):
+        summaries = self.backend.weekly_summaries(user_ids, since_day, before_day)
+        for summary in summaries:
+            cipher = self.keys.cipher(summary["_id"])
+            summary["moods"] = [cipher.decrypt("mood", mood) for mood in summary["moods"]]
+            for habit in summary["habits"]:
+                habit["habit"] = cipher.decrypt("habit", habit["habit"])
+        return summaries
+
+    # Cold storage keeps values as stored, so archived text is decrypted on the way out
+
+    def get_archive(self, user_id):
+        cipher = self.keys.cipher(user_id)
+        records = self.backend.get_archive(user_id)
+        for record in records:
+            record[record["kind"]] = cipher.decrypt(record["kind"], record[record["kind"]])
+        return records
+
+    # Insights hold habit names too
+
+    def _seal_insights(self, doc):
+        cipher = self.keys.cipher(doc["_id"])
+        sealed = dict(doc)
+        sealed["habits"] = [{**entry, "habit": cipher.encrypt("habit", entry["habit"], True)} for entry in doc["habits"]]
+        sealed["done"] = [cipher.encrypt("habit", habit, True) for habit in doc["done"]]
+        return sealed
+
+    def _open_insights(self, doc):
+        if doc is None:
+            return None
+        cipher = self.keys.cipher(doc["_id"])
+        for entry in doc["habits"]:
+            entry["habit"] = cipher.decrypt("habit", entry["habit"])
+        doc["done"] = [cipher.decrypt("habit", habit) for habit in doc["done"]]
+        return doc
+
+    def get_insights(self, user_id):
+        return self._open_insights(self.backend.get_insights(user_id))
+
+    def save_insights(self, doc):
+        self.backend.save_insights(self._seal_insights(doc))
+
+    def update_insights(self, user_id, mutate, default):
+        def sealed_mutate(doc):
+            self._open_insights(doc)
+            mutate(doc)
+            doc.update(self._seal_insights(doc))
+
+        self.backend.update_insights(user_id, sealed_mutate, default)
+
+    def forget_insight_habits(self, user_id):
+        self.backend.forget_insight_habits(user_id)
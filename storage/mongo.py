@@ -0,0 +1,586 @@
+from collections import Counter
+from datetime import datetime, timedelta
+import uuid
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import archive
+import queries
+import search
+from storage.base import Backend, WriteConflict
+
+# Ledger entries only need to outlive the catch-up window; keep a week for debugging
+LEDGER_TTL_SECONDS = 7 * 24 * 3600
+# Attempts at a version-checked write before giving up with WriteConflict
+WRITE_RETRIES = 10
+
+
+class MongoBackend(Backend):
+    """Storage in the AuraBotDB MongoDB database, one document per user per tracker."""
+
+    def __init__(self, mongo_url, database="AuraBotDB"):
+        if not mongo_url:
+            raise ValueError("MongoDB connection string is not set in .env")
+
+        try:
+            self.cluster = MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+            # Test connection
+            self.cluster.server_info()
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to MongoDB: {e}")
+
+        self.db = self.cluster[database]
+        self.profiles = self.db["user_profiles"]
+        self.moods = self.db["mood_logging"]
+        self.habits = self.db["habit_tracking"]
+        self.goals = self.db["goal_tracking"]
+        self.ledger = self.db["reminder_ledger"]
+        self.guild_config = self.db["guild_config"]
+        self.digest_runs = self.db["digest_runs"]
+        self.insights = self.db["mood_insights"]
+        self.data_keys = self.db["data_keys"]
+        self.archives = self.db["archives"]
+        self.mood_terms = self.db["mood_terms"]
+
+        self.ledger.create_index("sent_at", expireAfterSeconds=LEDGER_TTL_SECONDS)
+        self.archives.create_index([("user_id", 1), ("period", 1)])
+        # Searches read only this index: one range scan per term, newest first
+        self.mood_terms.create_index([("user_id", 1), ("term", 1), ("timestamp", -1)], unique=True)
+
+    def close(self):
+        self.cluster.close()
+
+    # Profiles
+
+    def get_profile(self, user_id):
+        return self.profiles.find_one({"_id": user_id})
+
+    def create_profile(self, user_id, username, timezone):
+        self.profiles.insert_one({"_id": user_id, "username": username, "timezone": timezone})
+
+    def set_timezone(self, user_id, timezone):
+        self.profiles.update_one({"_id": user_id}, {"$set": {"timezone": timezone}}, upsert=True)
+
+    def set_digest_opt_in(self, user_id, enabled):
+        result = self.profiles.update_one({"_id": user_id}, {"$set": {"digest_opt_in": enabled}})
+        return result.matched_count > 0
+
+    def get_timezones(self, user_ids):
+        profiles = self.profiles.find({"_id": {"$in": list(user_ids)}}, {"timezone": 1})
+        return {profile["_id"]: profile["timezone"] for profile in profiles if profile.get("timezone")}
+
+    def dashboard(self, user_id, default_timezone, mood_limit):
+        user_data = queries.first(self.profiles, queries.dashboard_pipeline(user_id, default_timezone, mood_limit))
+        if user_data is None:
+            return None
+        mood = user_data["mood"][0] if user_data["mood"] else {}
+        habit = user_data["habit"][0] if user_data["habit"] else {}
+        goal = user_data["goal"][0] if user_data["goal"] else {}
+        return {
+            "username": user_data.get("username"),
+            "timezone": user_data["timezone"],
+            "digest_opt_in": user_data["digest_opt_in"],
+            "day": user_data["day"],
+            "mood_reminder": mood.get("reminder_time"),
+            "moods": mood.get("moods", []),
+            "habits": habit.get("habits", []),
+            "points": goal.get("points", 0),
+            "goals": goal.get("goals", []),
+        }
+
+    # Moods
+
+    def add_mood(self, user_id, mood, timestamp, terms=None):
+        self.moods.update_one(
+            {"_id": user_id},
+            {"$push": {"moods": {"mood": mood, "timestamp": timestamp}}},
+            upsert=True
+        )
+        self._insert_postings(user_id, [(term, timestamp) for term in (search.terms(mood) if terms is None else terms)])
+
+    def get_moods(self, user_id):
+        user_data = self.moods.find_one({"_id": user_id}, {"moods": 1})
+        return user_data.get("moods", []) if user_data else []
+
+    def set_mood_reminder(self, user_id, reminder_time):
+        self.moods.update_one(
+            {"_id": user_id},
+            {"$set": {"reminder_time": reminder_time}, "$setOnInsert": {"moods": []}},
+            upsert=True
+        )
+
+    def get_mood_reminders(self):
+        users = self.moods.find({"reminder_time": {"$type": "string"}}, {"reminder_time": 1})
+        return [(user["_id"], user["reminder_time"]) for user in users]
+
+    # Mood search
+
+    def _insert_postings(self, user_id, postings):
+        if not postings:
+            return
+        try:
+            self.mood_terms.insert_many(
+                [{"user_id": user_id, "term": term, "timestamp": timestamp} for term, timestamp in postings],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Postings that already exist are fine; anything else isn't
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+
+    def search_moods(self, user_id, terms, since, until, skip, limit):
+        if not terms:
+            result = queries.first(self.moods, queries.mood_range_pipeline(user_id, since, until, skip, limit))
+            return result or {"total": 0, "moods": []}
+
+        span = {}
+        if since:
+            span["$gte"] = since
+        if until:
+            span["$lte"] = until
+        matches = None
+        for term in terms:
+            query = {"user_id": user_id, "term": term}
+            if span:
+                query["timestamp"] = span
+            found = {doc["timestamp"] for doc in self.mood_terms.find(query, {"_id": 0, "timestamp": 1})}
+            matches = found if matches is None else matches & found
+            if not matches:
+                return {"total": 0, "moods": []}
+
+        page = sorted(matches, reverse=True)[skip:skip + limit]
+        user_data = queries.first(self.moods, queries.moods_at_pipeline(user_id, page)) if page else None
+        moods = sorted((user_data or {}).get("moods", []), key=lambda entry: entry["timestamp"], reverse=True)
+        return {"total": len(matches), "moods": moods}
+
+    def mood_index_ready(self, user_id):
+        return self.moods.count_documents({"_id": user_id, "search_indexed": True}, limit=1) > 0
+
+    def add_mood_postings(self, user_id, postings):
+        self._insert_postings(user_id, postings)
+        self.moods.update_one({"_id": user_id}, {"$set": {"search_indexed": True}}, upsert=True)
+
+    # Habits
+
+    def add_habit(self, user_id, habit, reminder_time=None):
+        habit_data = {"habit": habit, "logs": []}
+        if reminder_time:
+            habit_data["reminder_time"] = reminder_time
+            habit_data["reminder_local"] = True  # In the profile's timezone (see localize_habit_reminders)
+        self.habits.update_one({"_id": user_id}, {"$addToSet": {"habits": habit_data}}, upsert=True)
+
+    def get_habit_names(self, user_id):
+        user_data = self.habits.find_one({"_id": user_id}, {"habits.habit": 1})
+        return [habit["habit"] for habit in user_data.get("habits", [])] if user_data else []
+
+    def log_habit(self, user_id, habit, day):
+        # One conditional update: the filter only matches while the day isn't logged yet
+        result = self.habits.update_one(
+            {"_id": user_id, "habits": {"$elemMatch": {"habit": habit, "logs": {"$ne": day}}}},
+            {"$push": {"habits.$.logs": day}}
+        )
+        if result.modified_count:
+            return "logged"
+        return "already" if self.habits.count_documents({"_id": user_id, "habits.habit": habit}, limit=1) else "missing"
+
+    def habit_page(self, user_id, skip, limit):
+        user_data = queries.first(self.habits, queries.habit_page_pipeline(user_id, skip, limit))
+        return user_data if user_data and user_data["total"] else None
+
+    def habit_summary(self, user_id, day):
+        return queries.first(self.habits, queries.habit_summary_pipeline(user_id, day)) or {"total": 0, "logged": 0}
+
+    def clear_habits(self, user_id):
+        result = self.habits.update_one({"_id": user_id}, {"$set": {"habits": []}})
+        return result.matched_count > 0
+
+    def get_habit_reminders(self):
+        # Today and yesterday in any timezone fall on or after two UTC days ago
+        since = (datetime.utcnow() - timedelta(days=2)).strftime("%Y-%m-%d")
+        users = self.habits.aggregate([
+            {"$match": {"habits.reminder_time": {"$exists": True}}},
+            {"$project": {"habits": {"$map": {
+                "input": "$habits",
+                "as": "h",
+                "in": {
+                    "habit": "$$h.habit",
+                    "reminder_time": "$$h.reminder_time",
+                    # Filtered by day rather than position, so logs that are out of order still count
+                    "recent": {"$filter": {
+                        "input": {"$ifNull": ["$$h.logs", []]}, "as": "d", "cond": {"$gte": ["$$d", since]},
+                    }},
+                },
+            }}}},
+        ])
+        return [
+            (user["_id"], habit["habit"], habit["reminder_time"], habit["recent"])
+            for user in users for habit in user["habits"] if habit.get("reminder_time")
+        ]
+
+    def get_habit_history(self, user_id):
+        user_data = self.habits.find_one({"_id": user_id}, {"habits.habit": 1, "habits.logs": 1})
+        return user_data.get("habits", []) if user_data else []
+
+    def localize_habit_reminders(self, convert):
+        legacy = {"reminder_time": {"$exists": True}, "reminder_local": {"$exists": False}}
+        users = list(self.habits.find(
+            {"habits": {"$elemMatch": legacy}}, {"habits.habit": 1, "habits.reminder_time": 1, "habits.reminder_local": 1}
+        ))
+        timezones = self.get_timezones([user["_id"] for user in users])
+        converted = 0
+        for user in users:
+            timezone = timezones.get(user["_id"], "UTC")
+            for habit in user["habits"]:
+                if "reminder_time" not in habit or "reminder_local" in habit:
+                    continue
+                # Matches only while this reminder is still unconverted, so a second run can't shift it again
+                result = self.habits.update_one(
+                    {"_id": user["_id"], "habits": {"$elemMatch": {**legacy, "habit": habit["habit"], "reminder_time": habit["reminder_time"]}}},
+                    {"$set": {
+                        "habits.$.reminder_time": convert(habit["reminder_time"], timezone),
+                        "habits.$.reminder_local": True,
+                    }}
+                )
+                converted += result.modified_count
+        return converted
+
+    # Goals
+
+    def add_goal(self, user_id, goal, deadline=None):
+        goal_data = {"goal": goal, "progress": [], "completed": False}
+        if deadline:
+            goal_data["deadline"] = deadline
+            goal_data["reminded"] = False  # Track if the reminder was sent
+        self.goals.update_one({"_id": user_id}, {"$addToSet": {"goals": goal_data}}, upsert=True)
+
+    def get_open_goal_names(self, user_id):
+        user_data = self.goals.find_one({"_id": user_id}, {"goals.goal": 1, "goals.completed": 1})
+        goals = user_data.get("goals", []) if user_data else []
+        return [goal["goal"] for goal in goals if not goal.get("completed", False)]
+
+    def log_goal_progress(self, user_id, goal, day, points):
+        # Progress and points change in the same atomic update, only if the day isn't logged yet
+        user_data = self.goals.find_one_and_update(
+            {"_id": user_id, "goals": {"$elemMatch": {"goal": goal, "progress": {"$ne": day}}}},
+            {"$push": {"goals.$.progress": day}, "$set": {"goals.$.last_update": day}, "$inc": {"points": points}},
+            projection={"points": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user_data:
+            return "logged", user_data["points"]
+        if self.goals.count_documents({"_id": user_id, "goals.goal": goal}, limit=1):
+            return "already", None
+        return "missing", None
+
+    def goal_page(self, user_id, skip, limit):
+        user_data = queries.first(self.goals, queries.goal_page_pipeline(user_id, skip, limit))
+        return user_data if user_data and user_data["total"] else None
+
+    def goal_summary(self, user_id):
+        return queries.first(self.goals, queries.goal_summary_pipeline(user_id))
+
+    def get_points(self, user_id):
+        user_data = queries.first(self.goals, queries.points_pipeline(user_id))
+        return user_data["points"] if user_data else 0
+
+    def delete_goal(self, user_id, goal):
+        result = self.goals.update_one({"_id": user_id, "goals.goal": goal}, {"$pull": {"goals": {"goal": goal}}})
+        return result.matched_count > 0
+
+    def clear_completed_goals(self, user_id):
+        result = self.goals.update_one({"_id": user_id}, {"$pull": {"goals": {"completed": True}}})
+        return result.modified_count
+
+    def get_goal_users(self):
+        return list(self.goals.find({"goals.0": {"$exists": True}}, {"goals": 1, "points": 1}))
+
+    def mark_goals_reminded(self, user_id, goals):
+        self.goals.update_one(
+            {"_id": user_id},
+            {"$set": {"goals.$[g].reminded": True}},
+            array_filters=[{"g.goal": {"$in": list(goals)}}]
+        )
+
+    def deduct_points(self, user_id, amount):
+        # An update pipeline reads and writes points in one step, so progress logged meanwhile isn't lost
+        user_data = self.goals.find_one_and_update(
+            {"_id": user_id},
+            [{"$set": {"points": {"$max": [0, {"$subtract": [{"$ifNull": ["$points", 0]}, amount]}]}}}],
+            projection={"points": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return user_data["points"] if user_data else 0
+
+    # Encryption keys
+
+    def get_data_key(self, user_id):
+        doc = self.data_keys.find_one({"_id": user_id})
+        return doc["key"] if doc else None
+
+    def put_data_key(self, user_id, wrapped):
+        doc = self.data_keys.find_one_and_update(
+            {"_id": user_id}, {"$setOnInsert": {"key": wrapped}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["key"]
+
+    # Reminder ledger
+
+    def claim_reminder(self, key, user_id):
+        try:
+            self.ledger.insert_one({"_id": key, "user_id": user_id, "sent_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def release_reminder(self, key):
+        self.ledger.delete_one({"_id": key})
+
+    # Guild settings
+
+    def get_guild_configs(self, guild_ids):
+        docs = self.guild_config.find({"_id": {"$in": list(guild_ids)}})
+        return {doc.pop("_id"): doc for doc in docs}
+
+    def init_guild_config(self, guild_id, defaults):
+        self.guild_config.update_one({"_id": guild_id}, {"$setOnInsert": defaults}, upsert=True)
+
+    def update_guild_config(self, guild_id, changes):
+        self.guild_config.update_one({"_id": guild_id}, {"$set": changes}, upsert=True)
+
+    # Weekly digest
+
+    def start_digest_run(self, week_key, started_at):
+        return self.digest_runs.find_one_and_update(
+            {"_id": week_key},
+            {"$setOnInsert": {"cursor": None, "done": False, "sent": 0, "started_at": started_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def digest_run_done(self, week_key):
+        run = self.digest_runs.find_one({"_id": week_key}, {"done": 1})
+        return bool(run and run.get("done"))
+
+    def advance_digest_run(self, week_key, cursor, sent, cost):
+        increments = {f"cost.{key}": value for key, value in cost.items()}
+        self.digest_runs.update_one({"_id": week_key}, {"$set": {"cursor": cursor}, "$inc": {"sent": sent, **increments}})
+
+    def finish_digest_run(self, week_key, finished_at, cost):
+        increments = {f"cost.{key}": value for key, value in cost.items()}
+        return self.digest_runs.find_one_and_update(
+            {"_id": week_key},
+            {"$set": {"done": True, "finished_at": finished_at}, "$inc": increments},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _opted_in(self, after):
+        query = {"digest_opt_in": True}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        return query
+
+    def count_digest_users(self, after):
+        return self.profiles.count_documents(self._opted_in(after))
+
+    def digest_cohort(self, after, limit):
+        return [doc["_id"] for doc in self.profiles.find(self._opted_in(after), {"_id": 1}).sort("_id", 1).limit(limit)]
+
+    def weekly_summaries(self, user_ids, since_day, before_day):
+        # One aggregation joins every tracker for the whole cohort
+        return [
+            {
+                "_id": summary["_id"],
+                "moods": summary["mood"][0]["moods"] if summary["mood"] else [],
+                "habits": summary["habit"][0]["habits"] if summary["habit"] else [],
+                "goals": summary["goal"][0] if summary["goal"] else None,
+            }
+            for summary in self.profiles.aggregate(queries.weekly_digest_pipeline(user_ids, since_day, before_day))
+        ]
+
+    # Bulk import
+
+    def _archived_keys(self, user_id, days):
+        """``archive.archived_keys`` for the archive periods the given days fall in."""
+        docs = self.archives.find({"user_id": user_id, "period": {"$in": sorted({day[:7] for day in days})}}, {"data": 1})
+        return archive.archived_keys([record for doc in docs for record in archive.unpack(doc["data"])])
+
+    def import_moods(self, user_id, entries):
+        timestamps = {timestamp for _, timestamp, _ in entries}
+        taken = queries.first(self.moods, queries.moods_at_pipeline(user_id, timestamps))
+        seen = {entry["timestamp"] for entry in (taken or {}).get("moods", [])}
+        # Moods already moved to cold storage aren't new either
+        seen |= self._archived_keys(user_id, timestamps)[0]
+        fresh = []
+        for mood, timestamp, terms in entries:
+            if timestamp not in seen:
+                seen.add(timestamp)
+                fresh.append((mood, timestamp, search.terms(mood) if terms is None else terms))
+        if not fresh:
+            return 0
+        # $sort keeps the array oldest first, since imported history is usually older than what's there
+        self.moods.update_one(
+            {"_id": user_id},
+            {"$push": {"moods": {
+                "$each": [{"mood": mood, "timestamp": timestamp} for mood, timestamp, _ in fresh],
+                "$sort": {"timestamp": 1},
+            }}},
+            upsert=True
+        )
+        self._insert_postings(user_id, [(term, timestamp) for _, timestamp, terms in fresh for term in terms])
+        return len(fresh)
+
+    def import_habit_logs(self, user_id, logs):
+        archived = self._archived_keys(user_id, [day for _, day in logs])[1]
+        days = {}
+        for habit, day in logs:
+            if (habit, day) in archived:
+                continue
+            days.setdefault(habit, set()).add(day)
+        return sum(self._import_habit_days(user_id, habit, habit_days) for habit, habit_days in days.items())
+
+    def _import_habit_days(self, user_id, habit, days):
+        for _ in range(WRITE_RETRIES):
+            # Logging goes to the first habit with a name, as in log_habit
+            user_data = self.habits.find_one({"_id": user_id}, {"habits": {"$elemMatch": {"habit": habit}}})
+            if not (user_data or {}).get("habits"):
+                try:
+                    result = self.habits.update_one(
+                        {"_id": user_id, "habits.habit": {"$ne": habit}},
+                        {"$push": {"habits": {"habit": habit, "logs": sorted(days)}}},
+                        upsert=True
+                    )
+                except DuplicateKeyError:
+                    # The habit was added meanwhile, so the upsert's filter missed the existing document
+                    continue
+                if result.modified_count or result.upserted_id is not None:
+                    return len(days)
+                continue
+
+            fresh = sorted(days - set(user_data["habits"][0].get("logs", [])))
+            if not fresh:
+                return 0
+            # $sort keeps logs in day order (reminders and pages read the latest ones), and the
+            # filter misses if any of these days was logged meanwhile, so none is pushed twice
+            result = self.habits.update_one(
+                {"_id": user_id, "habits": {"$elemMatch": {"habit": habit, "logs": {"$nin": fresh}}}},
+                {"$push": {"habits.$.logs": {"$each": fresh, "$sort": 1}}}
+            )
+            if result.modified_count:
+                return len(fresh)
+        raise WriteConflict(f"habit {habit!r} of user {user_id} kept changing after {WRITE_RETRIES} attempts")
+
+    # Cold storage
+
+    def compaction_candidates(self, before_day, after, limit):
+        user_ids = set()
+        for collection, query in (
+            (self.moods, {"moods.timestamp": {"$lt": before_day}}),
+            (self.habits, {"habits.logs": {"$lt": before_day}}),
+            (self.goals, {"goals.progress": {"$lt": before_day}}),
+        ):
+            if after is not None:
+                query["_id"] = {"$gt": after}
+            user_ids.update(doc["_id"] for doc in collection.find(query, {"_id": 1}).sort("_id", 1).limit(limit))
+        return sorted(user_ids)[:limit]
+
+    def _archive(self, user_id, records):
+        """Merge records into the user's per-period blobs. Returns the bytes written."""
+        written = 0
+        for period, period_records in archive.by_period(records).items():
+            key = f"{user_id}:{period}"
+            existing = self.archives.find_one({"_id": key}, {"data": 1})
+            blob = archive.pack(period_records, existing["data"] if existing else None)
+            self.archives.replace_one(
+                {"_id": key}, {"_id": key, "user_id": user_id, "period": period, "data": blob}, upsert=True
+            )
+            written += len(blob)
+        return written
+
+    def _compact_nested(self, collection, user_id, before_day, items, days_field, kind):
+        """Archive old days of each habit/goal and keep their count on the item as ``archived_days``."""
+        user_data = collection.find_one({"_id": user_id}, {f"{items}.{kind}": 1, f"{items}.{days_field}": 1})
+        records, pulls, increments, guard = [], {}, {}, {"_id": user_id}
+        for index, item in enumerate((user_data or {}).get(items, [])):
+            days = [day for day in item.get(days_field, []) if day < before_day]
+            if days:
+                records += [{"kind": kind, kind: item[kind], "day": day} for day in days]
+                pulls[f"{items}.{index}.{days_field}"] = days
+                increments[f"{items}.{index}.archived_days"] = len(days)
+                # Only apply the positional update if the array wasn't reordered meanwhile
+                guard[f"{items}.{index}.{kind}"] = item[kind]
+        if not records:
+            return 0, 0
+        # Archive first: if we stop before the $pull, the next run re-archives (deduplicated) and pulls
+        written = self._archive(user_id, records)
+        result = collection.update_one(guard, {"$pullAll": pulls, "$inc": increments})
+        return (len(records) if result.modified_count else 0), written
+
+    def compact_user(self, user_id, before_day):
+        stats = {"moods": 0, "habit_logs": 0, "goal_days": 0, "bytes": 0}
+
+        mood_data = self.moods.find_one({"_id": user_id}, {"moods": 1})
+        old_moods = [entry for entry in (mood_data or {}).get("moods", []) if entry["timestamp"] < before_day]
+        if old_moods:
+            records = [{"kind": "mood", "mood": entry["mood"], "timestamp": entry["timestamp"]} for entry in old_moods]
+            stats["bytes"] += self._archive(user_id, records)
+            # The hot document keeps how many moods each archived month held
+            counts = Counter(archive.period_of(record) for record in records)
+            # Only while every one of them is still there, so an overlapping or retried run doesn't count them twice
+            result = self.moods.update_one(
+                {"_id": user_id, "moods": {"$all": old_moods}},
+                {"$pull": {"moods": {"$in": old_moods}},
+                 "$inc": {f"archived_moods.{period}": count for period, count in counts.items()}}
+            )
+            self.mood_terms.delete_many({"user_id": user_id, "timestamp": {"$lt": before_day}})
+            stats["moods"] = len(old_moods) if result.modified_count else 0
+
+        stats["habit_logs"], written = self._compact_nested(self.habits, user_id, before_day, "habits", "logs", "habit")
+        stats["bytes"] += written
+        stats["goal_days"], written = self._compact_nested(self.goals, user_id, before_day, "goals", "progress", "goal")
+        stats["bytes"] += written
+        return stats
+
+    def get_archive(self, user_id):
+        records = []
+        for doc in self.archives.find({"user_id": user_id}, {"data": 1}).sort("period", 1):
+            records += archive.unpack(doc["data"])
+        return records
+
+    def archived_mood_count(self, user_id):
+        user_data = self.moods.find_one({"_id": user_id}, {"archived_moods": 1})
+        return sum((user_data or {}).get("archived_moods", {}).values())
+
+    # Insights
+
+    def get_insights(self, user_id):
+        return self.insights.find_one({"_id": user_id})
+
+    # Every write stores a new random version, which update_insights compares before replacing
+
+    def save_insights(self, doc):
+        self.insights.replace_one({"_id": doc["_id"]}, {**doc, "version": uuid.uuid4().hex}, upsert=True)
+
+    def update_insights(self, user_id, mutate, default):
+        for _ in range(WRITE_RETRIES):
+            doc = self.get_insights(user_id)
+            if doc is None:
+                doc = default(user_id)
+                mutate(doc)
+                try:
+                    self.insights.insert_one({**doc, "version": uuid.uuid4().hex})
+                    return
+                except DuplicateKeyError:
+                    continue
+            version = doc.get("version")
+            mutate(doc)
+            # {"version": None} also matches documents written before versions existed
+            result = self.insights.replace_one(
+                {"_id": user_id, "version": version}, {**doc, "version": uuid.uuid4().hex}
+            )
+            if result.matched_count:
+                return
+        raise WriteConflict(f"insights for user {user_id} kept changing after {WRITE_RETRIES} attempts")
+
+    def forget_insight_habits(self, user_id):
+        self.insights.update_one(
+            {"_id": user_id}, {"$set": {"habits": [], "done": [], "version": uuid.uuid4().hex}}
+        )
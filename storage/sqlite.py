@@ -0,0 +1,852 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import sqlite3
+import time
+import pytz
+import archive
+import search
+from storage.base import Backend
+
+# Ledger entries only need to outlive the catch-up window; keep a week for debugging
+LEDGER_TTL_SECONDS = 7 * 24 * 3600
+# How often expired ledger rows are purged (seconds)
+LEDGER_PURGE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    timezone TEXT,
+    digest_opt_in INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_profiles_digest ON user_profiles (digest_opt_in, user_id);
+
+CREATE TABLE IF NOT EXISTS moods (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    mood TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_moods_user_time ON moods (user_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS mood_terms (
+    user_id INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (user_id, term, timestamp)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS mood_index_ready (
+    user_id INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS mood_reminders (
+    user_id INTEGER PRIMARY KEY,
+    reminder_time TEXT
+);
+
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    reminder_time TEXT,
+    archived_days INTEGER NOT NULL DEFAULT 0,
+    reminder_local INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_habits_user ON habits (user_id, id);
+
+CREATE TABLE IF NOT EXISTS habit_logs (
+    habit_id INTEGER NOT NULL REFERENCES habits (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (habit_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_habit_logs_user_day ON habit_logs (user_id, day);
+
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    deadline TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    reminded INTEGER NOT NULL DEFAULT 0,
+    last_update TEXT,
+    archived_days INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user_id, id);
+
+CREATE TABLE IF NOT EXISTS goal_progress (
+    goal_id INTEGER NOT NULL REFERENCES goals (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (goal_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_goal_progress_user_day ON goal_progress (user_id, day);
+
+CREATE TABLE IF NOT EXISTS goal_points (
+    user_id INTEGER PRIMARY KEY,
+    points INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS reminder_ledger (
+    key TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_sent_at ON reminder_ledger (sent_at);
+
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS digest_runs (
+    week_key TEXT PRIMARY KEY,
+    cursor INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    finished_at TEXT,
+    cost TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS data_keys (
+    user_id INTEGER PRIMARY KEY,
+    key BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS archives (
+    user_id INTEGER NOT NULL,
+    period TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (user_id, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS mood_archive_counts (
+    user_id INTEGER NOT NULL,
+    period TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS mood_insights (
+    user_id INTEGER PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+"""
+
+# Columns added after a table was first released: (table, column, definition)
+MIGRATIONS = [
+    ("habits", "archived_days", "INTEGER NOT NULL DEFAULT 0"),
+    ("goals", "archived_days", "INTEGER NOT NULL DEFAULT 0"),
+    # 0 for reminder times stored in UTC (see localize_habit_reminders)
+    ("habits", "reminder_local", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def _placeholders(values):
+    return ",".join("?" * len(values))
+
+
+class SQLiteBackend(Backend):
+    """Embedded storage for single-node deployments.
+
+    One connection lives on a dedicated thread (``executor``), so every call
+    is serialized without locks and never blocks the event loop. The
+    connection runs in WAL mode, and sqlite3's statement cache reuses the
+    prepared form of the constant SQL strings below.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aurabot-sqlite")
+        self.executor.submit(self._connect).result()
+        self._last_purge = 0.0
+
+    def _connect(self):
+        # Only the executor thread uses the connection after this point
+        self.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        for table, column, definition in MIGRATIONS:
+            columns = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def close(self):
+        self.executor.submit(self.conn.close).result()
+        self.executor.shutdown()
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _one(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()
+
+    def _all(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchall()
+
+    # Profiles
+
+    def get_profile(self, user_id):
+        row = self._one("SELECT * FROM user_profiles WHERE user_id = ?", (user_id,))
+        if row is None:
+            return None
+        profile = {"_id": row["user_id"], "username": row["username"], "digest_opt_in": bool(row["digest_opt_in"])}
+        if row["timezone"]:
+            profile["timezone"] = row["timezone"]
+        return profile
+
+    def create_profile(self, user_id, username, timezone):
+        self.conn.execute(
+            "INSERT INTO user_profiles (user_id, username, timezone) VALUES (?, ?, ?)",
+            (user_id, username, timezone)
+        )
+
+    def set_timezone(self, user_id, timezone):
+        self.conn.execute(
+            "INSERT INTO user_profiles (user_id, timezone) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET timezone = excluded.timezone",
+            (user_id, timezone)
+        )
+
+    def set_digest_opt_in(self, user_id, enabled):
+        cursor = self.conn.execute(
+            "UPDATE user_profiles SET digest_opt_in = ? WHERE user_id = ?", (int(enabled), user_id)
+        )
+        return cursor.rowcount > 0
+
+    def get_timezones(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        rows = self._all(
+            f"SELECT user_id, timezone FROM user_profiles WHERE user_id IN ({_placeholders(user_ids)})", user_ids
+        )
+        return {row["user_id"]: row["timezone"] for row in rows if row["timezone"]}
+
+    def dashboard(self, user_id, default_timezone, mood_limit):
+        profile = self.get_profile(user_id)
+        if profile is None:
+            return None
+        timezone = profile.get("timezone") or default_timezone
+        day = datetime.now(pytz.timezone(timezone)).strftime("%Y-%m-%d")
+
+        moods = self._all(
+            "SELECT mood, timestamp FROM moods WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (user_id, mood_limit)
+        )
+        reminder = self._one("SELECT reminder_time FROM mood_reminders WHERE user_id = ?", (user_id,))
+        habits = self._all(
+            "SELECT h.name, h.reminder_time, "
+            "EXISTS (SELECT 1 FROM habit_logs l WHERE l.habit_id = h.id AND l.day = ?) AS done "
+            "FROM habits h WHERE h.user_id = ? ORDER BY h.id",
+            (day, user_id)
+        )
+        goals = self._all(
+            "SELECT g.name, g.deadline, "
+            "g.archived_days + (SELECT COUNT(*) FROM goal_progress p WHERE p.goal_id = g.id) AS progress_days "
+            "FROM goals g WHERE g.user_id = ? AND g.completed = 0 ORDER BY g.id",
+            (user_id,)
+        )
+        points = self._one("SELECT points FROM goal_points WHERE user_id = ?", (user_id,))
+        return {
+            "username": profile.get("username"),
+            "timezone": timezone,
+            "digest_opt_in": profile["digest_opt_in"],
+            "day": day,
+            "mood_reminder": reminder["reminder_time"] if reminder else None,
+            "moods": [{"mood": row["mood"], "timestamp": row["timestamp"]} for row in reversed(moods)],
+            "habits": [
+                {"habit": row["name"], "done": bool(row["done"]), **({"reminder_time": row["reminder_time"]} if row["reminder_time"] else {})}
+                for row in habits
+            ],
+            "points": points["points"] if points else 0,
+            "goals": [
+                {"goal": row["name"], "progress_days": row["progress_days"], **({"deadline": row["deadline"]} if row["deadline"] else {})}
+                for row in goals
+            ],
+        }
+
+    # Moods
+
+    def add_mood(self, user_id, mood, timestamp, terms=None):
+        terms = search.terms(mood) if terms is None else terms
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO moods (user_id, mood, timestamp) VALUES (?, ?, ?)", (user_id, mood, timestamp))
+            conn.executemany(
+                "INSERT OR IGNORE INTO mood_terms (user_id, term, timestamp) VALUES (?, ?, ?)",
+                [(user_id, term, timestamp) for term in terms]
+            )
+
+    def get_moods(self, user_id):
+        rows = self._all("SELECT mood, timestamp FROM moods WHERE user_id = ? ORDER BY timestamp, id", (user_id,))
+        return [{"mood": row["mood"], "timestamp": row["timestamp"]} for row in rows]
+
+    def set_mood_reminder(self, user_id, reminder_time):
+        self.conn.execute(
+            "INSERT INTO mood_reminders (user_id, reminder_time) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET reminder_time = excluded.reminder_time",
+            (user_id, reminder_time)
+        )
+
+    def get_mood_reminders(self):
+        rows = self._all("SELECT user_id, reminder_time FROM mood_reminders WHERE reminder_time IS NOT NULL")
+        return [(row["user_id"], row["reminder_time"]) for row in rows]
+
+    # Mood search
+
+    def search_moods(self, user_id, terms, since, until, skip, limit):
+        # "~" sorts after every digit, so it stands in for an open upper bound
+        span = (since or "", until or "~")
+        if terms:
+            matching = " INTERSECT ".join(
+                ["SELECT timestamp FROM mood_terms WHERE user_id = ? AND term = ? AND timestamp BETWEEN ? AND ?"]
+                * len(terms)
+            )
+            params = [value for term in terms for value in (user_id, term, *span)]
+            total = self._one(f"SELECT COUNT(*) FROM ({matching})", params)[0]
+            page = [
+                row[0] for row in self._all(f"{matching} ORDER BY timestamp DESC LIMIT ? OFFSET ?", (*params, limit, skip))
+            ]
+            rows = self._all(
+                f"SELECT mood, timestamp FROM moods WHERE user_id = ? AND timestamp IN ({_placeholders(page)}) "
+                "ORDER BY timestamp DESC, id DESC",
+                (user_id, *page)
+            ) if page else []
+        else:
+            total = self._one("SELECT COUNT(*) FROM moods WHERE user_id = ? AND timestamp BETWEEN ? AND ?", (user_id, *span))[0]
+            rows = self._all(
+                "SELECT mood, timestamp FROM moods WHERE user_id = ? AND timestamp BETWEEN ? AND ? "
+                "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                (user_id, *span, limit, skip)
+            )
+        return {"total": total, "moods": [{"mood": row["mood"], "timestamp": row["timestamp"]} for row in rows]}
+
+    def mood_index_ready(self, user_id):
+        return self._one("SELECT 1 FROM mood_index_ready WHERE user_id = ?", (user_id,)) is not None
+
+    def add_mood_postings(self, user_id, postings):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO mood_terms (user_id, term, timestamp) VALUES (?, ?, ?)",
+                [(user_id, term, timestamp) for term, timestamp in postings]
+            )
+            conn.execute("INSERT OR IGNORE INTO mood_index_ready (user_id) VALUES (?)", (user_id,))
+
+    # Habits
+
+    def add_habit(self, user_id, habit, reminder_time=None):
+        with self._transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM habits WHERE user_id = ? AND name = ? AND reminder_time IS ?",
+                (user_id, habit, reminder_time)
+            ).fetchone()
+            if not exists:
+                conn.execute(
+                    "INSERT INTO habits (user_id, name, reminder_time, reminder_local) VALUES (?, ?, ?, 1)",
+                    (user_id, habit, reminder_time)
+                )
+
+    def get_habit_names(self, user_id):
+        return [row["name"] for row in self._all("SELECT name FROM habits WHERE user_id = ? ORDER BY id", (user_id,))]
+
+    def log_habit(self, user_id, habit, day):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM habits WHERE user_id = ? AND name = ? ORDER BY id LIMIT 1", (user_id, habit)
+            ).fetchone()
+            if row is None:
+                return "missing"
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO habit_logs (habit_id, user_id, day) VALUES (?, ?, ?)", (row["id"], user_id, day)
+            )
+            return "logged" if cursor.rowcount else "already"
+
+    def habit_page(self, user_id, skip, limit):
+        total = self._one("SELECT COUNT(*) FROM habits WHERE user_id = ?", (user_id,))[0]
+        if not total:
+            return None
+        rows = self._all(
+            "SELECT h.name, h.reminder_time, "
+            "h.archived_days + (SELECT COUNT(*) FROM habit_logs l WHERE l.habit_id = h.id) AS days_logged "
+            "FROM habits h WHERE h.user_id = ? ORDER BY h.id LIMIT ? OFFSET ?",
+            (user_id, limit, skip)
+        )
+        habits = []
+        for row in rows:
+            habit = {"habit": row["name"], "days_logged": row["days_logged"]}
+            if row["reminder_time"]:
+                habit["reminder_time"] = row["reminder_time"]
+            habits.append(habit)
+        return {"total": total, "habits": habits}
+
+    def habit_summary(self, user_id, day):
+        row = self._one(
+            "SELECT (SELECT COUNT(*) FROM habits WHERE user_id = ?) AS total, "
+            "(SELECT COUNT(*) FROM habit_logs WHERE user_id = ? AND day = ?) AS logged",
+            (user_id, user_id, day)
+        )
+        return {"total": row["total"], "logged": row["logged"]}
+
+    def clear_habits(self, user_id):
+        cursor = self.conn.execute("DELETE FROM habits WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+
+    def get_habit_reminders(self):
+        rows = self._all(
+            "SELECT h.id, h.user_id, h.name, h.reminder_time, "
+            "(SELECT group_concat(day) FROM "
+            "(SELECT day FROM habit_logs l WHERE l.habit_id = h.id ORDER BY day DESC LIMIT 2)) AS recent "
+            "FROM habits h WHERE h.reminder_time IS NOT NULL"
+        )
+        return [
+            (row["user_id"], row["name"], row["reminder_time"], row["recent"].split(",") if row["recent"] else [])
+            for row in rows
+        ]
+
+    def get_habit_history(self, user_id):
+        habits = {}
+        rows = self._all(
+            "SELECT h.id, h.name, l.day FROM habits h LEFT JOIN habit_logs l ON l.habit_id = h.id "
+            "WHERE h.user_id = ? ORDER BY h.id, l.day",
+            (user_id,)
+        )
+        for row in rows:
+            habit = habits.setdefault(row["id"], {"habit": row["name"], "logs": []})
+            if row["day"]:
+                habit["logs"].append(row["day"])
+        return list(habits.values())
+
+    def localize_habit_reminders(self, convert):
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT h.id, h.reminder_time, p.timezone FROM habits h "
+                "LEFT JOIN user_profiles p ON p.user_id = h.user_id "
+                "WHERE h.reminder_time IS NOT NULL AND h.reminder_local = 0"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE habits SET reminder_time = ?, reminder_local = 1 WHERE id = ?",
+                [(convert(row["reminder_time"], row["timezone"] or "UTC"), row["id"]) for row in rows]
+            )
+        return len(rows)
+
+    # Goals
+
+    def add_goal(self, user_id, goal, deadline=None):
+        with self._transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM goals WHERE user_id = ? AND name = ? AND deadline IS ? AND completed = 0 "
+                "AND NOT EXISTS (SELECT 1 FROM goal_progress p WHERE p.goal_id = goals.id)",
+                (user_id, goal, deadline)
+            ).fetchone()
+            if not exists:
+                conn.execute("INSERT INTO goals (user_id, name, deadline) VALUES (?, ?, ?)", (user_id, goal, deadline))
+
+    def get_open_goal_names(self, user_id):
+        rows = self._all("SELECT name FROM goals WHERE user_id = ? AND completed = 0 ORDER BY id", (user_id,))
+        return [row["name"] for row in rows]
+
+    def log_goal_progress(self, user_id, goal, day, points):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM goals WHERE user_id = ? AND name = ? ORDER BY id LIMIT 1", (user_id, goal)
+            ).fetchone()
+            if row is None:
+                return "missing", None
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO goal_progress (goal_id, user_id, day) VALUES (?, ?, ?)", (row["id"], user_id, day)
+            )
+            if not cursor.rowcount:
+                return "already", None
+            conn.execute("UPDATE goals SET last_update = ? WHERE id = ?", (day, row["id"]))
+            conn.execute(
+                "INSERT INTO goal_points (user_id, points) VALUES (?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET points = points + excluded.points",
+                (user_id, points)
+            )
+            total = conn.execute("SELECT points FROM goal_points WHERE user_id = ?", (user_id,)).fetchone()[0]
+            return "logged", total
+
+    def goal_page(self, user_id, skip, limit):
+        total = self._one("SELECT COUNT(*) FROM goals WHERE user_id = ?", (user_id,))[0]
+        if not total:
+            return None
+        rows = self._all(
+            "SELECT g.name, g.deadline, g.completed, "
+            "g.archived_days + (SELECT COUNT(*) FROM goal_progress p WHERE p.goal_id = g.id) AS progress_days "
+            "FROM goals g WHERE g.user_id = ? ORDER BY g.id LIMIT ? OFFSET ?",
+            (user_id, limit, skip)
+        )
+        goals = []
+        for row in rows:
+            goal = {"goal": row["name"], "completed": bool(row["completed"]), "progress_days": row["progress_days"]}
+            if row["deadline"]:
+                goal["deadline"] = row["deadline"]
+            goals.append(goal)
+        return {"total": total, "points": self.get_points(user_id), "goals": goals}
+
+    def goal_summary(self, user_id):
+        row = self._one(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(completed), 0) AS completed FROM goals WHERE user_id = ?",
+            (user_id,)
+        )
+        points = self._one("SELECT points FROM goal_points WHERE user_id = ?", (user_id,))
+        if not row["total"] and points is None:
+            return None
+        return {"total": row["total"], "completed": row["completed"], "points": points[0] if points else 0}
+
+    def get_points(self, user_id):
+        row = self._one("SELECT points FROM goal_points WHERE user_id = ?", (user_id,))
+        return row[0] if row else 0
+
+    def delete_goal(self, user_id, goal):
+        cursor = self.conn.execute("DELETE FROM goals WHERE user_id = ? AND name = ?", (user_id, goal))
+        return cursor.rowcount > 0
+
+    def clear_completed_goals(self, user_id):
+        cursor = self.conn.execute("DELETE FROM goals WHERE user_id = ? AND completed = 1", (user_id,))
+        return cursor.rowcount
+
+    def get_goal_users(self):
+        users = {}
+        rows = self._all(
+            "SELECT g.user_id, g.name, g.deadline, g.completed, g.reminded, g.last_update, "
+            "COALESCE(p.points, 0) AS points FROM goals g LEFT JOIN goal_points p ON p.user_id = g.user_id "
+            "ORDER BY g.user_id, g.id"
+        )
+        for row in rows:
+            user = users.setdefault(row["user_id"], {"_id": row["user_id"], "goals": [], "points": row["points"]})
+            goal = {"goal": row["name"], "completed": bool(row["completed"]), "reminded": bool(row["reminded"])}
+            if row["deadline"]:
+                goal["deadline"] = row["deadline"]
+            if row["last_update"]:
+                goal["last_update"] = row["last_update"]
+            user["goals"].append(goal)
+        return list(users.values())
+
+    def mark_goals_reminded(self, user_id, goals):
+        goals = list(goals)
+        self.conn.execute(
+            f"UPDATE goals SET reminded = 1 WHERE user_id = ? AND name IN ({_placeholders(goals)})", (user_id, *goals)
+        )
+
+    def deduct_points(self, user_id, amount):
+        with self._transaction() as conn:
+            conn.execute("UPDATE goal_points SET points = MAX(0, points - ?) WHERE user_id = ?", (amount, user_id))
+            row = conn.execute("SELECT points FROM goal_points WHERE user_id = ?", (user_id,)).fetchone()
+        return row["points"] if row else 0
+
+    # Encryption keys
+
+    def get_data_key(self, user_id):
+        row = self._one("SELECT key FROM data_keys WHERE user_id = ?", (user_id,))
+        return row["key"] if row else None
+
+    def put_data_key(self, user_id, wrapped):
+        self.conn.execute("INSERT OR IGNORE INTO data_keys (user_id, key) VALUES (?, ?)", (user_id, wrapped))
+        return self.get_data_key(user_id)
+
+    # Reminder ledger
+
+    def claim_reminder(self, key, user_id):
+        now = time.time()
+        if now - self._last_purge > LEDGER_PURGE_INTERVAL:
+            # Stand-in for Mongo's TTL index
+            self.conn.execute("DELETE FROM reminder_ledger WHERE sent_at < ?", (now - LEDGER_TTL_SECONDS,))
+            self._last_purge = now
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO reminder_ledger (key, user_id, sent_at) VALUES (?, ?, ?)", (key, user_id, now)
+        )
+        return cursor.rowcount > 0
+
+    def release_reminder(self, key):
+        self.conn.execute("DELETE FROM reminder_ledger WHERE key = ?", (key,))
+
+    # Guild settings
+
+    def get_guild_configs(self, guild_ids):
+        guild_ids = list(guild_ids)
+        if not guild_ids:
+            return {}
+        rows = self._all(
+            f"SELECT guild_id, settings FROM guild_config WHERE guild_id IN ({_placeholders(guild_ids)})", guild_ids
+        )
+        return {row["guild_id"]: json.loads(row["settings"]) for row in rows}
+
+    def init_guild_config(self, guild_id, defaults):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO guild_config (guild_id, settings) VALUES (?, ?)", (guild_id, json.dumps(defaults))
+        )
+
+    def update_guild_config(self, guild_id, changes):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT settings FROM guild_config WHERE guild_id = ?", (guild_id,)).fetchone()
+            settings = json.loads(row["settings"]) if row else {}
+            settings.update(changes)
+            conn.execute(
+                "INSERT INTO guild_config (guild_id, settings) VALUES (?, ?) "
+                "ON CONFLICT (guild_id) DO UPDATE SET settings = excluded.settings",
+                (guild_id, json.dumps(settings))
+            )
+
+    # Weekly digest
+
+    def _digest_run(self, week_key):
+        row = self._one("SELECT * FROM digest_runs WHERE week_key = ?", (week_key,))
+        return {
+            "_id": row["week_key"], "cursor": row["cursor"], "done": bool(row["done"]), "sent": row["sent"],
+            "started_at": row["started_at"], "finished_at": row["finished_at"], "cost": json.loads(row["cost"]),
+        }
+
+    def start_digest_run(self, week_key, started_at):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO digest_runs (week_key, started_at) VALUES (?, ?)", (week_key, started_at.isoformat())
+        )
+        return self._digest_run(week_key)
+
+    def digest_run_done(self, week_key):
+        row = self._one("SELECT done FROM digest_runs WHERE week_key = ?", (week_key,))
+        return bool(row and row["done"])
+
+    def _add_cost(self, conn, week_key, cost):
+        row = conn.execute("SELECT cost FROM digest_runs WHERE week_key = ?", (week_key,)).fetchone()
+        total = json.loads(row["cost"])
+        for key, value in cost.items():
+            total[key] = total.get(key, 0) + value
+        conn.execute("UPDATE digest_runs SET cost = ? WHERE week_key = ?", (json.dumps(total), week_key))
+
+    def advance_digest_run(self, week_key, cursor, sent, cost):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE digest_runs SET cursor = ?, sent = sent + ? WHERE week_key = ?", (cursor, sent, week_key)
+            )
+            self._add_cost(conn, week_key, cost)
+
+    def finish_digest_run(self, week_key, finished_at, cost):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE digest_runs SET done = 1, finished_at = ? WHERE week_key = ?",
+                (finished_at.isoformat(), week_key)
+            )
+            self._add_cost(conn, week_key, cost)
+        return self._digest_run(week_key)
+
+    def count_digest_users(self, after):
+        return self._one(
+            "SELECT COUNT(*) FROM user_profiles WHERE digest_opt_in = 1 AND user_id > ?",
+            (after if after is not None else -1,)
+        )[0]
+
+    def digest_cohort(self, after, limit):
+        rows = self._all(
+            "SELECT user_id FROM user_profiles WHERE digest_opt_in = 1 AND user_id > ? ORDER BY user_id LIMIT ?",
+            (after if after is not None else -1, limit)
+        )
+        return [row["user_id"] for row in rows]
+
+    def weekly_summaries(self, user_ids, since_day, before_day):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        marks = _placeholders(user_ids)
+        summaries = {user_id: {"_id": user_id, "moods": [], "habits": [], "goals": None} for user_id in user_ids}
+
+        for row in self._all(
+            f"SELECT user_id, mood FROM moods WHERE user_id IN ({marks}) AND timestamp >= ? AND timestamp < ? ORDER BY user_id, timestamp",
+            (*user_ids, since_day, before_day)
+        ):
+            summaries[row["user_id"]]["moods"].append(row["mood"])
+
+        for row in self._all(
+            f"SELECT h.user_id, h.name, COUNT(l.day) AS days FROM habits h "
+            f"LEFT JOIN habit_logs l ON l.habit_id = h.id AND l.day >= ? AND l.day < ? "
+            f"WHERE h.user_id IN ({marks}) GROUP BY h.id ORDER BY h.user_id, h.id",
+            (since_day, before_day, *user_ids)
+        ):
+            summaries[row["user_id"]]["habits"].append({"habit": row["name"], "days": row["days"]})
+
+        for row in self._all(
+            f"SELECT g.user_id, SUM(g.completed = 0) AS active, SUM(g.completed = 1) AS completed, "
+            f"(SELECT COUNT(*) FROM goal_progress p WHERE p.user_id = g.user_id AND p.day >= ? AND p.day < ?) AS progress_days, "
+            f"COALESCE((SELECT points FROM goal_points pt WHERE pt.user_id = g.user_id), 0) AS points "
+            f"FROM goals g WHERE g.user_id IN ({marks}) GROUP BY g.user_id",
+            (since_day, before_day, *user_ids)
+        ):
+            summaries[row["user_id"]]["goals"] = {
+                "active": row["active"], "completed": row["completed"],
+                "progress_days": row["progress_days"], "points": row["points"],
+            }
+
+        return [summaries[user_id] for user_id in sorted(user_ids)]
+
+    # Bulk import
+
+    def _archived_keys(self, conn, user_id, days):
+        """``archive.archived_keys`` for the archive periods the given days fall in."""
+        periods = list({day[:7] for day in days})
+        rows = conn.execute(
+            f"SELECT data FROM archives WHERE user_id = ? AND period IN ({_placeholders(periods)})", (user_id, *periods)
+        )
+        return archive.archived_keys([record for row in rows for record in archive.unpack(row["data"])])
+
+    def import_moods(self, user_id, entries):
+        with self._transaction() as conn:
+            timestamps = list({timestamp for _, timestamp, _ in entries})
+            seen = {
+                row[0] for row in conn.execute(
+                    f"SELECT timestamp FROM moods WHERE user_id = ? AND timestamp IN ({_placeholders(timestamps)})",
+                    (user_id, *timestamps)
+                )
+            }
+            # Moods already moved to cold storage aren't new either
+            seen |= self._archived_keys(conn, user_id, timestamps)[0]
+            fresh = []
+            for mood, timestamp, terms in entries:
+                if timestamp not in seen:
+                    seen.add(timestamp)
+                    fresh.append((mood, timestamp, search.terms(mood) if terms is None else terms))
+            conn.executemany(
+                "INSERT INTO moods (user_id, mood, timestamp) VALUES (?, ?, ?)",
+                [(user_id, mood, timestamp) for mood, timestamp, _ in fresh]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO mood_terms (user_id, term, timestamp) VALUES (?, ?, ?)",
+                [(user_id, term, timestamp) for _, timestamp, terms in fresh for term in terms]
+            )
+        return len(fresh)
+
+    def import_habit_logs(self, user_id, logs):
+        with self._transaction() as conn:
+            archived = self._archived_keys(conn, user_id, [day for _, day in logs])[1]
+            logs = [log for log in logs if log not in archived]
+            habit_ids = {}
+            for row in conn.execute("SELECT id, name FROM habits WHERE user_id = ? ORDER BY id", (user_id,)):
+                habit_ids.setdefault(row["name"], row["id"])
+            for habit in dict.fromkeys(habit for habit, _ in logs):
+                if habit not in habit_ids:
+                    habit_ids[habit] = conn.execute(
+                        "INSERT INTO habits (user_id, name) VALUES (?, ?)", (user_id, habit)
+                    ).lastrowid
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO habit_logs (habit_id, user_id, day) VALUES (?, ?, ?)",
+                [(habit_ids[habit], user_id, day) for habit, day in logs]
+            )
+            return conn.total_changes - before
+
+    # Cold storage
+
+    def compaction_candidates(self, before_day, after, limit):
+        after = after if after is not None else -1
+        rows = self._all(
+            "SELECT user_id FROM moods WHERE timestamp < ? AND user_id > ? "
+            "UNION SELECT user_id FROM habit_logs WHERE day < ? AND user_id > ? "
+            "UNION SELECT user_id FROM goal_progress WHERE day < ? AND user_id > ? "
+            "ORDER BY user_id LIMIT ?",
+            (before_day, after, before_day, after, before_day, after, limit)
+        )
+        return [row["user_id"] for row in rows]
+
+    def compact_user(self, user_id, before_day):
+        stats = {"moods": 0, "habit_logs": 0, "goal_days": 0, "bytes": 0}
+        with self._transaction() as conn:
+            moods = conn.execute(
+                "SELECT mood, timestamp FROM moods WHERE user_id = ? AND timestamp < ?", (user_id, before_day)
+            ).fetchall()
+            habit_logs = conn.execute(
+                "SELECT h.id, h.name, l.day FROM habit_logs l JOIN habits h ON h.id = l.habit_id "
+                "WHERE l.user_id = ? AND l.day < ?",
+                (user_id, before_day)
+            ).fetchall()
+            goal_days = conn.execute(
+                "SELECT g.id, g.name, p.day FROM goal_progress p JOIN goals g ON g.id = p.goal_id "
+                "WHERE p.user_id = ? AND p.day < ?",
+                (user_id, before_day)
+            ).fetchall()
+
+            records = (
+                [{"kind": "mood", "mood": row["mood"], "timestamp": row["timestamp"]} for row in moods]
+                + [{"kind": "habit", "habit": row["name"], "day": row["day"]} for row in habit_logs]
+                + [{"kind": "goal", "goal": row["name"], "day": row["day"]} for row in goal_days]
+            )
+            for period, period_records in archive.by_period(records).items():
+                existing = conn.execute(
+                    "SELECT data FROM archives WHERE user_id = ? AND period = ?", (user_id, period)
+                ).fetchone()
+                blob = archive.pack(period_records, existing["data"] if existing else None)
+                conn.execute(
+                    "INSERT INTO archives (user_id, period, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT (user_id, period) DO UPDATE SET data = excluded.data",
+                    (user_id, period, blob)
+                )
+                stats["bytes"] += len(blob)
+                mood_count = sum(1 for record in period_records if record["kind"] == "mood")
+                if mood_count:
+                    conn.execute(
+                        "INSERT INTO mood_archive_counts (user_id, period, count) VALUES (?, ?, ?) "
+                        "ON CONFLICT (user_id, period) DO UPDATE SET count = count + excluded.count",
+                        (user_id, period, mood_count)
+                    )
+
+            for table, column, rows in (("habits", "habit_logs", habit_logs), ("goals", "goal_progress", goal_days)):
+                per_item = {}
+                for row in rows:
+                    per_item[row["id"]] = per_item.get(row["id"], 0) + 1
+                conn.executemany(
+                    f"UPDATE {table} SET archived_days = archived_days + ? WHERE id = ?",
+                    [(count, item_id) for item_id, count in per_item.items()]
+                )
+                conn.execute(f"DELETE FROM {column} WHERE user_id = ? AND day < ?", (user_id, before_day))
+            conn.execute("DELETE FROM moods WHERE user_id = ? AND timestamp < ?", (user_id, before_day))
+            conn.execute("DELETE FROM mood_terms WHERE user_id = ? AND timestamp < ?", (user_id, before_day))
+
+        stats["moods"], stats["habit_logs"], stats["goal_days"] = len(moods), len(habit_logs), len(goal_days)
+        return stats
+
+    def get_archive(self, user_id):
+        records = []
+        for row in self._all("SELECT data FROM archives WHERE user_id = ? ORDER BY period", (user_id,)):
+            records += archive.unpack(row["data"])
+        return records
+
+    def archived_mood_count(self, user_id):
+        return self._one("SELECT COALESCE(SUM(count), 0) FROM mood_archive_counts WHERE user_id = ?", (user_id,))[0]
+
+    # Insights
+
+    def get_insights(self, user_id):
+        row = self._one("SELECT doc FROM mood_insights WHERE user_id = ?", (user_id,))
+        return json.loads(row["doc"]) if row else None
+
+    def save_insights(self, doc):
+        self.conn.execute(
+            "INSERT INTO mood_insights (user_id, doc) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET doc = excluded.doc",
+            (doc["_id"], json.dumps(doc))
+        )
+
+    def update_insights(self, user_id, mutate, default):
+        with self._transaction():
+            doc = self.get_insights(user_id) or default(user_id)
+            mutate(doc)
+            self.save_insights(doc)
+
+    def forget_insight_habits(self, user_id):
+        with self._transaction():
+            doc = self.get_insights(user_id)
+            if doc:
+                doc["habits"], doc["done"] = [], []
+                self.save_insights(doc)
@@ -0,0 +1,86 @@
+"""Shared fixtures.
+
+Mongo tests run against ``MONGO_TEST_URL`` when it is set (a throwaway
+database is created and dropped), otherwise against mongomock. Checks that
+need a real server, such as query plans, skip without one.
+"""
+import functools
+import os
+import sys
+import threading
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MONGO_TEST_URL = os.getenv("MONGO_TEST_URL")
+
+needs_server = pytest.mark.skipif(not MONGO_TEST_URL, reason="needs a MongoDB server (set MONGO_TEST_URL)")
+
+
+def _serialize_commands(monkeypatch, mongomock):
+    """Make each mongomock command atomic, as a server makes each single-document write.
+
+    mongomock evaluates a filter and applies the update in separate Python
+    steps, so threads could interleave inside one command. With this,
+    writers still interleave between commands, which is where lost updates
+    come from. ``find_one_and_update`` is redone on top of ``update_one``
+    because mongomock drops the filter (and with it the positional ``$``
+    match) before updating.
+    """
+    lock = threading.RLock()
+    collection = mongomock.collection.Collection
+
+    for name in ("insert_one", "insert_many", "replace_one", "update_one", "update_many",
+                 "delete_one", "delete_many", "find_one", "count_documents", "aggregate", "bulk_write"):
+        def atomic(*args, _method=getattr(collection, name), **kwargs):
+            with lock:
+                return _method(*args, **kwargs)
+        monkeypatch.setattr(collection, name, functools.wraps(getattr(collection, name))(atomic))
+
+    find_one_and_update = collection.find_one_and_update
+
+    def find_one_and_update_atomic(self, filter, update, projection=None, return_document=False, upsert=False, **kwargs):
+        with lock:
+            if upsert:
+                return find_one_and_update(self, filter, update, projection, return_document=return_document, upsert=True, **kwargs)
+            before = self.find_one(filter, {"_id": 1})
+            if before is None:
+                return None
+            if not return_document:
+                before = self.find_one({"_id": before["_id"]}, projection)
+            self.update_one(filter, update, **kwargs)
+            return self.find_one({"_id": before["_id"]}, projection) if return_document else before
+
+    monkeypatch.setattr(collection, "find_one_and_update", find_one_and_update_atomic)
+
+
+@pytest.fixture
+def mongo_backend(monkeypatch):
+    import storage.mongo
+
+    if MONGO_TEST_URL:
+        backend = storage.mongo.MongoBackend(MONGO_TEST_URL, database=f"AuraBotTest{uuid.uuid4().hex[:8]}")
+    else:
+        mongomock = pytest.importorskip("mongomock")
+        _serialize_commands(monkeypatch, mongomock)
+        monkeypatch.setattr(storage.mongo, "MongoClient", mongomock.MongoClient)
+        backend = storage.mongo.MongoBackend("mongodb://localhost", database="AuraBotTest")
+    yield backend
+    backend.cluster.drop_database(backend.db.name)
+    backend.close()
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    from storage.sqlite import SQLiteBackend
+
+    backend = SQLiteBackend(str(tmp_path / "test.db"))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture(params=["mongo", "sqlite"])
+def backend(request):
+    """Each backend in turn. Tests that need a real server for Mongo parametrize it indirectly with ``needs_server``."""
+    return request.getfixturevalue(f"{request.param}_backend")
@@ -0,0 +1,22 @@
+def test_overlapping_compactions_count_moods_once(mongo_backend):
+    for day in range(1, 6):
+        mongo_backend.add_mood(1, "calm", f"2024-01-0{day} 09:00:00")
+    archive_records = mongo_backend._archive
+    overlapped = []
+
+    def archive_then_overlap(user_id, records):
+        written = archive_records(user_id, records)
+        # A second run (or a retry after a crash) gets in between archiving and the hot update
+        if not overlapped:
+            overlapped.append(None)
+            overlapped[0] = mongo_backend.compact_user(user_id, "2024-03-01")
+        return written
+
+    mongo_backend._archive = archive_then_overlap
+    stats = mongo_backend.compact_user(1, "2024-03-01")
+
+    assert overlapped[0]["moods"] == 5
+    assert stats["moods"] == 0
+    assert mongo_backend.archived_mood_count(1) == 5
+    assert mongo_backend.get_moods(1) == []
+    assert len(mongo_backend.get_archive(1)) == 5
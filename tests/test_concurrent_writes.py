@@ -0,0 +1,114 @@
+"""Concurrent writers on the same user never lose an update.
+
+Many writers per user run at once through the same async facade the cogs
+use, on a multi-thread executor: habit and goal logging (pairs of writers
+race on the same day), the goal loop's point deductions and mood insights
+updates. Afterwards every user's data must match what the writers were told
+happened.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import pytest
+from insights import InsightsStore, new_insights
+from storage import Storage
+from storage.base import WriteConflict
+from storage.mongo import WRITE_RETRIES
+
+USERS = 3
+WRITERS = 12
+ROUNDS = 8
+
+
+@pytest.fixture
+def storage(backend):
+    # Mongo runs on the default thread pool; give it a fixed one with plenty of threads
+    executor = ThreadPoolExecutor(16) if backend.executor is None else None
+    if executor:
+        backend.executor = executor
+    # Switch threads as often as possible so writers interleave between every command
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield Storage(backend)
+    sys.setswitchinterval(interval)
+    if executor:
+        executor.shutdown()
+
+
+async def writer(storage, user_id, writer_id, tally):
+    insights = InsightsStore(storage)
+    for round_number in range(ROUNDS):
+        # Pairs of writers share a habit and day, so every log is raced for
+        day = f"2025-{round_number + 1:02d}-{writer_id // 2 + 1:02d}"
+        status = await storage.log_habit(user_id, f"habit {writer_id // 2 % 3}", day)
+        tally["habit_logged"] += status == "logged"
+
+        status, _ = await storage.log_goal_progress(user_id, "goal", day, 5)
+        if status == "logged":
+            tally["points_added"] += 5
+
+        if writer_id % 3 == round_number % 3:
+            # What the hourly goal loop does while users keep logging
+            await storage.deduct_points(user_id, 1)
+            tally["points_removed"] += 1
+
+        await insights.record_mood(user_id, "2025-06-01", "calm")
+        tally["moods"] += 1
+
+
+def test_no_lost_updates(storage):
+    async def run():
+        tallies = {}
+        for user_id in range(1, USERS + 1):
+            await storage.create_profile(user_id, f"user {user_id}", "UTC")
+            for habit in range(3):
+                await storage.add_habit(user_id, f"habit {habit}")
+            await storage.add_goal(user_id, "goal")
+            # Start well above zero so the deduction floor never hides a lost update
+            await storage.log_goal_progress(user_id, "goal", "2000-01-01", WRITERS * ROUNDS)
+            tallies[user_id] = {"habit_logged": 0, "points_added": WRITERS * ROUNDS, "points_removed": 0, "moods": 0}
+
+        await asyncio.gather(*(
+            writer(storage, user_id, writer_id, tallies[user_id])
+            for user_id in tallies for writer_id in range(WRITERS)
+        ))
+
+        results = {}
+        for user_id in tallies:
+            history = await storage.get_habit_history(user_id)
+            results[user_id] = {
+                "habit_logs": sum(len(habit["logs"]) for habit in history),
+                "distinct_logs": sum(len(set(habit["logs"])) for habit in history),
+                "points": await storage.get_points(user_id),
+                "moods": (await storage.get_insights(user_id))["mood"]["n"],
+            }
+        return tallies, results
+
+    tallies, results = asyncio.run(run())
+    for user_id, tally in tallies.items():
+        result = results[user_id]
+        # Each (habit, day) pair is logged by exactly one of the two racing writers
+        assert tally["habit_logged"] == WRITERS * ROUNDS // 2
+        assert result["habit_logs"] == result["distinct_logs"] == tally["habit_logged"]
+        assert result["points"] == tally["points_added"] - tally["points_removed"]
+        assert tally["points_added"] == WRITERS * ROUNDS + 5 * WRITERS * ROUNDS // 2
+        assert result["moods"] == tally["moods"] == WRITERS * ROUNDS
+
+
+def test_insights_give_up_after_retries(mongo_backend):
+    storage = Storage(mongo_backend)
+    mongo_backend.save_insights(new_insights(1))
+    calls = []
+
+    def mutate(doc):
+        calls.append(doc)
+        # Another writer gets in between every read and write
+        mongo_backend.forget_insight_habits(1)
+
+    with pytest.raises(WriteConflict):
+        asyncio.run(storage.update_insights(1, mutate, new_insights))
+    assert len(calls) == WRITE_RETRIES
+
+    # Once the other writer stops, the retry wins
+    asyncio.run(storage.update_insights(1, lambda doc: doc.update(done=["2025-06-01"]), new_insights))
+    assert mongo_backend.get_insights(1)["done"] == ["2025-06-01"]
@@ -0,0 +1,24 @@
+from datetime import datetime
+import pytest
+from conftest import needs_server
+from insights import local_day
+
+
+# mongomock can't work out today's date in a timezone ($$NOW with $dateToString)
+@pytest.mark.parametrize("backend", [pytest.param("mongo", marks=needs_server), "sqlite"], indirect=True)
+def test_habit_logged_today_is_done_outside_utc(backend):
+    # One of the two is always on a different day than UTC
+    utc_day = datetime.utcnow().strftime("%Y-%m-%d")
+    timezone = "Pacific/Kiritimati" if local_day("Pacific/Kiritimati") != utc_day else "Pacific/Pago_Pago"
+    today = local_day(timezone)
+    assert today != utc_day
+
+    backend.create_profile(1, "tester", timezone)
+    backend.add_habit(1, "run")
+    backend.add_habit(1, "read")
+    # The day /loghabit logs for
+    assert backend.log_habit(1, "run", today) == "logged"
+
+    board = backend.dashboard(1, "UTC", 5)
+    assert board["day"] == today
+    assert {habit["habit"]: habit["done"] for habit in board["habits"]} == {"run": True, "read": False}
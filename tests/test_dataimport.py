@@ -0,0 +1,64 @@
+from datetime import datetime
+import pytz
+from dataimport import normalize
+from insights import local_day
+
+TIMEZONE = "Asia/Tokyo"
+
+
+def test_habit_days_match_loghabit_days(sqlite_backend):
+    """An evening in UTC is the next morning in Tokyo; import and /loghabit must agree on the day."""
+    tz = pytz.timezone(TIMEZONE)
+    moment = datetime(2025, 3, 3, 20, 0, tzinfo=pytz.utc)
+    entries = normalize({"date": "2025-03-03T20:00:00Z", "habit": "run"}, tz, "2099-01-01 00:00:00")
+    assert entries == [("habit", "run", local_day(TIMEZONE, moment))] == [("habit", "run", "2025-03-04")]
+
+    sqlite_backend.create_profile(1, "tester", TIMEZONE)
+    sqlite_backend.add_habit(1, "run")
+    assert sqlite_backend.log_habit(1, "run", local_day(TIMEZONE, moment)) == "logged"
+    assert sqlite_backend.import_habit_logs(1, [(name, day) for _, name, day in entries]) == 0
+    assert sqlite_backend.get_habit_history(1) == [{"habit": "run", "logs": ["2025-03-04"]}]
+
+
+def test_imported_history_keeps_logs_in_day_order(backend):
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    backend.create_profile(1, "tester", "UTC")
+    backend.add_habit(1, "run", "08:00")
+    assert backend.log_habit(1, "run", today) == "logged"
+
+    # Older history arrives after today's log, out of order and with a repeat
+    added = backend.import_habit_logs(1, [("run", "2024-03-02"), ("run", "2024-03-01"), ("run", today), ("walk", "2024-03-01")])
+    assert added == 3
+
+    history = {habit["habit"]: habit["logs"] for habit in backend.get_habit_history(1)}
+    assert history == {"run": ["2024-03-01", "2024-03-02", today], "walk": ["2024-03-01"]}
+    # The reminder loop still sees today's log, so nobody is nagged after an import
+    (_, habit, _, recent), = backend.get_habit_reminders()
+    assert habit == "run" and today in recent
+
+    assert backend.import_habit_logs(1, [("run", "2024-03-01")]) == 0
+
+
+def test_import_creates_habits_for_new_users(backend):
+    assert backend.import_habit_logs(2, [("read", "2024-05-02"), ("read", "2024-05-01")]) == 2
+    assert backend.get_habit_history(2) == [{"habit": "read", "logs": ["2024-05-01", "2024-05-02"]}]
+
+
+def test_reimport_after_compaction_adds_nothing(backend):
+    days = [f"2024-01-0{day}" for day in range(1, 6)]
+    moods = [("calm", f"{day} 09:00:00", None) for day in days]
+    logs = [("run", day) for day in days]
+    assert backend.import_moods(1, moods) == 5
+    assert backend.import_habit_logs(1, logs) == 5
+    backend.compact_user(1, "2024-03-01")
+
+    # The same file again: every row is already in cold storage
+    assert backend.import_moods(1, moods) == 0
+    assert backend.import_habit_logs(1, logs) == 0
+    # A day that was never stored still comes in
+    assert backend.import_habit_logs(1, logs + [("run", "2024-01-06")]) == 1
+    backend.compact_user(1, "2024-03-01")
+
+    assert backend.archived_mood_count(1) == 5
+    assert backend.habit_page(1, 0, 10)["habits"][0]["days_logged"] == 6
+    assert len(backend.get_archive(1)) == 11
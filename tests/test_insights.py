@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytz
+from insights import InsightsStore, local_day, recompute, stats_match
+from storage import Storage
+
+TIMEZONE = "America/Los_Angeles"
+
+
+def test_incremental_matches_recompute_outside_utc(sqlite_backend):
+    """Moods and habit logs from a user's evenings (the next day in UTC) keep the running stats exact."""
+    storage = Storage(sqlite_backend)
+    insights = InsightsStore(storage)
+    tz = pytz.timezone(TIMEZONE)
+    user_id = 7
+
+    # (hours after the start, event): 18:00-23:00 local, i.e. after midnight UTC, over several days
+    start = tz.localize(datetime(2025, 3, 3, 18, 0))
+    events = []
+    for day in range(6):
+        base = day * 24
+        events += [
+            (base + 0, ("mood", "happy" if day % 2 else "tired")),
+            (base + 1, ("habit", "run" if day % 2 else "read")),
+            (base + 2, ("mood", "calm")),
+            (base + 4, ("habit", "read")),
+            (base + 5, ("mood", "7/10")),
+        ]
+
+    async def run():
+        await storage.create_profile(user_id, "tester", TIMEZONE)
+        for habit in ("run", "read"):
+            await storage.add_habit(user_id, habit)
+        for hours, (kind, value) in events:
+            moment = (start + timedelta(hours=hours)).astimezone(pytz.utc)
+            day = local_day(TIMEZONE, moment)
+            # The local evening is already the next day in UTC, which is what used to split the two
+            assert day != moment.strftime("%Y-%m-%d")
+            # The same calls /logmood and /loghabit make
+            if kind == "mood":
+                await storage.add_mood(user_id, value, moment.astimezone(tz).strftime("%Y-%m-%d %H:%M:%S"))
+                await insights.record_mood(user_id, day, value)
+            elif await storage.log_habit(user_id, value, day) == "logged":
+                await insights.record_habit(user_id, value, day)
+
+        incremental = await insights.get(user_id)
+        full = recompute(user_id, await storage.get_moods(user_id), await storage.get_habit_history(user_id))
+        return incremental, full
+
+    incremental, full = asyncio.run(run())
+    assert stats_match(incremental["mood"], full["mood"])
+    stored = {entry["habit"]: entry for entry in incremental["habits"]}
+    for entry in full["habits"]:
+        assert stats_match(stored[entry["habit"]], entry), entry["habit"]
+    assert all(entry["n"] == 18 for entry in full["habits"])
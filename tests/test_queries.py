@@ -0,0 +1,93 @@
+"""The per-user aggregation pipelines must start from one document found by ``_id``.
+
+Each pipeline is checked structurally everywhere, run for results where the
+test database can execute it, and checked for an index-backed plan (no
+COLLSCAN) against a real server.
+"""
+import json
+import pytest
+import queries
+from conftest import needs_server
+
+USER = 42
+
+# (name, backend collection attribute, pipeline)
+PIPELINES = [
+    ("habit_page", "habits", queries.habit_page_pipeline(USER, 0, 10)),
+    ("goal_page", "goals", queries.goal_page_pipeline(USER, 0, 10)),
+    ("habit_summary", "habits", queries.habit_summary_pipeline(USER, "2025-01-02")),
+    ("goal_summary", "goals", queries.goal_summary_pipeline(USER)),
+    ("points", "goals", queries.points_pipeline(USER)),
+    ("mood_range", "moods", queries.mood_range_pipeline(USER, "2025-01-01", None, 0, 10)),
+    ("moods_at", "moods", queries.moods_at_pipeline(USER, ["2025-01-01 09:00:00"])),
+    ("weekly_digest", "profiles", queries.weekly_digest_pipeline([USER, USER + 1], "2024-12-30", "2025-01-06")),
+    ("dashboard", "profiles", queries.dashboard_pipeline(USER, "UTC", 5)),
+]
+
+
+@pytest.fixture
+def seeded(mongo_backend):
+    backend = mongo_backend
+    backend.create_profile(USER, "tester", "Asia/Tokyo")
+    backend.add_habit(USER, "run", "08:00")
+    backend.add_habit(USER, "read")
+    backend.log_habit(USER, "run", "2025-01-01")
+    backend.log_habit(USER, "run", "2025-01-02")
+    backend.add_goal(USER, "walk", "2030-01-01")
+    backend.add_goal(USER, "swim")
+    backend.add_mood(USER, "calm", "2025-01-01 09:00:00")
+    backend.add_mood(USER, "tired", "2025-01-02 21:00:00")
+    # A second user, so an unindexed scan would have something to wade through
+    backend.create_profile(USER + 1, "other", "UTC")
+    backend.add_habit(USER + 1, "run")
+    return backend
+
+
+@pytest.mark.parametrize("name, collection, pipeline", PIPELINES, ids=[p[0] for p in PIPELINES])
+def test_pipeline_starts_with_id_match(name, collection, pipeline):
+    assert list(pipeline[0]) == ["$match"]
+    assert "_id" in pipeline[0]["$match"]
+
+
+@pytest.mark.parametrize("pipeline", [queries.weekly_digest_pipeline([USER], "2024-12-30", "2025-01-06"), queries.dashboard_pipeline(USER, "UTC", 5)])
+def test_lookups_join_on_id(pipeline):
+    lookups = [stage["$lookup"] for stage in pipeline if "$lookup" in stage]
+    assert lookups
+    for lookup in lookups:
+        assert lookup["pipeline"][0] == {"$match": {"$expr": {"$eq": ["$_id", "$$uid"]}}}
+
+
+def test_page_and_summary_pipelines(seeded):
+    page = seeded.habit_page(USER, 0, 10)
+    assert page["total"] == 2
+    assert [(habit["habit"], habit["days_logged"]) for habit in page["habits"]] == [("run", 2), ("read", 0)]
+    summary = seeded.habit_summary(USER, "2025-01-02")
+    assert (summary["total"], summary["logged"]) == (2, 1)
+
+    page = seeded.goal_page(USER, 0, 10)
+    assert [goal["goal"] for goal in page["goals"]] == ["walk", "swim"]
+    assert seeded.goal_summary(USER)["total"] == 2
+    assert seeded.get_points(USER) == 0
+
+
+@needs_server
+def test_lookup_pipelines(seeded):
+    board = seeded.dashboard(USER, "UTC", 5)
+    assert board["timezone"] == "Asia/Tokyo"
+    assert [entry["mood"] for entry in board["moods"]] == ["calm", "tired"]
+    assert {habit["habit"] for habit in board["habits"]} == {"run", "read"}
+
+    summaries = seeded.weekly_summaries([USER], "2024-12-30", "2025-01-06")
+    assert len(summaries) == 1
+
+    result = seeded.search_moods(USER, [], "2025-01-01", None, 0, 10)
+    assert [entry["mood"] for entry in result["moods"]] == ["tired", "calm"]
+
+
+@needs_server
+@pytest.mark.parametrize("name, collection, pipeline", PIPELINES, ids=[p[0] for p in PIPELINES])
+def test_pipeline_uses_id_index(seeded, name, collection, pipeline):
+    collection = getattr(seeded, collection)
+    plan = json.dumps(seeded.db.command("aggregate", collection.name, pipeline=pipeline, explain=True), default=str)
+    assert "COLLSCAN" not in plan
+    assert any(stage in plan for stage in ("IDHACK", "IXSCAN", "EXPRESS")), plan
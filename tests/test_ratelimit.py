@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+import discord
+from discord import app_commands
+import pytest
+from main import AuraTree
+from ratelimit import SLOT_TIMEOUT, SWEEP_INTERVAL, TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def limiter(clock, **overrides):
+    options = dict(global_rate=100, global_burst=100, max_inflight=100, user_rate=100, user_burst=100,
+                   user_max_inflight=100, budgets={"log": (2, 1 / 10)}, clock=clock)
+    options.update(overrides)
+    return TokenBucketLimiter(**options)
+
+
+def admit(limiter, user_id, command, count, start=0):
+    """Acquire and immediately release ``count`` times; returns the first refusal (or None)."""
+    for slot in range(start, start + count):
+        denied = limiter.acquire(user_id, command, (user_id, slot))
+        if denied:
+            return denied
+        limiter.release((user_id, slot))
+    return None
+
+
+def test_command_bucket_refills(clock):
+    bucket = limiter(clock)
+    assert admit(bucket, 1, "log", 2) is None
+    scope, retry_after = bucket.acquire(1, "log", "late")
+    assert scope == "user" and retry_after == pytest.approx(10)
+
+    clock.now += 5
+    assert bucket.acquire(1, "log", "early")[0] == "user"
+    clock.now += 5
+    assert bucket.acquire(1, "log", "on time") is None
+
+
+def test_users_are_isolated(clock):
+    bucket = limiter(clock)
+    assert admit(bucket, 1, "log", 2) is None
+    assert bucket.acquire(1, "log", "again")[0] == "user"
+    # Another user's budget for the same command is untouched
+    assert admit(bucket, 2, "log", 2) is None
+
+
+def test_rotating_commands_hits_the_user_total(clock):
+    bucket = limiter(clock, global_burst=40, user_burst=10, user_rate=0.5, budgets={})
+    commands = [f"command {number}" for number in range(40)]
+    # Each command has budget left, but the user's total runs out
+    for slot, command in enumerate(commands[:10]):
+        assert admit(bucket, 1, command, 1, slot) is None
+    scope, retry_after = bucket.acquire(1, commands[10], "over")
+    assert scope == "user_total" and retry_after == pytest.approx(2)
+    # Which leaves most of the global burst for everyone else
+    assert admit(bucket, 2, "log", 5) is None
+
+
+def test_user_cannot_hold_every_slot(clock):
+    bucket = limiter(clock, max_inflight=4, user_max_inflight=2, budgets={})
+    assert bucket.acquire(1, "a", "1a") is None
+    assert bucket.acquire(1, "b", "1b") is None
+    assert bucket.acquire(1, "c", "1c")[0] == "user_busy"
+    # Other users still get the remaining slots, then the global cap applies
+    assert bucket.acquire(2, "a", "2a") is None
+    assert bucket.acquire(3, "a", "3a") is None
+    assert bucket.acquire(4, "a", "4a")[0] == "busy"
+
+
+def test_slot_released_when_the_command_fails(clock):
+    client = discord.Client(intents=discord.Intents.none())
+    client.limiter = limiter(clock, max_inflight=1)
+    client.recorder = None
+    tree = AuraTree(client)
+    interaction = SimpleNamespace(id="failing", command=None)
+
+    assert client.limiter.acquire(1, "log", interaction.id) is None
+    assert client.limiter.acquire(2, "log", "waiting")[0] == "busy"
+    asyncio.run(tree.on_error(interaction, app_commands.AppCommandError("database down")))
+    assert client.limiter.acquire(2, "log", "waiting") is None
+
+
+def test_leaked_slots_and_idle_buckets_are_reclaimed(clock):
+    bucket = limiter(clock, max_inflight=1)
+    assert bucket.acquire(1, "log", "leaked") is None
+    assert bucket.acquire(2, "log", "blocked")[0] == "busy"
+
+    clock.now += max(SLOT_TIMEOUT, SWEEP_INTERVAL, 20)
+    assert bucket.acquire(2, "log", "after sweep") is None
+    # User 1's buckets had refilled, so the sweep dropped them
+    assert len(bucket) == 1 and set(bucket._users) == {2}
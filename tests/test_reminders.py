@@ -0,0 +1,41 @@
+from datetime import datetime
+import pytz
+from reminders import due_occurrence, utc_to_local
+
+NOW = datetime(2025, 1, 15, 12, 0, tzinfo=pytz.utc)
+
+
+def add_legacy_habit(backend, user_id, habit, reminder_time):
+    """Store a reminder the way it was saved while reminder times were UTC."""
+    backend.add_habit(user_id, habit, reminder_time)
+    if hasattr(backend, "habits"):
+        backend.habits.update_one({"_id": user_id}, {"$unset": {"habits.0.reminder_local": ""}})
+    else:
+        backend.executor.submit(backend.conn.execute, "UPDATE habits SET reminder_local = 0 WHERE user_id = ?", (user_id,)).result()
+
+
+def test_utc_reminders_keep_firing_at_the_same_moment(backend):
+    backend.create_profile(1, "legacy", "America/Los_Angeles")
+    add_legacy_habit(backend, 1, "run", "16:00")
+    # Added after the switch, already in local time
+    backend.create_profile(2, "new", "America/Los_Angeles")
+    backend.add_habit(2, "read", "08:00")
+    # No profile: the reminder loop uses UTC, so the time stays as it is
+    add_legacy_habit(backend, 3, "walk", "07:30")
+
+    convert = lambda reminder_time, timezone: utc_to_local(reminder_time, timezone, NOW)
+    assert backend.localize_habit_reminders(convert) == 2
+    # Running again (every cog load) changes nothing
+    assert backend.localize_habit_reminders(convert) == 0
+
+    reminders = {user_id: reminder_time for user_id, _, reminder_time, _ in backend.get_habit_reminders()}
+    # 16:00 UTC is 08:00 in Los Angeles in January
+    assert reminders == {1: "08:00", 2: "08:00", 3: "07:30"}
+    local_now = NOW.replace(hour=16).astimezone(pytz.timezone("America/Los_Angeles"))
+    assert due_occurrence(reminders[1], local_now, 60) == "2025-01-15"
+
+
+def test_utc_to_local_keeps_bad_values():
+    assert utc_to_local("25:99", "UTC", NOW) == "25:99"
+    assert utc_to_local("08:00", "Not/AZone", NOW) == "08:00"
+    assert utc_to_local("23:30", "Asia/Tokyo", NOW) == "08:30"
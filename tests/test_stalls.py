@@ -0,0 +1,19 @@
+import os
+from types import SimpleNamespace
+from stalls import BOT_ROOT, StallWatchdog, _describe
+
+
+def code(name, qualname=None):
+    fields = {"co_name": name, "co_filename": os.path.join(BOT_ROOT, "cogs", "moodlogging.py")}
+    if qualname:
+        fields["co_qualname"] = qualname
+    return SimpleNamespace(**fields)
+
+
+def test_names_with_and_without_co_qualname():
+    watchdog = StallWatchdog(0.1)
+    assert watchdog._command_for(code("view_moods", "MoodLogging.view_moods")) == ("MoodLogging", "view_moods")
+    # Before Python 3.11 code objects have no co_qualname
+    assert watchdog._command_for(code("view_moods")) == ("-", "view_moods")
+    frame = SimpleNamespace(f_code=code("view_moods"), f_lineno=12)
+    assert _describe(frame) == f"{os.path.join('cogs', 'moodlogging.py')}:12 in view_moods"
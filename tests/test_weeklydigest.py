@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from cogs.weeklydigest import WeeklyDigest, format_digest
+
+
+def test_window_is_seven_days():
+    _, since_day, before_day, scheduled = WeeklyDigest.current_run(datetime(2025, 1, 8, 12))
+    since, before = datetime.strptime(since_day, "%Y-%m-%d"), datetime.strptime(before_day, "%Y-%m-%d")
+    assert (before - since).days == 7
+    assert since <= scheduled < before
+
+
+def test_daily_habit_counts_at_most_seven(sqlite_backend):
+    _, since_day, before_day, scheduled = WeeklyDigest.current_run(datetime(2025, 1, 8, 12))
+    sqlite_backend.create_profile(1, "tester", "UTC")
+    sqlite_backend.add_habit(1, "run")
+    # Logged every day from a day before the window to a day after it
+    for offset in range(-7, 2):
+        day = (scheduled + timedelta(days=offset)).strftime("%Y-%m-%d")
+        sqlite_backend.log_habit(1, "run", day)
+        sqlite_backend.add_mood(1, "calm", f"{day} 09:00:00")
+
+    summary, = sqlite_backend.weekly_summaries([1], since_day, before_day)
+    assert summary["habits"] == [{"habit": "run", "days": 7}]
+    assert len(summary["moods"]) == 7
+    assert "run 7/7" in format_digest(summary, since_day)
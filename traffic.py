@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import discord
+
+
+class TrafficRecorder:
+    """Opt-in recorder that appends anonymized interaction events to a JSONL file.
+
+    Each line holds the command name, when it arrived, how long it took,
+    a salted hash of the user id and the *shape* of the arguments (option
+    type and length), never their values.
+    """
+
+    def __init__(self, path, salt=None):
+        self.path = path
+        if not salt:
+            # Without a fixed salt, hashes are only consistent within one run
+            salt = os.urandom(16).hex()
+            logging.warning("TRAFFIC_SALT is not set; user hashes will change on restart.")
+        self.salt = salt.encode()
+        self.file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def hash_user(self, user_id):
+        return hashlib.sha256(self.salt + str(user_id).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def args_shape(interaction):
+        """Map each option name to ``[type name, length of its value]``."""
+        shape = {}
+        for option in (interaction.data or {}).get("options", []):
+            try:
+                type_name = discord.AppCommandOptionType(option["type"]).name
+            except ValueError:
+                type_name = str(option["type"])
+            shape[option["name"]] = [type_name, len(str(option.get("value", "")))]
+        return shape
+
+    def record(self, interaction, outcome):
+        """Log one finished (or rejected) command interaction."""
+        if interaction.command is None:
+            return
+        created = interaction.created_at.timestamp()
+        event = {
+            "ts": round(created, 3),
+            "cmd": interaction.command.qualified_name,
+            "user": self.hash_user(interaction.user.id),
+            "guild": interaction.guild_id is not None,
+            "args": self.args_shape(interaction),
+            "duration_ms": round((time.time() - created) * 1000, 1),
+            "outcome": outcome,
+        }
+        try:
+            self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logging.error(f"Failed to record traffic event: {e}")
+
+    def close(self):
+        self.file.close()
+
+
+def load_events(path):
+    """Read a recorded traffic log, skipping malformed lines, sorted by arrival time."""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    events.sort(key=lambda event: event["ts"])
+    return events